@@ -1,15 +1,35 @@
-from flask import Flask, request, jsonify, make_response
+from flask import (Flask, Response, request, jsonify, make_response, g, has_app_context,
+                   has_request_context, stream_with_context)
 from flask_cors import CORS
+import click
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import uuid
 import os
+import re
+import itertools
+import sys
+import random
+import logging
+import logging.handlers
+import time
+import atexit
+import threading
+import queue
+import select
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
+import base64
+import hashlib
 
 app = Flask(__name__)
-CORS(app, origins=["http://localhost:5173"], supports_credentials=True)
+
+# Browser origins allowed to call the API with credentials
+CORS_ORIGINS = ["http://localhost:5173"]
+CORS(app, origins=CORS_ORIGINS, supports_credentials=True)
 
 # Database configuration
 DATABASE_CONFIG = {
@@ -20,91 +40,1269 @@ DATABASE_CONFIG = {
     'port': os.getenv('DB_PORT', '5432')
 }
 
-# Global variable to track activities logged in current request
-activities_logged = []
+# Connection pool configuration
+POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '20')),
+    'checkout_timeout': float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '5')),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+    'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+}
+
+# Authenticated user cache configuration
+USER_CACHE_CONFIG = {
+    'max_size': int(os.getenv('USER_CACHE_MAX_SIZE', '10000')),
+    'ttl': float(os.getenv('USER_CACHE_TTL', '60'))
+}
+
+# Public event catalogue cache configuration
+CATALOGUE_CACHE_CONFIG = {
+    'max_size': int(os.getenv('CATALOGUE_CACHE_MAX_SIZE', '1024')),
+    'ttl': float(os.getenv('CATALOGUE_CACHE_TTL', '30'))
+}
+
+# Keyset pagination limits for list endpoints
+PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '200'))
+
+# Most registrations a single bulk accept/reject may change
+BULK_REGISTRATIONS_MAX = int(os.getenv('BULK_REGISTRATIONS_MAX', '5000'))
+
+# Catalogue search result limits
+SEARCH_LIMIT_DEFAULT = int(os.getenv('SEARCH_LIMIT_DEFAULT', '20'))
+SEARCH_LIMIT_MAX = int(os.getenv('SEARCH_LIMIT_MAX', '100'))
+
+# Run registered hot queries as server-side prepared statements (disable
+# behind a transaction-mode pooler such as PgBouncer, which does not keep sessions)
+PREPARE_STATEMENTS = os.getenv('DB_PREPARE_STATEMENTS', 'true').lower() == 'true'
+
+# Rows fetched per round trip by server-side cursors in streaming mode
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+# Activity writer configuration ('async' buffers writes in a background thread,
+# 'sync' inserts each activity before log_activity returns)
+ACTIVITY_WRITER_CONFIG = {
+    'sync': os.getenv('ACTIVITY_WRITER_MODE', 'async') == 'sync',
+    'queue_size': int(os.getenv('ACTIVITY_QUEUE_SIZE', '10000')),
+    'batch_size': int(os.getenv('ACTIVITY_BATCH_SIZE', '500')),
+    'flush_interval': float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '0.5')),
+    'put_timeout': float(os.getenv('ACTIVITY_PUT_TIMEOUT', '1')),
+    'retry_attempts': int(os.getenv('ACTIVITY_RETRY_ATTEMPTS', '3')),
+    'retry_backoff': float(os.getenv('ACTIVITY_RETRY_BACKOFF', '0.2'))
+}
+
+# Server-Sent Events notification stream configuration
+NOTIFICATION_STREAM_CONFIG = {
+    'heartbeat': float(os.getenv('NOTIFICATION_STREAM_HEARTBEAT', '15')),
+    'retry_ms': int(os.getenv('NOTIFICATION_STREAM_RETRY_MS', '3000')),
+    'backlog': int(os.getenv('NOTIFICATION_STREAM_BACKLOG', '100')),
+    'listener': {
+        'channel': 'notifications',
+        'queue_size': int(os.getenv('NOTIFICATION_STREAM_QUEUE_SIZE', '100'))
+    }
+}
+
+def parse_sample_rates(value):
+    """Parse 'endpoint=rate,endpoint=rate' into a dict"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, rate = item.partition('=')
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+# Request logging configuration. LOG_SAMPLE_RATES overrides LOG_SAMPLE_RATE per
+# Flask endpoint, e.g. "get_public_events=0.05,get_pool_stats=0"
+LOGGING_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    'sample_rate': float(os.getenv('LOG_SAMPLE_RATE', '1')),
+    'sample_rates': parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')),
+    'body_max_bytes': int(os.getenv('LOG_BODY_MAX_BYTES', '1024'))
+}
+
+# Request body fields never written to logs
+REDACTED_FIELDS = {'password'}
+
+# Request and database metrics served on /metrics in the Prometheus text format
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    # Send X-DB-Query-Count with each response (read by benchmark.py in http mode)
+    'query_count_header': os.getenv('DB_QUERY_COUNT_HEADER', 'true').lower() == 'true'
+}
+
+# Slow query log: statements slower than threshold_ms (0 disables) are kept in
+# memory for /api/admin/slow-queries, and a sample of them is run through EXPLAIN
+SLOW_QUERY_CONFIG = {
+    'threshold_ms': float(os.getenv('SLOW_QUERY_MS', '200')),
+    'max_entries': int(os.getenv('SLOW_QUERY_MAX_ENTRIES', '500')),
+    'explain_sample_rate': float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0')),
+    'explain_timeout_ms': int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', '5000')),
+    'queue_size': int(os.getenv('SLOW_QUERY_EXPLAIN_QUEUE_SIZE', '100'))
+}
+
+# Opt-in capture of sanitized requests as a replayable trace for benchmark.py
+REQUEST_CAPTURE_CONFIG = {
+    'enabled': os.getenv('CAPTURE_REQUESTS', 'false').lower() == 'true',
+    'path': os.getenv('CAPTURE_PATH', 'requests.jsonl'),
+    'sample_rate': float(os.getenv('CAPTURE_SAMPLE_RATE', '1')),
+    'max_bytes': int(os.getenv('CAPTURE_MAX_BYTES', str(100 * 1024 * 1024))),
+    'backup_count': int(os.getenv('CAPTURE_BACKUP_COUNT', '5')),
+    'buffer_size': int(os.getenv('CAPTURE_BUFFER_SIZE', '100')),
+    'queue_size': int(os.getenv('CAPTURE_QUEUE_SIZE', '10000')),
+    # Long-lived streams cannot be replayed request by request
+    'exclude': {'stream_notifications'}
+}
 
 # ==================== LOGGING MIDDLEWARE ====================
 
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Send the api logger through a queue so request threads never block on stdout"""
+    logger = logging.getLogger('api')
+    logger.setLevel(LOGGING_CONFIG['level'])
+    logger.propagate = False
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return logger
+
+
+logger = configure_logging()
+
+def redact_body(body):
+    """Mask credentials in a logged request body"""
+    if isinstance(body, dict):
+        return {k: '***' if k.lower() in REDACTED_FIELDS else v for k, v in body.items()}
+    return body
+
+def track_activity(user_id, event_id, ticket_id, activity_type, description):
+    """Record an activity against the current request for logging"""
+    if has_request_context():
+        g.setdefault('activities_logged', []).append({
+            'user_id': user_id,
+            'event_id': event_id,
+            'ticket_id': ticket_id,
+            'type': activity_type,
+            'description': description
+        })
+
+def request_sampled(endpoint):
+    """Decide whether a request to the endpoint is logged"""
+    rate = LOGGING_CONFIG['sample_rates'].get(endpoint, LOGGING_CONFIG['sample_rate'])
+    return rate >= 1 or random.random() < rate
+
+def log_request(fields, body=None, activities=()):
+    """Log one structured request line, adding the body and activity detail at DEBUG"""
+    if logger.isEnabledFor(logging.DEBUG):
+        body = redact_body(body)
+        if body:
+            body = json.dumps(body, default=str)
+            limit = LOGGING_CONFIG['body_max_bytes']
+            fields['body'] = body if len(body) <= limit else body[:limit] + '...'
+        fields['activity_log'] = list(activities)
+    
+    level = logging.ERROR if fields['status'] >= 500 else logging.INFO
+    logger.log(level, f"{fields['method']} {fields['path']} {fields['status']}", extra={'fields': fields})
+
 @app.before_request
 def log_request_start():
-    """Log request details at the start"""
-    global activities_logged
-    activities_logged = []  # Reset for each request
+    """Start timing and decide whether this request is sampled for logging"""
+    g.request_started = time.perf_counter()
+    g.log_sampled = request_sampled(request.endpoint)
+
+@app.after_request
+def log_request_end(response):
+    """Log one structured line per request without re-reading the response body"""
+    if not (g.get('log_sampled') or response.status_code >= 500) or not logger.isEnabledFor(logging.INFO):
+        return response
     
-    # Store request data for later use
-    request.logged_data = {
+    user = g.get('current_user')
+    activities = g.get('activities_logged', [])
+    fields = {
         'method': request.method,
         'path': request.path,
-        'body': request.get_json(silent=True) or {},
-        'headers': dict(request.headers),
-        'origin': request.environ.get('HTTP_ORIGIN', 'Unknown')
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 3),
+        'user_id': user['user_id'] if user else None,
+        'origin': request.headers.get('Origin'),
+        'response_bytes': None if response.is_streamed else response.content_length,
+        'db_queries': g.db_stats['queries'] if 'db_stats' in g else 0,
+        'db_ms': round(g.db_stats['time'] * 1000, 3) if 'db_stats' in g else 0.0,
+        'activities': [activity['type'] for activity in activities]
     }
+    log_request(fields, request.get_json(silent=True) if logger.isEnabledFor(logging.DEBUG) else None, activities)
     
-    print("---------------")
-    print(f"{request.method} {request.path}")
-    print(f"body: {json.dumps(request.logged_data['body'], indent=2) if request.logged_data['body'] else '{}'}")
-    print(f"headers: {json.dumps({k: v for k, v in request.logged_data['headers'].items() if k.lower() in ['content-type', 'authorization', 'cookie']}, indent=2)}")
-    print(f"origin: {request.logged_data['origin']}")
+    return response
 
-@app.after_request
-def log_request_end(response):
-    """Log response details at the end"""
-    global activities_logged
-    
-    # Get response data
-    response_data = {}
-    if response.content_type == 'application/json':
+class RequestCapture:
+    """Write sanitized requests to a rotating JSONL trace without blocking request threads
+
+    Records go through a bounded queue to a listener thread that buffers them
+    and appends to a RotatingFileHandler; when the queue is full the record is
+    dropped and counted instead. Access tokens are replaced by stable role
+    aliases ("attendee:0", "organizer:3") and credentials are masked, and each
+    entry keeps its offset from the start of capture so replays can preserve
+    the original arrival pattern.
+    """
+
+    def __init__(self, path, sample_rate=1.0, max_bytes=100 * 1024 * 1024, backup_count=5,
+                 buffer_size=100, queue_size=10000, exclude=()):
+        self.sample_rate = sample_rate
+        self.exclude = set(exclude)
+        self.dropped = 0
+        self._started = time.perf_counter()
+        self._aliases = {}  # access token -> role alias
+        self._role_counts = {}
+        self._lock = threading.Lock()
+
+        self._file = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self._file.setFormatter(logging.Formatter('%(message)s'))
+        self._buffer = logging.handlers.MemoryHandler(buffer_size, flushLevel=logging.CRITICAL,
+                                                      target=self._file)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._listener = logging.handlers.QueueListener(self._queue, self._buffer)
+        self._listener.start()
+
+        self._logger = logging.getLogger('api.capture')
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.handlers = [_DroppingQueueHandler(self._queue, self)]
+
+    def has_alias(self, token):
+        return token in self._aliases
+
+    def alias(self, token, user):
+        """Get the stable alias for an access token, numbering users per role in order of appearance"""
+        with self._lock:
+            if token not in self._aliases:
+                if not user:
+                    return None
+                role = user['role']
+                self._aliases[token] = f"{role}:{self._role_counts.get(role, 0)}"
+                self._role_counts[role] = self._role_counts.get(role, 0) + 1
+            return self._aliases[token]
+
+    def should_capture(self, endpoint):
+        return endpoint not in self.exclude and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def record(self, started, method, path, token, user, body, status, duration_ms):
+        """Queue one trace entry"""
+        entry = {
+            'offset_ms': round((started - self._started) * 1000, 3),
+            'method': method,
+            'path': path
+        }
+        if token:
+            alias = self.alias(token, user)
+            if alias:
+                entry['user'] = alias
+            else:
+                entry['token'] = 'invalid'
+        if body is not None:
+            entry['body'] = redact_body(body)
+        entry['status'] = status
+        entry['duration_ms'] = duration_ms
+        self._logger.info(json.dumps(entry, default=str))
+
+    def close(self):
+        """Drain the queue and flush buffered entries to disk"""
+        if self._listener._thread is not None:
+            self._listener.stop()
+        self._buffer.close()
+        self._file.close()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that counts and drops records instead of blocking on a full queue"""
+
+    def __init__(self, log_queue, capture):
+        super().__init__(log_queue)
+        self.capture = capture
+
+    def enqueue(self, record):
         try:
-            response_data = json.loads(response.get_data(as_text=True))
-        except:
-            response_data = {"raw": response.get_data(as_text=True)}
-    
-    # Log activities
-    print(f"activityLogged: {json.dumps(activities_logged, indent=2) if activities_logged else '[]'}")
-    
-    # Log response
-    print(f"responseBody: {json.dumps(response_data, indent=2)}")
-    print(f"responseCode: {response.status_code}")
-    print("---------------\n")
-    
-    # Reset activities
-    activities_logged = []
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.capture.dropped += 1
+
+
+request_capture = None
+if REQUEST_CAPTURE_CONFIG['enabled']:
+    request_capture = RequestCapture(**{k: v for k, v in REQUEST_CAPTURE_CONFIG.items() if k != 'enabled'})
+    atexit.register(request_capture.close)
+
+@app.after_request
+def capture_request(response):
+    """Append the request to the capture trace when capture is enabled"""
+    if request_capture is None or not request_capture.should_capture(request.endpoint):
+        return response
+    
+    token = get_access_token()
+    user = g.get('current_user')
+    # Public endpoints never resolve the user; look it up once per new token to alias it
+    if token and user is None and not request_capture.has_alias(token):
+        user = get_current_user()
+    path = request.path
+    if request.query_string:
+        path += '?' + request.query_string.decode('utf-8', 'replace')
+    request_capture.record(
+        g.request_started, request.method, path, token, user, request.get_json(silent=True),
+        response.status_code, round((time.perf_counter() - g.request_started) * 1000, 3))
     
     return response
 
+# ==================== METRICS ====================
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# name -> (type, help, histogram buckets)
+METRIC_DEFINITIONS = {
+    'http_requests_total': ('counter', 'Requests handled', None),
+    'http_request_duration_seconds': ('histogram', 'Time to build the response', DURATION_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Queries executed per request', QUERY_COUNT_BUCKETS),
+    'db_time_per_request_seconds': ('histogram', 'Time spent in queries per request', DURATION_BUCKETS),
+    'db_acquire_time_per_request_seconds': ('histogram', 'Time waiting for pooled connections per request',
+                                            DURATION_BUCKETS),
+    'db_rows_per_request': ('histogram', 'Rows returned by queries per request', ROW_BUCKETS)
+}
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format"""
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self._lock = threading.Lock()
+        self._values = {}  # (name, labels) -> value, or [bucket counts..., sum, count] for histograms
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = self.definitions[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self, samples=()):
+        """Render every series, followed by unlabelled (name, type, help, value) samples"""
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+
+        lines = []
+        for name, (kind, help_text, buckets) in self.definitions.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (series_name, labels), value in sorted(values.items()):
+                if series_name != name:
+                    continue
+                if kind == 'counter':
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+                lines.append(f"{name}_sum{format_labels(labels)} {round(value[-2], 6)}")
+                lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+        for name, kind, help_text, value in samples:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    """Format ((name, value), ...) as a Prometheus label set"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+metrics = Metrics(METRIC_DEFINITIONS)
+
+def new_db_stats():
+    return {'queries': 0, 'time': 0.0, 'acquire_time': 0.0, 'rows': 0}
+
+def tally_query(db_stats, started, acquired, rows):
+    """Add one query to a request's database totals"""
+    finished = time.perf_counter()
+    db_stats['queries'] += 1
+    db_stats['time'] += finished - started
+    db_stats['acquire_time'] += (acquired or finished) - started
+    db_stats['rows'] += rows
+
+def record_query(started, acquired, rows):
+    """Add one execute_query call to the current request's database totals"""
+    if not has_request_context():
+        return
+    if 'db_stats' not in g:
+        g.db_stats = new_db_stats()
+    tally_query(g.db_stats, started, acquired, rows)
+
+def observe_request(endpoint, method, status, duration, db_stats):
+    """Aggregate one request's duration and database totals per endpoint"""
+    if not METRICS_CONFIG['enabled']:
+        return
+    labels = {'endpoint': endpoint}
+    metrics.inc('http_requests_total', {'endpoint': endpoint, 'method': method, 'status': str(status)})
+    metrics.observe('http_request_duration_seconds', labels, duration)
+    metrics.observe('db_queries_per_request', labels, db_stats['queries'])
+    metrics.observe('db_time_per_request_seconds', labels, db_stats['time'])
+    metrics.observe('db_acquire_time_per_request_seconds', labels, db_stats['acquire_time'])
+    metrics.observe('db_rows_per_request', labels, db_stats['rows'])
+
+@app.after_request
+def record_request_metrics(response):
+    """Aggregate the request's database totals per endpoint and expose its query count"""
+    db_stats = g.get('db_stats') or new_db_stats()
+    if METRICS_CONFIG['query_count_header']:
+        response.headers[QUERY_COUNT_HEADER] = str(db_stats['queries'])
+    observe_request(request.endpoint or 'unmatched', request.method, response.status_code,
+                    time.perf_counter() - g.request_started, db_stats)
+    return response
+
+# ==================== SLOW QUERY LOG ====================
+
+# Statements that change data are only planned, never executed, by EXPLAIN
+WRITE_STATEMENT_PATTERN = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(NO\s+KEY\s+)?UPDATE\b',
+                                     re.IGNORECASE)
+
+def redact_params(params):
+    """Mask string parameters, which may hold credentials or personal data"""
+    if isinstance(params, dict):
+        return {key: redact_params(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [redact_params(value) for value in params]
+    if isinstance(params, str):
+        return '***'
+    return params
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements with sampled EXPLAIN plans
+
+    Each slow statement is logged and kept with its redacted parameters and
+    the endpoint that ran it. A sample is queued to a background thread that
+    re-runs it under EXPLAIN (ANALYZE, BUFFERS) inside a transaction that is
+    always rolled back; statements that write are planned without ANALYZE so
+    nothing is executed twice. A full queue skips the plan rather than block.
+    """
+
+    def __init__(self, threshold_ms=200.0, max_entries=500, explain_sample_rate=0.0,
+                 explain_timeout_ms=5000, queue_size=100):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self.skipped_explains = 0
+        self._entries = deque(maxlen=max_entries)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+
+    def is_slow(self, duration_ms):
+        return self.threshold_ms > 0 and duration_ms >= self.threshold_ms
+
+    def record(self, sql, params, duration_ms, endpoint):
+        """Keep one slow statement and maybe queue it for EXPLAIN"""
+        entry = {
+            'id': next(self._ids),
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'endpoint': endpoint,
+            'duration_ms': round(duration_ms, 3),
+            'statement': getattr(sql, 'name', None),
+            'sql': ' '.join(str(sql).split()),
+            'params': redact_params(params),
+            'plan': None,
+            'plan_status': 'not_sampled'
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(f"Slow query ({entry['duration_ms']} ms)", extra={'fields': {
+            'endpoint': endpoint, 'duration_ms': entry['duration_ms'], 'sql': entry['sql'][:500]}})
+
+        if self.explain_sample_rate > 0 and random.random() < self.explain_sample_rate:
+            self._ensure_started()
+            try:
+                self._queue.put_nowait((entry, str(sql), params))
+                entry['plan_status'] = 'pending'
+            except queue.Full:
+                self.skipped_explains += 1
+                entry['plan_status'] = 'skipped'
+        return entry
+
+    def entries(self, limit=None, endpoint=None, min_ms=None):
+        """Get recorded statements, slowest first"""
+        with self._lock:
+            entries = list(self._entries)
+        if endpoint:
+            entries = [entry for entry in entries if entry['endpoint'] == endpoint]
+        if min_ms is not None:
+            entries = [entry for entry in entries if entry['duration_ms'] >= min_ms]
+        entries.sort(key=lambda entry: entry['duration_ms'], reverse=True)
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            entry, sql, params = self._queue.get()
+            try:
+                entry['plan'] = self.explain(sql, params)
+                entry['plan_status'] = 'captured'
+            except Exception as e:
+                entry['plan_status'] = f"failed: {e}"
+            finally:
+                self._queue.task_done()
+
+    def explain(self, sql, params):
+        """Get the JSON plan for a statement, discarding anything it did"""
+        options = "FORMAT JSON" if WRITE_STATEMENT_PATTERN.search(sql) else "ANALYZE, BUFFERS, FORMAT JSON"
+        with get_pool().connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", (self.explain_timeout_ms,))
+                    cursor.execute(f"EXPLAIN ({options}) {sql}", params or ())
+                    return cursor.fetchone()[0]
+            finally:
+                conn.rollback()
+
+
+slow_query_log = SlowQueryLog(**SLOW_QUERY_CONFIG)
+
+# ==================== CONNECTION POOL ====================
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 connection pool with health checks and recycling
+
+    Connections are opened lazily up to max_size and handed out LIFO so the
+    warmest connection is reused first. On checkout a connection is discarded
+    if it is closed or older than max_lifetime, and pinged with SELECT 1 if it
+    has been idle longer than health_check_after seconds. The names of the
+    server-side prepared statements each connection holds are tracked with it
+    and forgotten when the connection is discarded.
+    """
+
+    def __init__(self, connect_kwargs, min_size=2, max_size=20, checkout_timeout=5.0,
+                 max_lifetime=1800.0, health_check_after=30.0):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+
+        self._lock = threading.Condition()
+        self._idle = []  # list of (conn, last_used) used as a LIFO stack
+        self._created_at = {}  # conn -> creation time, for every open connection
+        self._prepared = {}  # conn -> names of statements prepared on that session
+        self._opening = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        with self._lock:
+            self._created_at[conn] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created_at.pop(conn, None)
+            self._prepared.pop(conn, None)
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn, created_at, last_used):
+        """Check an idle connection before handing it out"""
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return False
+        if self.health_check_after is not None and now - last_used > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def fill(self):
+        """Open connections until min_size are available"""
+        while not self._closed and len(self._created_at) + self._opening < self.min_size:
+            conn = self._connect()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+
+    def _acquire_slot(self, deadline):
+        """Pop an idle connection or reserve room for a new one (lock held)"""
+        while True:
+            if self._closed:
+                raise PoolTimeout("Connection pool is closed")
+            if self._idle:
+                conn, last_used = self._idle.pop()
+                return conn, self._created_at.get(conn, time.monotonic()), last_used
+            if len(self._created_at) + self._opening < self.max_size:
+                self._opening += 1
+                return None, None, None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._timeouts += 1
+                raise PoolTimeout(f"No database connection available within {self.checkout_timeout}s")
+            self._waiting += 1
+            try:
+                self._lock.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def getconn(self):
+        """Check out a connection, waiting up to checkout_timeout seconds"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        while True:
+            with self._lock:
+                conn, created_at, last_used = self._acquire_slot(deadline)
+            if conn is None:
+                try:
+                    conn = self._connect()
+                finally:
+                    with self._lock:
+                        self._opening -= 1
+                        self._lock.notify()
+                break
+            if self._is_usable(conn, created_at, last_used):
+                break
+            self._discard(conn)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, closing it if broken or expired"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if discard or conn.closed or self._closed:
+            self._discard(conn)
+        with self._lock:
+            self._in_use -= 1
+            if conn in self._created_at:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+    def prepared_statements(self, conn):
+        """Get the set of statement names prepared on a checked-out connection"""
+        with self._lock:
+            return self._prepared.setdefault(conn, set())
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self):
+        """Snapshot of pool usage for monitoring"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'size': len(self._created_at),
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'prepared_statements': sum(len(names) for names in self._prepared.values()),
+                'avg_checkout_ms': round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'max_checkout_ms': round(self._checkout_time_max * 1000, 3)
+            }
+
+    def closeall(self):
+        """Close idle connections and refuse new checkouts"""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_CONFIG, **POOL_CONFIG)
+                _pool.fill()
+    return _pool
+
+@atexit.register
+def close_pool():
+    """Close pooled connections at interpreter shutdown"""
+    if _pool is not None:
+        _pool.closeall()
+
+# ==================== CACHING ====================
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, max_size=1024, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry else None
+
+    def discard_where(self, predicate):
+        """Remove every entry whose value matches predicate"""
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if predicate(v)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Users resolved from access tokens, shared across requests
+user_cache = TTLCache(**USER_CACHE_CONFIG)
+
+# Rendered public catalogue pages keyed by generation, filters and cursor.
+# Writes bump the generation, so a page rendered from a read that raced
+# with the write is stored under a stale key and never served.
+catalogue_cache = TTLCache(**CATALOGUE_CACHE_CONFIG)
+catalogue_lock = threading.Lock()
+catalogue_generation = 0
+
+def invalidate_catalogue():
+    """Drop cached catalogue pages after an event or its availability changes"""
+    global catalogue_generation
+    with catalogue_lock:
+        catalogue_generation += 1
+        catalogue_cache.clear()
+
+# ==================== ACTIVITY WRITER ====================
+
+class ActivityWriter:
+    """Buffers activity rows and inserts them in batches from a background thread
+
+    Records are flushed when batch_size rows are queued or flush_interval
+    seconds have passed. When the queue is full, submit() blocks for up to
+    put_timeout seconds and then writes the record inline, so callers slow
+    down instead of losing activity. A failed insert is retried with
+    exponential backoff, then split into single-row inserts so one bad row
+    cannot take the rest of its batch down with it; only rows the database
+    still rejects are dropped, and each is logged in full. close() drains
+    everything still queued.
+    """
+
+    _STOP = object()
+
+    def __init__(self, sync=False, queue_size=10000, batch_size=500, flush_interval=0.5, put_timeout=1.0,
+                 retry_attempts=3, retry_backoff=0.2):
+        self.sync = sync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retry_attempts = retry_attempts
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+                    self._thread.start()
+
+    def submit(self, record):
+        """Queue one (user_id, event_id, ticket_id, activity_type, description) row"""
+        if self.sync:
+            self.write([record])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self.write([record])
+
+    def insert(self, records):
+        """Insert records with a single multi-row INSERT, returning whether it succeeded"""
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(records))
+        sql = f"INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description) VALUES {values}"
+        params = [value for record in records for value in record]
+        return execute_query(sql, params) is not None
+
+    def write(self, records):
+        """Insert records, retrying with backoff and then row by row before giving up on any"""
+        if not records:
+            return
+        for attempt in range(self.retry_attempts):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            if self.insert(records):
+                return
+        logger.warning("Activity batch insert failed, retrying row by row",
+                       extra={'fields': {'count': len(records)}})
+        for record in records:
+            if len(records) == 1 or not self.insert([record]):
+                logger.error("Dropped activity record the database rejected", extra={'fields': {
+                    'user_id': record[0], 'event_id': record[1], 'ticket_id': record[2],
+                    'activity_type': record[3], 'description': record[4]}})
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            batch = [] if record is self._STOP else [record]
+            stopping = record is self._STOP
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is self._STOP:
+                    stopping = True
+                else:
+                    batch.append(record)
+            try:
+                self.write(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Stop the background thread after draining the queue"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self.write([record for record in leftover if record is not self._STOP])
+
+
+activity_writer = ActivityWriter(**ACTIVITY_WRITER_CONFIG)
+
+@atexit.register
+def close_activity_writer():
+    """Flush buffered activity before the pool closes at shutdown"""
+    activity_writer.close()
+
+# ==================== NOTIFICATION STREAM ====================
+
+class NotificationListener:
+    """Shares one LISTEN connection across every streaming client
+
+    A background thread waits on the notification channel and routes each
+    payload to the queues of the recipient's open streams. A client whose
+    queue fills up, or that may have missed events while the connection
+    was being re-established, is sent a resync marker so it refetches the
+    inbox instead.
+    """
+
+    RESYNC = {'type': 'resync'}
+
+    def __init__(self, connect_kwargs, channel='notifications', queue_size=100, poll_interval=1.0,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0):
+        self.connect_kwargs = connect_kwargs
+        self.channel = channel
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> set of queues
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def subscribe(self, user_id, subscription=None):
+        """Get a queue receiving the user's notifications, starting the listener if needed
+
+        Callers may pass their own bounded queue.Queue, e.g. one that wakes an event loop.
+        """
+        if subscription is None:
+            subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='notification-listener', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(subscription)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, payload):
+        """Route one NOTIFY payload to its recipient's open streams"""
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed notification payload")
+            return
+        with self._lock:
+            queues = list(self._subscribers.get(notification.get('user_id'), ()))
+        for subscription in queues:
+            self._offer(subscription, notification)
+
+    def resync_all(self):
+        with self._lock:
+            queues = [q for user_queues in self._subscribers.values() for q in user_queues]
+        for subscription in queues:
+            self._offer(subscription, self.RESYNC)
+
+    def _offer(self, subscription, item):
+        try:
+            subscription.put_nowait(item)
+        except queue.Full:
+            # The client is not keeping up; drop its backlog and have it refetch
+            with subscription.mutex:
+                subscription.queue.clear()
+            try:
+                subscription.put_nowait(self.RESYNC)
+            except queue.Full:
+                pass
+
+    def _run(self):
+        delay = self.reconnect_delay
+        connected_before = False
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.connect_kwargs)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                delay = self.reconnect_delay
+
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], self.poll_interval)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self.dispatch(conn.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError, ValueError) as e:
+                if self._stopped.is_set():
+                    break
+                logger.error(f"Notification listener disconnected: {e}")
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def close(self):
+        """Stop the listener thread and close its connection"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+
+
+notification_listener = NotificationListener(DATABASE_CONFIG, **NOTIFICATION_STREAM_CONFIG['listener'])
+
+@atexit.register
+def close_notification_listener():
+    """Stop listening for notifications at shutdown"""
+    notification_listener.close()
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
 # ==================== HELPER FUNCTIONS ====================
 
+# Event columns returned to clients; the search columns stay internal
+EVENT_FIELDS = ('event_id', 'organizer_id', 'title', 'description', 'category', 'datetime', 'location',
+                'venue_name', 'max_capacity', 'current_registrations', 'general_price', 'vip_price',
+                'premium_price', 'status', 'image_url', 'requirements', 'created_at', 'updated_at')
+
+def event_columns(alias=None):
+    """Get the client-facing event column list, optionally table-qualified"""
+    return ', '.join(f"{alias}.{field}" if alias else field for field in EVENT_FIELDS)
+
+PLACEHOLDER_PATTERN = re.compile(r'%%|%s')
+
+def positional_sql(sql):
+    """Rewrite psycopg2 %s placeholders as server-side $1, $2, ... parameters"""
+    counter = itertools.count(1)
+    return PLACEHOLDER_PATTERN.sub(lambda m: '%' if m.group() == '%%' else f"${next(counter)}", sql)
+
+class PreparedStatement(str):
+    """SQL text registered under a name so execute_query can run it with PREPARE/EXECUTE
+
+    It is still a str, so it can be streamed, formatted or rewritten for
+    asyncpg like any other query; only execute_query treats it specially.
+    """
+
+    def __new__(cls, name, sql):
+        statement = super().__new__(cls, sql)
+        statement.name = name
+        positional = positional_sql(sql)
+        arity = len(re.findall(r'\$\d+', positional))
+        statement.prepare_sql = f"PREPARE {name} AS {positional}"
+        statement.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * arity)})" if arity else f"EXECUTE {name}"
+        return statement
+
+# Hot queries by statement name
+PREPARED_STATEMENTS = {}
+
+def prepared_statement(name, sql):
+    """Register a hot query to be prepared lazily on each pooled connection"""
+    if name in PREPARED_STATEMENTS and PREPARED_STATEMENTS[name] != sql:
+        raise ValueError(f"Prepared statement {name} is already registered")
+    PREPARED_STATEMENTS[name] = PreparedStatement(name, sql)
+    return PREPARED_STATEMENTS[name]
+
+def execute_prepared(conn, cursor, statement, params):
+    """Execute a registered statement by name, preparing it first on this connection if needed"""
+    prepared = get_pool().prepared_statements(conn)
+    if statement.name not in prepared:
+        cursor.execute(statement.prepare_sql)
+        prepared.add(statement.name)
+    try:
+        cursor.execute(statement.execute_sql, params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # The session lost its statements (DISCARD ALL, server-side reset): prepare again
+        conn.rollback()
+        cursor.execute("DEALLOCATE ALL")
+        prepared.clear()
+        cursor.execute(statement.prepare_sql)
+        prepared.add(statement.name)
+        cursor.execute(statement.execute_sql, params)
+
 def execute_query(sql, params=None, fetch_one=False, fetch_all=False):
-    """Execute database query with automatic connection management"""
+    """Execute database query on a pooled connection, by name for registered statements"""
+    started = time.perf_counter()
+    acquired = None
+    rows = 0
     try:
-        with psycopg2.connect(**DATABASE_CONFIG) as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(sql, params or ())
-                if fetch_one:
-                    return cursor.fetchone()
-                if fetch_all:
-                    return cursor.fetchall()
+        with get_pool().connection() as conn:
+            acquired = time.perf_counter()
+            try:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    if PREPARE_STATEMENTS and isinstance(sql, PreparedStatement):
+                        execute_prepared(conn, cursor, sql, params or ())
+                    else:
+                        cursor.execute(sql, params or ())
+                    if fetch_one:
+                        result = cursor.fetchone()
+                        rows = 1 if result else 0
+                    elif fetch_all:
+                        result = cursor.fetchall()
+                        rows = len(result)
+                    else:
+                        result = cursor.rowcount
                 conn.commit()
-                return cursor.rowcount
+                return result
+            except Exception:
+                conn.rollback()
+                raise
     except Exception as e:
-        print(f"Database error: {str(e)}")
+        logger.error(f"Database error: {str(e)}")
         return None
+    finally:
+        record_query(started, acquired, rows)
+        duration_ms = (time.perf_counter() - (acquired or started)) * 1000
+        if slow_query_log.is_slow(duration_ms):
+            slow_query_log.record(sql, params, duration_ms, request.endpoint if has_request_context() else None)
+
+def stream_query(sql, params=None, chunk_size=None):
+    """Yield rows from a named server-side cursor, fetching chunk_size rows per round trip
+
+    The query counts toward the request's totals once its first batch
+    arrives, which streaming_response waits for before the response (and
+    its query count header) starts. The slow query log gets the time spent
+    in the database, not the time spent waiting on the client.
+    """
+    started = time.perf_counter()
+    acquired = None
+    recorded = False
+    rows = 0
+    db_time = 0.0
+    call_started = None
+    try:
+        with get_pool().connection() as conn:
+            acquired = time.perf_counter()
+            try:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cursor:
+                    call_started = time.perf_counter()
+                    cursor.execute(sql, params or ())
+                    while True:
+                        batch = cursor.fetchmany(chunk_size or STREAM_CHUNK_SIZE)
+                        db_time += time.perf_counter() - call_started
+                        call_started = None
+                        rows += len(batch)
+                        if not recorded:
+                            record_query(started, acquired, rows)
+                            recorded = True
+                        if not batch:
+                            break
+                        yield from batch
+                        call_started = time.perf_counter()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        if call_started is not None:
+            db_time += time.perf_counter() - call_started
+        if not recorded:
+            record_query(started, acquired, rows)
+        if slow_query_log.is_slow(db_time * 1000):
+            slow_query_log.record(sql, params, db_time * 1000,
+                                  request.endpoint if has_request_context() else None)
 
 def log_activity(user_id, event_id, ticket_id, activity_type, description):
-    """Log activity to database and tracking list"""
-    global activities_logged
-    
-    sql = "INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description) VALUES (%s, %s, %s, %s, %s)"
-    execute_query(sql, (user_id, event_id, ticket_id, activity_type, description))
-    
-    # Track for request logging
-    activities_logged.append({
-        'user_id': user_id,
-        'event_id': event_id,
-        'ticket_id': ticket_id,
-        'type': activity_type,
-        'description': description
-    })
+    """Queue activity for the batched writer and track it for request logging"""
+    activity_writer.submit((user_id, event_id, ticket_id, activity_type, description))
+    track_activity(user_id, event_id, ticket_id, activity_type, description)
 
 def generate_booking_reference():
     """Generate unique booking reference"""
@@ -114,15 +1312,35 @@ def get_access_token():
     """Get access token from cookies"""
     return request.cookies.get('accessToken')
 
+USER_BY_ID_SQL = prepared_statement(
+    'user_by_id', "SELECT user_id, first_name, last_name, email, role, organization FROM users WHERE user_id = %s")
+
 def get_user_by_token(access_token):
-    """Get user data by access token"""
+    """Get user data by access token, served from user_cache when warm"""
     if not access_token:
         return None
+    user = user_cache.get(access_token)
+    if user is not None:
+        return user
     try:
-        sql = "SELECT user_id, first_name, last_name, email, role, organization FROM users WHERE user_id = %s"
-        return execute_query(sql, (int(access_token),), fetch_one=True)
+        user = execute_query(USER_BY_ID_SQL, (int(access_token),), fetch_one=True)
     except ValueError:
         return None
+    if user:
+        user_cache.set(access_token, user)
+    return user
+
+def get_current_user():
+    """Get the authenticated user, resolved at most once per request"""
+    if 'current_user' not in g:
+        g.current_user = get_user_by_token(get_access_token())
+    return g.current_user
+
+def invalidate_user(user_id):
+    """Drop cached principals for a user after their role or profile changes"""
+    user_cache.discard_where(lambda user: user['user_id'] == user_id)
+    if has_app_context() and g.get('current_user') and g.current_user['user_id'] == user_id:
+        g.pop('current_user')
 
 def is_admin(access_token):
     """Check if user has admin privileges"""
@@ -148,7 +1366,7 @@ def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        if not get_user_by_token(get_access_token()):
+        if not get_current_user():
             return jsonify({"message": "Unauthorized"}), 401
         return f(*args, **kwargs)
     return decorated
@@ -157,7 +1375,8 @@ def require_admin(f):
     """Decorator to require admin privileges"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        if not is_admin(get_access_token()):
+        user = get_current_user()
+        if not (user and user.get('role') == 'admin'):
             return jsonify({"error": "Admin access required"}), 403
         return f(*args, **kwargs)
     return decorated
@@ -166,7 +1385,8 @@ def require_organizer(f):
     """Decorator to require organizer privileges"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        if not is_organizer(get_access_token()):
+        user = get_current_user()
+        if not (user and user.get('role') == 'organizer'):
             return jsonify({"message": "Only organizers can access this endpoint"}), 403
         return f(*args, **kwargs)
     return decorated
@@ -202,6 +1422,121 @@ def convert_camel_to_snake(data):
         return {conversion_map.get(key, key): value for key, value in data.items()}
     return data
 
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """Decode a cursor into its sort key values, raising ValueError if malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+def get_page_params(key_size):
+    """Get (limit, cursor values) from the query string"""
+    limit = request.args.get('limit', PAGE_SIZE_DEFAULT, type=int)
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor, key_size) if cursor else None
+
+def paginate(rows, limit, sort_key):
+    """Trim the extra lookahead row and build the next-page cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*sort_key(rows[-1]))
+
+def set_next_cursor(response, next_cursor):
+    """Expose the next-page cursor on a list response"""
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def wants_stream():
+    """Check whether the client asked for a streamed response"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_json_array(first, rows, transform):
+    """Serialize rows as a JSON array, yielding one chunk per STREAM_CHUNK_SIZE rows"""
+    separator = '['
+    chunk = [app.json.dumps(transform(first))]
+    for row in rows:
+        chunk.append(app.json.dumps(transform(row)))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield separator + ','.join(chunk)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + ','.join(chunk)
+    yield ']'
+
+def streaming_response(rows, transform=dict, wrap=None):
+    """Stream rows as a JSON array (optionally wrapped as {wrap: [...]})
+
+    The first row is fetched before the response starts so that query errors
+    still produce a 500 instead of a truncated 200.
+    """
+    rows = iter(rows)
+    try:
+        first = next(rows, None)
+    except Exception as e:
+        logger.error(f"Database error: {str(e)}")
+        return jsonify({"message": "Failed to load results"}), 500
+
+    if first is None:
+        body = iter(['[]'])
+    else:
+        body = stream_json_array(first, rows, transform)
+    if wrap:
+        body = _wrap_stream(wrap, body)
+    return Response(stream_with_context(body), mimetype='application/json')
+
+def _wrap_stream(key, body):
+    yield '{' + json.dumps(key) + ':'
+    yield from body
+    yield '}'
+
+def organizer_summary_sql(include_active=False):
+    """Build the organizer_summary read, optionally counting upcoming active events"""
+    active_sql = """,
+            (SELECT COUNT(*) FROM events
+             WHERE organizer_id = o.organizer_id AND status = 'active' AND datetime > NOW()) as active_events""" \
+        if include_active else ""
+    return f"""
+        SELECT 
+            COALESCE(s.total_events, 0) as total_events,
+            COALESCE(s.total_tickets, 0) as total_tickets,
+            COALESCE(s.total_attendees, 0) as total_attendees,
+            COALESCE(s.total_revenue, 0) as total_revenue{active_sql}
+        FROM (SELECT %s::int as organizer_id) o
+        LEFT JOIN organizer_summary s ON s.organizer_id = o.organizer_id
+    """
+
+ORGANIZER_SUMMARY_SQL = {
+    False: prepared_statement('organizer_summary', organizer_summary_sql()),
+    True: prepared_statement('organizer_dashboard', organizer_summary_sql(include_active=True))
+}
+
+def get_organizer_summary(organizer_id, include_active=False):
+    """Get an organizer's dashboard totals from organizer_summary"""
+    return execute_query(ORGANIZER_SUMMARY_SQL[include_active], (organizer_id,), fetch_one=True)
+
+SUMMARY_RECONCILERS = ('reconcile_organizer_summary', 'reconcile_event_rollups',
+                       'reconcile_notification_counts', 'reconcile_event_registrations')
+
+def reconcile_summaries():
+    """Rebuild trigger-maintained summaries, returning drifted rows per summary"""
+    results = {}
+    for function in SUMMARY_RECONCILERS:
+        result = execute_query(f"SELECT {function}() as drifted", fetch_one=True)
+        results[function] = result['drifted'] if result else None
+    return results
+
 # ==================== USER AUTHENTICATION ENDPOINTS ====================
 
 @app.route('/api/register', methods=['POST'])
@@ -250,7 +1585,7 @@ def register():
     except psycopg2.IntegrityError:
         return jsonify({"message": "Email already exists"}), 400
     except Exception as e:
-        print(f"Registration error: {str(e)}")
+        logger.error(f"Registration error: {str(e)}")
         return jsonify({"message": "Registration failed"}), 500
     
     return jsonify({"message": "Registration failed"}), 500
@@ -277,7 +1612,7 @@ def login():
 @app.route('/api/profile', methods=['GET'])
 @require_auth
 def get_profile():
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     sql = "SELECT user_id, first_name, last_name, email, role, organization, phone, bio FROM users WHERE user_id = %s"
     profile = execute_query(sql, (user['user_id'],), fetch_one=True)
     
@@ -301,70 +1636,74 @@ def validate_email():
 
 # ==================== BUSINESS DASHBOARD ENDPOINTS ====================
 
+# Organizer dashboard event list with per-type figures from event_rollups
+ORGANIZER_EVENTS_SQL = prepared_statement('organizer_events', """
+    SELECT 
+        e.event_id,
+        e.title,
+        e.category,
+        e.datetime,
+        e.location,
+        e.general_price,
+        e.vip_price,
+        e.premium_price,
+        e.current_registrations as attendees,
+        e.status,
+        COALESCE(r.revenue, 0) as revenue,
+        COALESCE(r.general_registrations, 0) as general_registrations,
+        COALESCE(r.vip_registrations, 0) as vip_registrations,
+        COALESCE(r.premium_registrations, 0) as premium_registrations
+    FROM events e
+    LEFT JOIN event_rollups r ON r.event_id = e.event_id
+    WHERE e.organizer_id = %s
+    ORDER BY e.datetime DESC
+""")
+
 @app.route('/api/events', methods=['GET'])
 @require_organizer
 def get_events():
     """Get all events for the logged-in organizer"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    sql = """
-        SELECT 
-            e.event_id,
-            e.title,
-            e.category,
-            e.datetime,
-            e.location,
-            e.general_price,
-            e.vip_price,
-            e.premium_price,
-            e.current_registrations as attendees,
-            e.status,
-            COALESCE(SUM(t.price_paid), 0) as revenue,
-            COUNT(CASE WHEN t.ticket_type = 'general' THEN 1 END) as general_registrations,
-            COUNT(CASE WHEN t.ticket_type = 'vip' THEN 1 END) as vip_registrations,
-            COUNT(CASE WHEN t.ticket_type = 'premium' THEN 1 END) as premium_registrations
-        FROM events e
-        LEFT JOIN tickets t ON e.event_id = t.event_id AND t.status = 'registered'
-        WHERE e.organizer_id = %s
-        GROUP BY e.event_id
-        ORDER BY e.datetime DESC
-    """
+    if wants_stream():
+        return streaming_response(stream_query(ORGANIZER_EVENTS_SQL, (user['user_id'],)),
+                                  format_organizer_event, wrap='events')
     
-    events = execute_query(sql, (user['user_id'],), fetch_all=True)
-    
-    formatted_events = []
-    for event in events:
-        formatted_events.append({
-            'id': event['event_id'],
-            'title': event['title'],
-            'category': event['category'],
-            'date': event['datetime'].isoformat() if event['datetime'] else None,
-            'location': event['location'],
-            'price': {
-                'general': float(event['general_price'] or 0),
-                'vip': float(event['vip_price'] or 0),
-                'premium': float(event['premium_price'] or 0)
-            },
-            'attendees': event['attendees'],
-            'revenue': float(event['revenue']),
-            'status': event['status'],
-            'registrations': {
-                'general': event['general_registrations'],
-                'vip': event['vip_registrations'],
-                'premium': event['premium_registrations']
-            }
-        })
+    events = execute_query(ORGANIZER_EVENTS_SQL, (user['user_id'],), fetch_all=True)
     
-    return jsonify({'events': formatted_events})
+    return jsonify({'events': [format_organizer_event(event) for event in events]})
+
+def format_organizer_event(event):
+    """Format an event row for the organizer dashboard"""
+    return {
+        'id': event['event_id'],
+        'title': event['title'],
+        'category': event['category'],
+        'date': event['datetime'].isoformat() if event['datetime'] else None,
+        'location': event['location'],
+        'price': {
+            'general': float(event['general_price'] or 0),
+            'vip': float(event['vip_price'] or 0),
+            'premium': float(event['premium_price'] or 0)
+        },
+        'attendees': event['attendees'],
+        'revenue': float(event['revenue']),
+        'status': event['status'],
+        'registrations': {
+            'general': event['general_registrations'],
+            'vip': event['vip_registrations'],
+            'premium': event['premium_registrations']
+        }
+    }
 
 @app.route('/api/events/<int:event_id>', methods=['GET'])
 @require_organizer
 def get_event(event_id):
     """Get single event details"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    sql = """
-        SELECT * FROM events 
+    sql = f"""
+        SELECT {event_columns()} FROM events 
         WHERE event_id = %s AND organizer_id = %s
     """
     
@@ -379,7 +1718,7 @@ def get_event(event_id):
 @require_organizer
 def create_event():
     """Create a new event"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     data = request.get_json()
     
     # Convert snake_case from frontend
@@ -413,6 +1752,7 @@ def create_event():
     result = execute_query(sql, params, fetch_one=True)
     
     if result:
+        invalidate_catalogue()
         log_activity(user['user_id'], result['event_id'], None, "event_created",
                     f"Created event: {data.get('title')}")
         return jsonify({"event_id": result['event_id'], "message": "Event created successfully"}), 201
@@ -423,7 +1763,7 @@ def create_event():
 @require_organizer
 def update_event(event_id):
     """Update an existing event"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     data = request.get_json()
     
     # Convert snake_case from frontend
@@ -474,6 +1814,7 @@ def update_event(event_id):
     result = execute_query(sql, params)
     
     if result:
+        invalidate_catalogue()
         log_activity(user['user_id'], event_id, None, "event_updated",
                     f"Updated event: {data.get('title')}")
         return jsonify({"message": "Event updated successfully"})
@@ -484,100 +1825,86 @@ def update_event(event_id):
 @require_organizer
 def delete_event(event_id):
     """Delete an event and refund all tickets"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    # Verify ownership
-    check_sql = "SELECT title FROM events WHERE event_id = %s AND organizer_id = %s"
-    event = execute_query(check_sql, (event_id, user['user_id']), fetch_one=True)
+    # Refund, cancel and log every refund in one statement so the whole
+    # cancellation commits or rolls back as a single transaction
+    sql = """
+        WITH event AS (
+            SELECT event_id, title FROM events
+            WHERE event_id = %s AND organizer_id = %s
+            FOR UPDATE
+        ),
+        refunded AS (
+            UPDATE tickets t
+            SET status = 'refunded', updated_at = CURRENT_TIMESTAMP
+            FROM event
+            WHERE t.event_id = event.event_id AND t.status IN ('registered', 'pending')
+            RETURNING t.user_id
+        ),
+        cancelled AS (
+            UPDATE events e
+            SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+            FROM event
+            WHERE e.event_id = event.event_id
+        ),
+        logged AS (
+            INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description)
+            SELECT %s, event.event_id, NULL::int, 'event_cancelled',
+                   'Cancelled event: ' || event.title || ' and refunded ' ||
+                   (SELECT COUNT(*) FROM refunded) || ' tickets'
+            FROM event
+            UNION ALL
+            SELECT r.user_id, event.event_id, NULL::int, 'ticket_refunded',
+                   'Your ' || COUNT(*) || ' ticket(s) for ''' || event.title ||
+                   ''' have been refunded due to event cancellation'
+            FROM refunded r, event
+            GROUP BY r.user_id, event.event_id, event.title
+        )
+        SELECT event.title, (SELECT COUNT(*) FROM refunded) as tickets_refunded
+        FROM event
+    """
     
-    if not event:
+    result = execute_query(sql, (event_id, user['user_id'], user['user_id']), fetch_one=True)
+    
+    if not result:
         return jsonify({"message": "Event not found or unauthorized"}), 404
     
-    try:
-        # Start a transaction to ensure both operations succeed or fail together
-        
-        # 1. Update all tickets for this event to 'refunded' status
-        refund_sql = """
-            UPDATE tickets 
-            SET status = 'refunded' 
-            WHERE event_id = %s AND status IN ('registered', 'pending')
-        """
-        refund_result = execute_query(refund_sql, (event_id,))
-        
-        # 2. Get count of refunded tickets for logging
-        count_sql = """
-            SELECT COUNT(*) as count 
-            FROM tickets 
-            WHERE event_id = %s AND status = 'refunded'
-        """
-        refund_count = execute_query(count_sql, (event_id,), fetch_one=True)
-        
-        # 3. Soft delete by updating event status to 'cancelled'
-        cancel_sql = "UPDATE events SET status = 'cancelled' WHERE event_id = %s AND organizer_id = %s"
-        cancel_result = execute_query(cancel_sql, (event_id, user['user_id']))
-        
-        if cancel_result:
-            # Log the activity with refund information
-            log_activity(
-                user['user_id'], 
-                event_id, 
-                None, 
-                "event_cancelled",
-                f"Cancelled event: {event['title']} and refunded {refund_count['count']} tickets"
-            )
-            
-            # Optionally, log individual refund activities for each affected user
-            refunded_users_sql = """
-                SELECT DISTINCT user_id, COUNT(*) as ticket_count 
-                FROM tickets 
-                WHERE event_id = %s AND status = 'refunded'
-                GROUP BY user_id
-            """
-            refunded_users = execute_query(refunded_users_sql, (event_id,), fetch_all=True)
-            
-            for refunded_user in refunded_users:
-                log_activity(
-                    refunded_user['user_id'],
-                    event_id,
-                    None,
-                    "ticket_refunded",
-                    f"Your {refunded_user['ticket_count']} ticket(s) for '{event['title']}' have been refunded due to event cancellation"
-                )
-            
-            return jsonify({
-                "message": "Event cancelled successfully",
-                "tickets_refunded": refund_count['count']
-            })
-            
-    except Exception as e:
-        # If any error occurs, the transaction should be rolled back
-        # (assuming your execute_query handles transactions properly)
-        return jsonify({"message": f"Failed to delete event: {str(e)}"}), 500
+    invalidate_catalogue()
+    track_activity(user['user_id'], event_id, None, "event_cancelled",
+                   f"Cancelled event: {result['title']} and refunded {result['tickets_refunded']} tickets")
     
-    return jsonify({"message": "Failed to delete event"}), 500
+    return jsonify({
+        "message": "Event cancelled successfully",
+        "tickets_refunded": result['tickets_refunded']
+    })
 
 @app.route('/api/events/<int:event_id>/report', methods=['GET'])
 @require_organizer
 def get_event_report(event_id):
     """Get detailed report for an event"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
     # Verify ownership
-    check_sql = "SELECT * FROM events WHERE event_id = %s AND organizer_id = %s"
+    check_sql = f"SELECT {event_columns()} FROM events WHERE event_id = %s AND organizer_id = %s"
     event = execute_query(check_sql, (event_id, user['user_id']), fetch_one=True)
     
     if not event:
         return jsonify({"message": "Event not found or unauthorized"}), 404
     
-    # Get ticket statistics
+    # Get ticket statistics from the maintained rollup row
     stats_sql = """
         SELECT 
-            ticket_type,
-            COUNT(*) as count,
-            SUM(price_paid) as revenue
-        FROM tickets
-        WHERE event_id = %s AND status = 'registered'
-        GROUP BY ticket_type
+            v.ticket_type,
+            v.count,
+            v.revenue
+        FROM event_rollups r
+        CROSS JOIN LATERAL (VALUES
+            ('general', r.general_registrations, r.general_revenue),
+            ('vip', r.vip_registrations, r.vip_revenue),
+            ('premium', r.premium_registrations, r.premium_revenue)
+        ) as v(ticket_type, count, revenue)
+        WHERE r.event_id = %s AND v.count > 0
     """
     
     stats = execute_query(stats_sql, (event_id,), fetch_all=True)
@@ -593,39 +1920,59 @@ def get_event_report(event_id):
 @require_organizer
 def send_event_reminder(event_id):
     """Send reminder to all event attendees"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    # Verify ownership
-    check_sql = "SELECT title FROM events WHERE event_id = %s AND organizer_id = %s"
-    event = execute_query(check_sql, (event_id, user['user_id']), fetch_one=True)
+    # Verify ownership, then log a reminder for every registered ticket and
+    # the organizer's summary in a single statement
+    sql = """
+        WITH event AS (
+            SELECT event_id, title FROM events
+            WHERE event_id = %s AND organizer_id = %s
+        ),
+        reminded AS (
+            INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description)
+            SELECT t.user_id, t.event_id, t.ticket_id, 'reminder_received',
+                   'Received reminder for event: ' || event.title
+            FROM tickets t
+            JOIN event ON t.event_id = event.event_id
+            WHERE t.status = 'registered'
+            RETURNING user_id
+        ),
+        sent AS (
+            INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description)
+            SELECT %s, event.event_id, NULL, 'reminder_sent',
+                   'Sent reminder to ' || (SELECT COUNT(*) FROM reminded) || ' attendees for ' || event.title
+            FROM event
+        )
+        SELECT event.title, (SELECT COUNT(*) FROM reminded) as attendee_count
+        FROM event
+    """
+    result = execute_query(sql, (event_id, user['user_id'], user['user_id']), fetch_one=True)
     
-    if not event:
+    if not result:
         return jsonify({"message": "Event not found or unauthorized"}), 404
     
-    # Get all attendees for this event
-    attendees_sql = """SELECT DISTINCT t.user_id, t.ticket_id 
-                       FROM tickets t 
-                       WHERE t.event_id = %s AND t.status = 'registered'"""
-    attendees = execute_query(attendees_sql, (event_id,), fetch_all=True)
-    
-    attendee_count = len(attendees) if attendees else 0
-    
-    # Log activity for each attendee
-    for attendee in attendees:
-        log_activity(attendee['user_id'], event_id, attendee['ticket_id'], "reminder_received",
-                    f"Received reminder for event: {event['title']}")
+    attendee_count = result['attendee_count']
     
-    # Log activity for organizer
-    log_activity(user['user_id'], event_id, None, "reminder_sent",
-                f"Sent reminder to {attendee_count} attendees for {event['title']}")
+    track_activity(user['user_id'], event_id, None, "reminder_sent",
+                   f"Sent reminder to {attendee_count} attendees for {result['title']}")
     
     return jsonify({"message": f"Reminder sent to {attendee_count} attendees"})
 
+# Ticket statuses that hold one of the event's seats (book_ticket reserves at 'pending')
+CAPACITY_HOLDING_STATUSES = ('pending', 'registered')
+
+# Registration transitions: target status, activity type and the statuses each action may move
+REGISTRATION_ACTIONS = {
+    'accept': ('registered', 'registration_accepted', 'Accepted', 'accepted', ['pending']),
+    'reject': ('rejected', 'registration_rejected', 'Rejected', 'rejected', ['pending', 'registered', 'refunded'])
+}
+
 @app.route('/api/registrations/<int:registration_id>/accept', methods=['PUT'])
 @require_organizer
 def accept_registration(registration_id):
     """Accept a ticket registration"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
     # Verify ownership
     check_sql = """
@@ -639,22 +1986,33 @@ def accept_registration(registration_id):
     if not ticket:
         return jsonify({"message": "Registration not found or unauthorized"}), 404
     
-    # Update status from pending to registered
-    sql = "UPDATE tickets SET status = 'registered' WHERE ticket_id = %s"
-    result = execute_query(sql, (registration_id,))
+    # Only pending tickets can be accepted: book_ticket already reserved their
+    # seat, whereas a rejected or refunded ticket would take capacity it never held
+    if ticket['status'] != 'pending':
+        return jsonify({"message": "Only pending registrations can be accepted"}), 400
     
-    if result:
-        log_activity(user['user_id'], ticket['event_id'], registration_id, "registration_accepted",
-                    f"Accepted registration for {ticket['event_title']}")
-        return jsonify({"message": "Registration accepted"})
+    # The status guard makes a concurrent accept or reject of the same ticket a no-op
+    sql = """
+        UPDATE tickets SET status = 'registered'
+        WHERE ticket_id = %s AND status = 'pending'
+        RETURNING event_id
+    """
+    changed = execute_query(sql, (registration_id,), fetch_all=True)
+    
+    if changed is None:
+        return jsonify({"message": "Failed to accept registration"}), 500
+    if not changed:
+        return jsonify({"message": "Registration was changed by another request"}), 409
     
-    return jsonify({"message": "Failed to accept registration"}), 500
+    log_activity(user['user_id'], ticket['event_id'], registration_id, "registration_accepted",
+                f"Accepted registration for {ticket['event_title']}")
+    return jsonify({"message": "Registration accepted"})
 
 @app.route('/api/registrations/<int:registration_id>/reject', methods=['PUT'])
 @require_organizer
 def reject_registration(registration_id):
     """Reject a ticket registration"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
     # Verify ownership
     check_sql = """
@@ -668,31 +2026,186 @@ def reject_registration(registration_id):
     if not ticket:
         return jsonify({"message": "Registration not found or unauthorized"}), 404
     
-    # Update status from pending to rejected
-    sql = "UPDATE tickets SET status = 'rejected' WHERE ticket_id = %s"
-    result = execute_query(sql, (registration_id,))
+    eligible = REGISTRATION_ACTIONS['reject'][4]
+    if ticket['status'] not in eligible:
+        return jsonify({"message": f"Cannot reject {ticket['status']} registrations"}), 400
     
-    if result:
-        # Update event registration count if the ticket was previously registered
-        if ticket['status'] == 'registered':
-            execute_query("UPDATE events SET current_registrations = current_registrations - 1 WHERE event_id = %s", 
-                         (ticket['event_id'],))
-        
-        log_activity(user['user_id'], ticket['event_id'], registration_id, "registration_rejected",
-                    f"Rejected registration for {ticket['event_title']}")
-        return jsonify({"message": "Registration rejected"})
+    # Lock the ticket, reject it and release the seat a pending or registered
+    # ticket was holding in one statement, so a concurrent reject cannot
+    # release the seat twice and a failed release rolls back the rejection
+    sql = """
+        WITH target AS (
+            SELECT ticket_id, event_id, status as previous_status
+            FROM tickets
+            WHERE ticket_id = %s
+            FOR UPDATE
+        ),
+        changed AS (
+            UPDATE tickets t
+            SET status = 'rejected'
+            FROM target
+            WHERE t.ticket_id = target.ticket_id AND target.previous_status::text = ANY(%s)
+            RETURNING target.event_id, target.previous_status
+        ),
+        released AS (
+            UPDATE events e
+            SET current_registrations = e.current_registrations - 1
+            FROM changed
+            WHERE e.event_id = changed.event_id AND changed.previous_status::text = ANY(%s)
+            RETURNING e.event_id
+        )
+        SELECT changed.event_id, EXISTS (SELECT 1 FROM released) as released
+        FROM changed
+    """
+    changed = execute_query(sql, (registration_id, eligible, list(CAPACITY_HOLDING_STATUSES)), fetch_all=True)
+    
+    if changed is None:
+        return jsonify({"message": "Failed to reject registration"}), 500
+    if not changed:
+        return jsonify({"message": "Registration was changed by another request"}), 409
+    
+    if changed[0]['released']:
+        invalidate_catalogue()
+    log_activity(user['user_id'], ticket['event_id'], registration_id, "registration_rejected",
+                f"Rejected registration for {ticket['event_title']}")
+    return jsonify({"message": "Registration rejected"})
+
+@app.route('/api/registrations/bulk', methods=['PUT'])
+@require_organizer
+def bulk_update_registrations():
+    """Accept or reject many registrations in one transaction"""
+    user = get_current_user()
+    data = convert_camel_to_snake(request.get_json(silent=True) or {})
+    
+    action = REGISTRATION_ACTIONS.get(data.get('action'))
+    if not action:
+        return jsonify({"message": "action must be 'accept' or 'reject'"}), 400
+    status, activity_type, verb, result_name, eligible = action
+    
+    # Select tickets either by id or by event and current status
+    ids = data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return jsonify({"message": "ids must be a non-empty list of registration ids"}), 400
+        if len(ids) > BULK_REGISTRATIONS_MAX:
+            return jsonify({"message": f"At most {BULK_REGISTRATIONS_MAX} registrations per request"}), 400
+        selection = "t.ticket_id = ANY(%s)"
+        selection_params = [ids]
+    elif data.get('event_id'):
+        from_status = data.get('status', 'pending')
+        if from_status not in ('pending', 'registered', 'rejected', 'refunded'):
+            return jsonify({"message": "Invalid status filter"}), 400
+        if from_status not in eligible:
+            return jsonify({"message": f"Cannot {data['action']} {from_status} registrations"}), 400
+        selection = "t.event_id = %s AND t.status = %s::ticket_status"
+        selection_params = [data['event_id'], from_status]
+    else:
+        return jsonify({"message": "Provide ids or event_id"}), 400
+    
+    # Lock the selected tickets, move those in a status the action applies to,
+    # release the seats of rejected tickets that held one and log one activity
+    # row per change, all in a single statement. Accepting only moves pending
+    # tickets, whose seat is already reserved, so it never oversells. An
+    # event-wide selection is capped at BULK_REGISTRATIONS_MAX and reports
+    # has_more so callers repeat until it is false.
+    sql = f"""
+        WITH target AS (
+            SELECT t.ticket_id, t.event_id, t.status as previous_status, e.title as event_title
+            FROM tickets t
+            JOIN events e ON t.event_id = e.event_id
+            WHERE e.organizer_id = %s AND {selection}
+            ORDER BY t.ticket_id
+            LIMIT %s
+            FOR UPDATE OF t
+        ),
+        changed AS (
+            UPDATE tickets t
+            SET status = %s::ticket_status
+            FROM target
+            WHERE t.ticket_id = target.ticket_id AND target.previous_status::text = ANY(%s)
+            RETURNING t.ticket_id, target.event_id, target.previous_status, target.event_title
+        ),
+        released AS (
+            UPDATE events e
+            SET current_registrations = e.current_registrations - r.count
+            FROM (
+                SELECT event_id, COUNT(*) as count
+                FROM changed
+                WHERE previous_status::text = ANY(%s) AND %s = 'rejected'
+                GROUP BY event_id
+            ) r
+            WHERE e.event_id = r.event_id
+            RETURNING e.event_id
+        ),
+        logged AS (
+            INSERT INTO activity (user_id, event_id, ticket_id, activity_type, description)
+            SELECT %s, event_id, ticket_id, %s, %s || ' registration for ' || event_title
+            FROM changed
+        )
+        SELECT target.ticket_id, target.previous_status, changed.ticket_id IS NOT NULL as changed,
+               (SELECT COUNT(*) FROM released) as events_released,
+               EXISTS (
+                   SELECT 1 FROM tickets t
+                   JOIN events e ON t.event_id = e.event_id
+                   WHERE e.organizer_id = %s AND {selection}
+                     AND t.ticket_id > (SELECT MAX(ticket_id) FROM target)
+               ) as has_more
+        FROM target
+        LEFT JOIN changed ON changed.ticket_id = target.ticket_id
+        ORDER BY target.ticket_id
+    """
+    params = ([user['user_id']] + selection_params +
+              [BULK_REGISTRATIONS_MAX, status, eligible, list(CAPACITY_HOLDING_STATUSES), status,
+               user['user_id'], activity_type, verb, user['user_id']] + selection_params)
+    rows = execute_query(sql, params, fetch_all=True)
+    
+    if rows is None:
+        return jsonify({"message": f"Failed to {data['action']} registrations"}), 500
     
-    return jsonify({"message": "Failed to reject registration"}), 500
+    def row_result(row):
+        if row['changed']:
+            return result_name
+        return 'unchanged' if row['previous_status'] == status else 'skipped'
+    
+    results = [{'id': row['ticket_id'], 'result': row_result(row)} for row in rows]
+    if ids is not None:
+        found = {row['ticket_id'] for row in rows}
+        results.extend({'id': i, 'result': 'not_found'} for i in dict.fromkeys(ids) if i not in found)
+    
+    summary = {result_name: 0, 'unchanged': 0, 'skipped': 0, 'not_found': 0}
+    for result in results:
+        summary[result['result']] += 1
+    
+    if rows and rows[0]['events_released']:
+        invalidate_catalogue()
+    
+    if summary[result_name]:
+        track_activity(user['user_id'], data.get('event_id'), None, activity_type,
+                       f"{verb} {summary[result_name]} registrations")
+    
+    return jsonify({"action": data['action'], "results": results, "summary": summary,
+                    "has_more": bool(rows) and rows[0]['has_more']})
 
 @app.route('/api/registrations', methods=['GET'])
 @require_organizer
 def get_registrations():
     """Get recent ticket registrations for organizer's events"""
-    user = get_user_by_token(get_access_token())
-    
-    limit = request.args.get('limit', 50, type=int)
+    user = get_current_user()
     
-    sql = """
+    try:
+        limit, after = get_page_params(2)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    # Newest first, keyed on (created_at, ticket_id) so pages stay stable
+    # while new registrations arrive
+    params = [user['user_id']]
+    keyset = ""
+    if after:
+        keyset = "AND (t.created_at, t.ticket_id) < (%s::timestamp, %s)"
+        params.extend(after)
+    
+    sql = f"""
         SELECT 
             t.ticket_id as id,
             COALESCE(t.customer_name, u.first_name || ' ' || u.last_name) as customer_name,
@@ -703,16 +2216,21 @@ def get_registrations():
             COALESCE(t.quantity, 1) as quantity,
             t.price_paid as total_amount,
             COALESCE(t.purchase_date, t.created_at) as purchase_date,
-            t.status
+            t.status,
+            t.created_at
         FROM tickets t
         JOIN events e ON t.event_id = e.event_id
         JOIN users u ON t.user_id = u.user_id
-        WHERE e.organizer_id = %s
-        ORDER BY t.created_at DESC
+        WHERE e.organizer_id = %s {keyset}
+        ORDER BY t.created_at DESC, t.ticket_id DESC
         LIMIT %s
     """
+    params.append(limit + 1)
     
-    registrations = execute_query(sql, (user['user_id'], limit), fetch_all=True)
+    registrations = execute_query(sql, params, fetch_all=True)
+    if registrations is None:
+        return jsonify({"message": "Failed to load registrations"}), 500
+    registrations, next_cursor = paginate(registrations, limit, lambda reg: (reg['created_at'], reg['id']))
     
     formatted_registrations = []
     for reg in registrations:
@@ -729,137 +2247,239 @@ def get_registrations():
             'status': reg['status']  # Use the actual status from DB
         })
     
-    return jsonify({'registrations': formatted_registrations})
+    response = jsonify({'registrations': formatted_registrations, 'next_cursor': next_cursor})
+    return set_next_cursor(response, next_cursor)
+
+def notification_page_sql(unread_only, keyset):
+    """Build a newest-first inbox page query, keyed on (created_at, notification_id)"""
+    filters = ""
+    if unread_only:
+        filters += " AND read_at IS NULL"
+    if keyset:
+        filters += " AND (created_at, notification_id) < (%s::timestamp, %s)"
+    return f"""
+        SELECT 
+            notification_id as id,
+            title,
+            message,
+            type,
+            read_at IS NULL as unread,
+            created_at,
+            EXTRACT(EPOCH FROM LOCALTIMESTAMP - created_at) as age_seconds
+        FROM notifications
+        WHERE user_id = %s {filters}
+        ORDER BY created_at DESC, notification_id DESC
+        LIMIT %s
+    """
+
+# One prepared variant per (unread_only, keyset) combination
+NOTIFICATION_PAGE_SQL = {
+    (unread_only, keyset): prepared_statement(
+        'notification_page' + ('_unread' if unread_only else '') + ('_after' if keyset else ''),
+        notification_page_sql(unread_only, keyset))
+    for unread_only in (False, True) for keyset in (False, True)
+}
+
+NOTIFICATION_UNREAD_SQL = prepared_statement(
+    'notification_unread', "SELECT unread FROM notification_counts WHERE user_id = %s")
 
 @app.route('/api/notifications', methods=['GET'])
-# @require_organizer
+@require_auth
 def get_notifications():
     """Get notifications for the user"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    if user['role'] == 'organizer':
-        # Organizer notifications - events they organize
-        sql = """
-            SELECT 
-                a.activity_id as id,
-                CASE 
-                    WHEN a.activity_type = 'ticket_booked' THEN 'New Registration'
-                    WHEN a.activity_type = 'registration_cancelled' THEN 'Registration Cancelled'
-                    WHEN a.activity_type = 'event_updated' THEN 'Event Update'
-                    ELSE 'Event Update'
-                END as title,
-                a.description as message,
-                CASE 
-                    WHEN a.created_at > NOW() - INTERVAL '1 hour' THEN 
-                        EXTRACT(MINUTE FROM NOW() - a.created_at) || ' minutes ago'
-                    WHEN a.created_at > NOW() - INTERVAL '24 hours' THEN 
-                        EXTRACT(HOUR FROM NOW() - a.created_at) || ' hours ago'
-                    ELSE 
-                        EXTRACT(DAY FROM NOW() - a.created_at) || ' days ago'
-                END as time,
-                CASE 
-                    WHEN a.activity_type = 'ticket_booked' THEN 'registration'
-                    WHEN a.activity_type = 'registration_cancelled' THEN 'cancellation'
-                    ELSE 'update'
-                END as type,
-                a.created_at > NOW() - INTERVAL '2 hours' as unread
-            FROM activity a
-            JOIN events e ON a.event_id = e.event_id
-            WHERE e.organizer_id = %s
-            ORDER BY a.created_at DESC
-            LIMIT 20
-        """
-        activities = execute_query(sql, (user['user_id'],), fetch_all=True)
-    else:
-        # Regular user notifications - activities related to their own actions
-        sql = """
-            SELECT 
-                a.activity_id as id,
-                CASE 
-                    WHEN a.activity_type = 'ticket_booked' THEN 'Ticket Booked'
-                    WHEN a.activity_type = 'registration_accepted' THEN 'Registration Accepted'
-                    WHEN a.activity_type = 'registration_rejected' THEN 'Registration Rejected'
-                    WHEN a.activity_type = 'reminder_received' THEN 'Event Reminder'
-                    ELSE 'Account Activity'
-                END as title,
-                a.description as message,
-                CASE 
-                    WHEN a.created_at > NOW() - INTERVAL '1 hour' THEN 
-                        EXTRACT(MINUTE FROM NOW() - a.created_at) || ' minutes ago'
-                    WHEN a.created_at > NOW() - INTERVAL '24 hours' THEN 
-                        EXTRACT(HOUR FROM NOW() - a.created_at) || ' hours ago'
-                    ELSE 
-                        EXTRACT(DAY FROM NOW() - a.created_at) || ' days ago'
-                END as time,
-                CASE 
-                    WHEN a.activity_type = 'ticket_booked' THEN 'booking'
-                    WHEN a.activity_type = 'registration_accepted' THEN 'confirmation'
-                    WHEN a.activity_type = 'registration_rejected' THEN 'rejection'
-                    WHEN a.activity_type = 'reminder_received' THEN 'reminder'
-                    ELSE 'activity'
-                END as type,
-                a.created_at > NOW() - INTERVAL '2 hours' as unread
-            FROM activity a
-            WHERE a.user_id = %s
-            ORDER BY a.created_at DESC
-            LIMIT 20
-        """
-        activities = execute_query(sql, (user['user_id'],), fetch_all=True)
+    try:
+        limit, after = get_page_params(2)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    unread_only = request.args.get('unread') in ('1', 'true')
+    params = [user['user_id']]
+    if after:
+        params.extend(after)
+    params.append(limit + 1)
+    
+    rows = execute_query(NOTIFICATION_PAGE_SQL[unread_only, bool(after)], params, fetch_all=True)
+    if rows is None:
+        return jsonify({"message": "Failed to load notifications"}), 500
+    rows, next_cursor = paginate(rows, limit, lambda row: (row['created_at'], row['id']))
+    
+    counts = execute_query(NOTIFICATION_UNREAD_SQL, (user['user_id'],), fetch_one=True)
     
     notifications = []
-    for activity in activities:
+    for row in rows:
         notifications.append({
-            'id': activity['id'],
-            'title': activity['title'],
-            'message': activity['message'],
-            'time': activity['time'],
-            'type': activity['type'],
-            'unread': activity['unread']
+            'id': row['id'],
+            'title': row['title'],
+            'message': row['message'],
+            'time': format_time_ago(row['age_seconds']),
+            'type': row['type'],
+            'unread': row['unread']
         })
     
-    return jsonify({'notifications': notifications})
+    response = jsonify({
+        'notifications': notifications,
+        'unread_count': counts['unread'] if counts else 0,
+        'next_cursor': next_cursor
+    })
+    return set_next_cursor(response, next_cursor)
+
+def format_time_ago(seconds):
+    """Describe an age in seconds as 'N minutes/hours/days ago'"""
+    seconds = max(int(seconds or 0), 0)
+    if seconds < 3600:
+        return f"{seconds // 60} minutes ago"
+    if seconds < 86400:
+        return f"{seconds // 3600} hours ago"
+    return f"{seconds // 86400} days ago"
+
+# Fields pushed for each notification on the stream
+NOTIFICATION_STREAM_COLUMNS = "notification_id as id, title, message, type, created_at"
+
+# Notifications missed since the client's Last-Event-ID
+NOTIFICATION_BACKLOG_SQL = f"""
+    SELECT {NOTIFICATION_STREAM_COLUMNS} FROM notifications
+    WHERE user_id = %s AND notification_id > %s
+    ORDER BY notification_id
+    LIMIT %s
+"""
+
+# A notification too large for a NOTIFY payload, which only published its id
+NOTIFICATION_BY_ID_SQL = f"""
+    SELECT {NOTIFICATION_STREAM_COLUMNS} FROM notifications
+    WHERE notification_id = %s AND user_id = %s
+"""
+
+@app.route('/api/notifications/stream', methods=['GET'])
+@require_auth
+def stream_notifications():
+    """Push new notifications to the user as Server-Sent Events"""
+    user_id = get_current_user()['user_id']
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    
+    def events():
+        # Subscribe before reading the backlog so nothing committed in between
+        # is missed, and only once the response is iterated so the finally
+        # below always unsubscribes
+        subscription = notification_listener.subscribe(user_id)
+        last_sent = last_event_id or 0
+        try:
+            yield f"retry: {NOTIFICATION_STREAM_CONFIG['retry_ms']}\n\n"
+            backlog = []
+            if last_event_id is not None:
+                backlog = execute_query(NOTIFICATION_BACKLOG_SQL,
+                                        (user_id, last_event_id, NOTIFICATION_STREAM_CONFIG['backlog'] + 1),
+                                        fetch_all=True) or []
+            for row in backlog[:NOTIFICATION_STREAM_CONFIG['backlog']]:
+                last_sent = row['id']
+                yield format_sse('notification', dict(row, created_at=row['created_at'].isoformat(), unread=True),
+                                 row['id'])
+            if len(backlog) > NOTIFICATION_STREAM_CONFIG['backlog']:
+                yield format_sse('resync', {})
+            
+            while True:
+                try:
+                    item = subscription.get(timeout=NOTIFICATION_STREAM_CONFIG['heartbeat'])
+                except queue.Empty:
+                    # Keeps proxies from timing out and detects closed clients
+                    yield ": heartbeat\n\n"
+                    continue
+                if item is NotificationListener.RESYNC:
+                    yield format_sse('resync', {})
+                    continue
+                if item['id'] <= last_sent:
+                    continue
+                last_sent = item['id']
+                if item.get('fetch'):
+                    row = execute_query(NOTIFICATION_BY_ID_SQL, (item['id'], user_id), fetch_one=True)
+                    if not row:
+                        continue
+                    item = dict(row, created_at=row['created_at'].isoformat())
+                item = {key: value for key, value in item.items() if key != 'user_id'}
+                yield format_sse('notification', dict(item, unread=True), item['id'])
+        finally:
+            notification_listener.unsubscribe(user_id, subscription)
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/notifications/<int:notification_id>/read', methods=['PUT'])
-@require_organizer
+@require_auth
 def mark_notification_read(notification_id):
     """Mark notification as read"""
-    # In a real system, this would update a notifications table
+    user = get_current_user()
+    
+    sql = """
+        WITH target AS (
+            SELECT notification_id, read_at
+            FROM notifications
+            WHERE notification_id = %s AND user_id = %s
+        ),
+        updated AS (
+            UPDATE notifications n
+            SET read_at = CURRENT_TIMESTAMP
+            FROM target
+            WHERE n.notification_id = target.notification_id AND target.read_at IS NULL
+        )
+        SELECT notification_id FROM target
+    """
+    result = execute_query(sql, (notification_id, user['user_id']), fetch_one=True)
+    
+    if not result:
+        return jsonify({"message": "Notification not found"}), 404
+    
     return jsonify({"message": "Notification marked as read"})
 
+@app.route('/api/notifications/read', methods=['PUT'])
+@require_auth
+def mark_notifications_read():
+    """Mark the given notifications, or all of them, as read"""
+    user = get_current_user()
+    data = request.get_json(silent=True) or {}
+    
+    ids = data.get('ids')
+    params = [user['user_id']]
+    id_filter = ""
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({"message": "ids must be a list of notification ids"}), 400
+        id_filter = "AND notification_id = ANY(%s)"
+        params.append(ids)
+    
+    sql = f"""
+        WITH updated AS (
+            UPDATE notifications
+            SET read_at = CURRENT_TIMESTAMP
+            WHERE user_id = %s AND read_at IS NULL {id_filter}
+            RETURNING 1
+        )
+        SELECT COUNT(*) as updated FROM updated
+    """
+    result = execute_query(sql, params, fetch_one=True)
+    
+    if result is None:
+        return jsonify({"message": "Failed to mark notifications as read"}), 500
+    
+    return jsonify({"message": "Notifications marked as read", "updated": result['updated']})
+
 @app.route('/api/dashboard/stats', methods=['GET'])
 @require_organizer
 def get_dashboard_stats():
     """Get dashboard statistics for organizer"""
-    user = get_user_by_token(get_access_token())
-    
-    # Get total events
-    events_sql = "SELECT COUNT(*) as count FROM events WHERE organizer_id = %s"
-    events_result = execute_query(events_sql, (user['user_id'],), fetch_one=True)
-    
-    # Get total attendees and revenue
-    attendees_sql = """
-        SELECT 
-            COUNT(DISTINCT t.user_id) as total_attendees,
-            COALESCE(SUM(t.price_paid), 0) as total_revenue
-        FROM tickets t
-        JOIN events e ON t.event_id = e.event_id
-        WHERE e.organizer_id = %s AND t.status = 'registered'
-    """
-    attendees_result = execute_query(attendees_sql, (user['user_id'],), fetch_one=True)
+    user = get_current_user()
     
-    # Get active events (upcoming events)
-    active_sql = """
-        SELECT COUNT(*) as count 
-        FROM events 
-        WHERE organizer_id = %s AND status = 'active' AND datetime > NOW()
-    """
-    active_result = execute_query(active_sql, (user['user_id'],), fetch_one=True)
+    # Totals come from the trigger-maintained summary row; active events
+    # depend on the clock so they are counted live from the index
+    summary = get_organizer_summary(user['user_id'], include_active=True)
     
     stats = {
-        'total_events': events_result['count'] if events_result else 0,
-        'total_attendees': attendees_result['total_attendees'] if attendees_result else 0,
-        'total_revenue': float(attendees_result['total_revenue']) if attendees_result else 0,
-        'active_events': active_result['count'] if active_result else 0
+        'total_events': summary['total_events'] if summary else 0,
+        'total_attendees': summary['total_attendees'] if summary else 0,
+        'total_revenue': float(summary['total_revenue']) if summary else 0,
+        'active_events': summary['active_events'] if summary else 0
     }
     
     return jsonify(stats)
@@ -868,11 +2488,12 @@ def get_dashboard_stats():
 @require_auth
 def logout():
     """Logout user"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
     if user:
         log_activity(user['user_id'], None, None, "user_logout",
                     f"User {user['first_name']} {user['last_name']} logged out")
+        invalidate_user(user['user_id'])
     
     response = make_response(jsonify({"message": "Logged out successfully"}))
     response.set_cookie('accessToken', '', expires=0)
@@ -886,13 +2507,25 @@ def get_public_events():
     """Get all active events for customers"""
     
     # Check if user is authenticated to determine which endpoint to use
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     if user and user.get('role') == 'organizer':
         # If organizer, redirect to organizer events endpoint
         return get_events()
     
+    try:
+        limit, after = get_page_params(2)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    stream = wants_stream()
+    cache_key = (catalogue_generation, request.args.get('category'), request.args.get('location'),
+                 request.args.get('organizer'), request.args.get('cursor'), limit)
+    cached = None if stream else catalogue_cache.get(cache_key)
+    if cached:
+        return catalogue_response(*cached)
+    
     # Build dynamic query based on filters
-    base_sql = """SELECT e.*, u.first_name as organizer_first_name, u.last_name as organizer_last_name, 
+    base_sql = f"""SELECT {event_columns('e')}, u.first_name as organizer_first_name, u.last_name as organizer_last_name, 
                   u.organization as organizer_organization FROM events e 
                   JOIN users u ON e.organizer_id = u.user_id WHERE e.status = 'active'"""
     
@@ -909,31 +2542,108 @@ def get_public_events():
     
     if request.args.get('organizer'):
         organizer = request.args.get('organizer')
-        filters.append("(u.organization ILIKE %s OR u.first_name ILIKE %s OR u.last_name ILIKE %s)")
-        params.extend([f"%{organizer}%", f"%{organizer}%", f"%{organizer}%"])
+        # Matches the trigram index on organizer names
+        filters.append("u.role = 'organizer' AND organizer_search_name(u.organization, u.first_name, u.last_name) ILIKE %s")
+        params.append(f"%{organizer}%")
     
-    sql = base_sql + (" AND " + " AND ".join(filters) if filters else "") + " ORDER BY e.datetime ASC"
-    events = execute_query(sql, params, fetch_all=True)
+    # Keyset on (datetime, event_id) matches the catalogue sort order
+    if after:
+        filters.append("(e.datetime, e.event_id) > (%s::timestamp, %s)")
+        params.extend(after)
+    
+    sql = base_sql + (" AND " + " AND ".join(filters) if filters else "") + " ORDER BY e.datetime ASC, e.event_id ASC"
+    
+    # Streaming mode returns every remaining event without a page limit
+    if stream:
+        return streaming_response(stream_query(sql, params), format_public_event)
     
-    # Format events with organizer name
-    formatted_events = []
-    for event in events:
-        event_dict = dict(event)
-        organizer_name = event['organizer_organization'] or f"{event['organizer_first_name']} {event['organizer_last_name']}"
-        event_dict['organizer_name'] = organizer_name
-        # Remove the separate organizer fields
-        del event_dict['organizer_first_name']
-        del event_dict['organizer_last_name']
-        del event_dict['organizer_organization']
-        formatted_events.append(event_dict)
+    params.append(limit + 1)
+    events = execute_query(sql + " LIMIT %s", params, fetch_all=True)
+    if events is None:
+        return jsonify({"message": "Failed to load events"}), 500
+    events, next_cursor = paginate(events, limit, lambda event: (event['datetime'], event['event_id']))
     
-    return jsonify(formatted_events)
+    formatted_events = [format_public_event(event) for event in events]
+    
+    body = jsonify(formatted_events).get_data()
+    page = (body, hashlib.sha256(body).hexdigest()[:32], next_cursor)
+    catalogue_cache.set(cache_key, page)
+    
+    return catalogue_response(*page)
+
+def catalogue_response(body, etag, next_cursor):
+    """Build a catalogue page response, answering If-None-Match with 304"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Organizers get their own listing from the same URL
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Cookie'
+    set_next_cursor(response, next_cursor)
+    return response.make_conditional(request)
+
+def format_public_event(event):
+    """Format an event row with organizer name for customers"""
+    event_dict = dict(event)
+    organizer_name = event['organizer_organization'] or f"{event['organizer_first_name']} {event['organizer_last_name']}"
+    event_dict['organizer_name'] = organizer_name
+    # Remove the separate organizer fields
+    del event_dict['organizer_first_name']
+    del event_dict['organizer_last_name']
+    del event_dict['organizer_organization']
+    return event_dict
+
+@app.route('/api/customer-events/search', methods=['GET'])
+def search_public_events():
+    """Search active events by keyword, best matches first"""
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"message": "Search query is required"}), 400
+    
+    try:
+        limit = int(request.args.get('limit', SEARCH_LIMIT_DEFAULT))
+    except ValueError:
+        return jsonify({"message": "Invalid limit"}), 400
+    if limit < 1:
+        return jsonify({"message": "Invalid limit"}), 400
+    limit = min(limit, SEARCH_LIMIT_MAX)
+    
+    params = [query, query.lower()]
+    category_filter = ""
+    if request.args.get('category'):
+        category_filter = "AND e.category = %s::event_category"
+        params.append(request.args.get('category'))
+    params.append(limit)
+    
+    # Full-text matches are ranked by cover density; trigram similarity on
+    # search_text catches misspellings and partial words
+    sql = f"""
+        WITH search AS (
+            SELECT websearch_to_tsquery('english', %s) as tsquery, %s::text as text
+        )
+        SELECT {event_columns('e')}, u.first_name as organizer_first_name, u.last_name as organizer_last_name,
+               u.organization as organizer_organization,
+               ts_rank_cd(e.search_document, search.tsquery) + word_similarity(search.text, e.search_text) as rank
+        FROM events e
+        JOIN users u ON e.organizer_id = u.user_id
+        CROSS JOIN search
+        WHERE e.status = 'active'
+          AND (e.search_document @@ search.tsquery OR search.text <%% e.search_text)
+          {category_filter}
+        ORDER BY rank DESC, e.datetime ASC, e.event_id ASC
+        LIMIT %s
+    """
+    
+    events = execute_query(sql, params, fetch_all=True)
+    if events is None:
+        return jsonify({"message": "Search failed"}), 500
+    
+    return jsonify([format_public_event(event) for event in events])
 
 @app.route('/api/tickets', methods=['POST'])
 @require_auth
 def book_ticket():
     """Book a ticket for an event"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     data = request.get_json()
     
     if not data.get('event_id'):
@@ -941,118 +2651,226 @@ def book_ticket():
     
     event_id = data['event_id']
     ticket_type = data.get('ticket_type', 'general')
+    booking_ref = generate_booking_reference()
+    customer_name = f"{user['first_name']} {user['last_name']}"
     
-    # Get event details
-    event_sql = """SELECT title, general_price, vip_price, premium_price, max_capacity,
-                   current_registrations FROM events WHERE event_id = %s AND status = 'active'"""
-    event = execute_query(event_sql, (event_id,), fetch_one=True)
+    # Lock the event row, then insert the ticket and reserve capacity in one
+    # statement so concurrent buyers can never oversell. The unique index on
+    # (event_id, user_id, ticket_type) turns a racing duplicate into a no-op.
+    sql = """
+        WITH event AS (
+            SELECT event_id, title, max_capacity, current_registrations,
+                   CASE %s::ticket_type
+                       WHEN 'vip' THEN vip_price
+                       WHEN 'premium' THEN premium_price
+                       ELSE general_price
+                   END as price
+            FROM events
+            WHERE event_id = %s AND status = 'active'
+            FOR UPDATE
+        ),
+        ticket AS (
+            INSERT INTO tickets (event_id, user_id, ticket_type, price_paid, booking_reference,
+                                 special_requests, customer_name, customer_email, status)
+            SELECT event.event_id, %s, %s::ticket_type, event.price, %s, %s, %s, %s, 'pending'
+            FROM event
+            WHERE event.current_registrations < event.max_capacity
+              AND NOT EXISTS (
+                  SELECT 1 FROM tickets
+                  WHERE event_id = event.event_id AND user_id = %s AND ticket_type = %s::ticket_type
+              )
+            ON CONFLICT (event_id, user_id, ticket_type) DO NOTHING
+            RETURNING ticket_id, event_id
+        ),
+        reserved AS (
+            UPDATE events e
+            SET current_registrations = e.current_registrations + 1
+            FROM ticket
+            WHERE e.event_id = ticket.event_id
+        )
+        SELECT event.title, event.price,
+               event.current_registrations >= event.max_capacity as fully_booked,
+               event.current_registrations + 1 >= event.max_capacity as sold_out,
+               (SELECT ticket_id FROM ticket) as ticket_id
+        FROM event
+    """
+    params = (ticket_type, event_id,
+              user['user_id'], ticket_type, booking_ref, data.get('special_requests'), customer_name, user['email'],
+              user['user_id'], ticket_type)
+    booking = execute_query(sql, params, fetch_one=True)
     
-    if not event:
+    if not booking:
         return jsonify({"message": "Event not found or not available"}), 400
     
-    if event['current_registrations'] >= event['max_capacity']:
+    if booking['fully_booked']:
         return jsonify({"message": "Event is fully booked"}), 400
     
-    # Get price based on ticket type
-    price_map = {'vip': 'vip_price', 'premium': 'premium_price', 'general': 'general_price'}
-    price = event[price_map.get(ticket_type, 'general_price')]
-    
-    # Check for duplicate booking
-    duplicate_sql = "SELECT COUNT(*) as count FROM tickets WHERE event_id = %s AND user_id = %s AND ticket_type = %s::ticket_type"
-    duplicate = execute_query(duplicate_sql, (event_id, user['user_id'], ticket_type), fetch_one=True)
-    
-    if duplicate and duplicate['count'] > 0:
+    if not booking['ticket_id']:
         return jsonify({"message": f"You already have a {ticket_type} ticket for this event"}), 400
     
-    # Create ticket
-    booking_ref = generate_booking_reference()
-    ticket_sql = """INSERT INTO tickets (event_id, user_id, ticket_type, price_paid, booking_reference,
-                    special_requests, customer_name, customer_email, status) 
-                    VALUES (%s, %s, %s::ticket_type, %s, %s, %s, %s, %s, 'pending')
-                    RETURNING ticket_id"""
-    
-    customer_name = f"{user['first_name']} {user['last_name']}"
-    ticket = execute_query(ticket_sql, (event_id, user['user_id'], ticket_type, price,
-                          booking_ref, data.get('special_requests'), customer_name, user['email']), fetch_one=True)
-    
-    if ticket:
-        # Update event registration count
-        execute_query("UPDATE events SET current_registrations = current_registrations + 1 WHERE event_id = %s", (event_id,))
-        
-        # Log activity
-        log_activity(user['user_id'], event_id, ticket['ticket_id'], "ticket_booked",
-                    f"Booked {ticket_type} ticket for \"{event['title']}\" - ${price:.2f}")
-        
-        response = {
-            "ticket_id": ticket['ticket_id'],
-            "booking_reference": booking_ref,
-            "event_title": event['title'],
-            "ticket_type": ticket_type,
-            "price": float(price),
-            "message": "Ticket booked successfully"
-        }
-        return jsonify(response), 201
-    
-    return jsonify({"message": "Failed to book ticket"}), 500
+    price = booking['price']
+    
+    # Cached pages may show registration counts up to the cache TTL old, but
+    # taking the last seat drops them at once. Invalidating on every booking
+    # would empty the cache exactly when a hot sale needs it most.
+    if booking['sold_out']:
+        invalidate_catalogue()
+    
+    # Log activity
+    log_activity(user['user_id'], event_id, booking['ticket_id'], "ticket_booked",
+                f"Booked {ticket_type} ticket for \"{booking['title']}\" - ${price:.2f}")
+    
+    response = {
+        "ticket_id": booking['ticket_id'],
+        "booking_reference": booking_ref,
+        "event_title": booking['title'],
+        "ticket_type": ticket_type,
+        "price": float(price),
+        "message": "Ticket booked successfully"
+    }
+    return jsonify(response), 201
 
 @app.route('/api/tickets', methods=['GET'])
 @require_auth
 def get_user_tickets():
     """Get all tickets for the logged-in user"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     
-    sql = """SELECT t.*, e.title as event_title, e.datetime, e.location, e.venue_name 
-             FROM tickets t JOIN events e ON t.event_id = e.event_id 
-             WHERE t.user_id = %s ORDER BY e.datetime ASC"""
-    
-    tickets = execute_query(sql, (user['user_id'],), fetch_all=True)
+    try:
+        limit, after = get_page_params(2)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    
+    params = [user['user_id']]
+    keyset = ""
+    if after:
+        keyset = "AND (e.datetime, t.ticket_id) > (%s::timestamp, %s)"
+        params.extend(after)
+    
+    sql = f"""SELECT t.*, e.title as event_title, e.datetime, e.location, e.venue_name 
+              FROM tickets t JOIN events e ON t.event_id = e.event_id 
+              WHERE t.user_id = %s {keyset}
+              ORDER BY e.datetime ASC, t.ticket_id ASC"""
+    
+    # Streaming mode returns every remaining ticket without a page limit
+    if wants_stream():
+        return streaming_response(stream_query(sql, params))
+    
+    params.append(limit + 1)
+    tickets = execute_query(sql + " LIMIT %s", params, fetch_all=True)
+    if tickets is None:
+        return jsonify({"message": "Failed to load tickets"}), 500
+    tickets, next_cursor = paginate(tickets, limit, lambda ticket: (ticket['datetime'], ticket['ticket_id']))
     formatted_tickets = [dict(ticket) for ticket in tickets]  # Keep as snake_case
     
-    return jsonify(formatted_tickets)
+    return set_next_cursor(jsonify(formatted_tickets), next_cursor)
+
+# Attendee statistics, shared with the async handlers in asgi.py
+ATTENDEE_TICKET_COUNT_SQL = prepared_statement(
+    'attendee_ticket_count', "SELECT COUNT(*) as count FROM tickets WHERE user_id = %s")
+ATTENDEE_UPCOMING_SQL = prepared_statement('attendee_upcoming', """SELECT COUNT(*) as count FROM tickets t 
+                           JOIN events e ON t.event_id = e.event_id 
+                           WHERE t.user_id = %s AND e.datetime > CURRENT_TIMESTAMP""")
+ATTENDEE_SPENT_SQL = prepared_statement('attendee_spent', """SELECT COALESCE(SUM(price_paid), 0) as spent FROM tickets 
+                        WHERE user_id = %s AND status = 'registered'""")
 
 @app.route('/api/stats', methods=['GET'])
 @require_auth
 def get_stats():
     """Get statistics for the logged-in user"""
-    user = get_user_by_token(get_access_token())
+    user = get_current_user()
     stats = {}
     
     if user['role'] == 'organizer':
         # Organizer stats
-        event_count = execute_query("SELECT COUNT(*) as count FROM events WHERE organizer_id = %s", 
-                                  (user['user_id'],), fetch_one=True)
-        stats['total_events'] = event_count['count'] if event_count else 0
-        
-        ticket_count = execute_query("""SELECT COUNT(*) as count FROM tickets t 
-                                      JOIN events e ON t.event_id = e.event_id 
-                                      WHERE e.organizer_id = %s""", 
-                                   (user['user_id'],), fetch_one=True)
-        stats['total_tickets_sold'] = ticket_count['count'] if ticket_count else 0
-        
-        revenue = execute_query("""SELECT COALESCE(SUM(t.price_paid), 0) as revenue 
-                                FROM tickets t JOIN events e ON t.event_id = e.event_id 
-                                WHERE e.organizer_id = %s AND t.status = 'registered'""", 
-                              (user['user_id'],), fetch_one=True)
-        stats['total_revenue'] = float(revenue['revenue']) if revenue else 0
+        summary = get_organizer_summary(user['user_id'])
+        stats['total_events'] = summary['total_events'] if summary else 0
+        stats['total_tickets_sold'] = summary['total_tickets'] if summary else 0
+        stats['total_revenue'] = float(summary['total_revenue']) if summary else 0
         
     elif user['role'] == 'attendee':
         # Attendee stats
-        ticket_count = execute_query("SELECT COUNT(*) as count FROM tickets WHERE user_id = %s", 
-                                   (user['user_id'],), fetch_one=True)
+        ticket_count = execute_query(ATTENDEE_TICKET_COUNT_SQL, (user['user_id'],), fetch_one=True)
         stats['total_tickets'] = ticket_count['count'] if ticket_count else 0
         
-        upcoming = execute_query("""SELECT COUNT(*) as count FROM tickets t 
-                                  JOIN events e ON t.event_id = e.event_id 
-                                  WHERE t.user_id = %s AND e.datetime > CURRENT_TIMESTAMP""", 
-                               (user['user_id'],), fetch_one=True)
+        upcoming = execute_query(ATTENDEE_UPCOMING_SQL, (user['user_id'],), fetch_one=True)
         stats['upcoming_events'] = upcoming['count'] if upcoming else 0
         
-        spent = execute_query("""SELECT COALESCE(SUM(price_paid), 0) as spent FROM tickets 
-                              WHERE user_id = %s AND status = 'registered'""", 
-                            (user['user_id'],), fetch_one=True)
+        spent = execute_query(ATTENDEE_SPENT_SQL, (user['user_id'],), fetch_one=True)
         stats['total_spent'] = float(spent['spent']) if spent else 0
     
     return jsonify(stats)
 
+# ==================== MAINTENANCE COMMANDS ====================
+
+@app.cli.command('reconcile-summaries')
+@click.option('--interval', type=int, default=0,
+              help='Repeat every N seconds (default: run once)')
+def reconcile_summaries_command(interval):
+    """Rebuild trigger-maintained summaries and counters to correct any drift"""
+    while True:
+        for function, drifted in reconcile_summaries().items():
+            if drifted is None:
+                logger.error("%s failed", function)
+            elif drifted:
+                logger.warning("%s corrected %d drifted rows", function, drifted)
+            else:
+                logger.info("%s found no drift", function)
+        if not interval:
+            break
+        time.sleep(interval)
+
+# ==================== MONITORING ENDPOINTS ====================
+
+@app.route('/api/pool/stats', methods=['GET'])
+def get_pool_stats():
+    """Get database connection pool statistics"""
+    return jsonify(get_pool().stats())
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@require_admin
+def get_slow_queries():
+    """Get recorded slow queries, slowest first, with any captured plans"""
+    try:
+        limit = int(request.args.get('limit', 50))
+        min_ms = request.args.get('min_ms', type=float)
+    except ValueError:
+        return jsonify({"message": "Invalid limit"}), 400
+    
+    return jsonify({
+        'threshold_ms': slow_query_log.threshold_ms,
+        'skipped_explains': slow_query_log.skipped_explains,
+        'queries': slow_query_log.entries(limit, request.args.get('endpoint'), min_ms)
+    })
+
+@app.route('/api/admin/slow-queries', methods=['DELETE'])
+@require_admin
+def clear_slow_queries():
+    """Forget recorded slow queries"""
+    slow_query_log.clear()
+    return jsonify({"message": "Slow query log cleared"})
+
+# Pool statistics exported with /metrics: stats() key -> (metric name, type, help)
+POOL_METRICS = {
+    'size': ('db_pool_size', 'gauge', 'Open pooled connections'),
+    'idle': ('db_pool_idle', 'gauge', 'Idle pooled connections'),
+    'in_use': ('db_pool_in_use', 'gauge', 'Checked-out pooled connections'),
+    'waiting': ('db_pool_waiting', 'gauge', 'Threads waiting for a pooled connection'),
+    'prepared_statements': ('db_pool_prepared_statements', 'gauge', 'Prepared statements held across connections'),
+    'checkouts': ('db_pool_checkouts_total', 'counter', 'Connections checked out'),
+    'timeouts': ('db_pool_timeouts_total', 'counter', 'Checkouts that timed out'),
+    'discarded': ('db_pool_discarded_total', 'counter', 'Connections closed as broken or expired')
+}
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get request, database and pool metrics in the Prometheus text format"""
+    if not METRICS_CONFIG['enabled']:
+        return jsonify({"message": "Metrics are disabled"}), 404
+    
+    stats = get_pool().stats()
+    samples = [(name, kind, help_text, stats[key]) for key, (name, kind, help_text) in POOL_METRICS.items()]
+    return Response(metrics.render(samples), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5174)
\ No newline at end of file
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) serving mode for the Event Management System API.
+
+The hottest read endpoints are served by async handlers on an asyncpg
+pool, so one process can hold thousands of slow clients without a thread
+each, and independent queries (the attendee figures in /api/stats) run
+concurrently. Warm public catalogue pages are answered straight from the
+shared catalogue cache, and notification streams wait on the event loop
+instead of holding a thread for the life of the connection. Every other
+route, and every catalogue cache miss, falls through to the Flask app in
+api.py on a bounded thread pool, so both serving modes expose the same API.
+Async routes get the same request log line, /metrics series, query count
+header, capture trace and slow query log as their Flask counterparts.
+
+The async stack is an optional dependency group:
+
+    poetry install --with async
+
+Run with: make server-async (uvicorn asgi:app --port 5174)
+"""
+
+import os
+import time
+import logging
+import queue
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+
+import asyncpg
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route, request_response
+
+import api
+from api import (DATABASE_CONFIG, POOL_CONFIG, CORS_ORIGINS, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, METRICS_CONFIG,
+                 QUERY_COUNT_HEADER, NOTIFICATION_STREAM_CONFIG, NOTIFICATION_BACKLOG_SQL, NOTIFICATION_BY_ID_SQL,
+                 USER_BY_ID_SQL, ATTENDEE_TICKET_COUNT_SQL, ATTENDEE_UPCOMING_SQL, ATTENDEE_SPENT_SQL,
+                 NotificationListener, organizer_summary_sql, positional_sql, format_sse, notification_listener,
+                 slow_query_log, user_cache, catalogue_cache, logger)
+
+ASGI_CONFIG = {
+    # Threads running Flask for routes without an async handler
+    'wsgi_workers': int(os.getenv('ASGI_WSGI_WORKERS', '20')),
+    # Seconds an asyncpg connection may sit idle before it is closed. asyncpg
+    # has no age limit, so DB_POOL_MAX_LIFETIME only applies to the Flask pool.
+    'db_idle_timeout': float(os.getenv('ASGI_DB_IDLE_TIMEOUT', '300'))
+}
+
+ORGANIZER_SUMMARY_SQL = organizer_summary_sql()
+ORGANIZER_DASHBOARD_SQL = organizer_summary_sql(include_active=True)
+
+db_pool = None
+
+# Per-request state for ObservedEndpoint: start time, database totals and resolved user
+request_state = contextvars.ContextVar('request_state', default=None)
+
+
+# ==================== DATABASE ====================
+
+async def run_query(sql, args, fetch_all=False):
+    """Run one query on the async pool, logging and returning None on error
+
+    Takes the same %s SQL as execute_query, so slow statements can be
+    re-run under EXPLAIN by the slow query log.
+    """
+    started = time.perf_counter()
+    acquired = None
+    rows = 0
+    try:
+        async with db_pool.acquire() as conn:
+            acquired = time.perf_counter()
+            if fetch_all:
+                result = await conn.fetch(positional_sql(sql), *args)
+                rows = len(result)
+            else:
+                result = await conn.fetchrow(positional_sql(sql), *args)
+                rows = 1 if result else 0
+            return result
+    except (asyncpg.PostgresError, OSError) as e:
+        logger.error(f"Database error: {e}")
+        return None
+    finally:
+        state = request_state.get()
+        if state is not None:
+            api.tally_query(state['db_stats'], started, acquired, rows)
+        duration_ms = (time.perf_counter() - (acquired or started)) * 1000
+        if slow_query_log.is_slow(duration_ms):
+            slow_query_log.record(sql, args, duration_ms, state['endpoint'] if state else None)
+
+
+async def fetchrow(sql, *args):
+    return await run_query(sql, args)
+
+
+async def fetch(sql, *args):
+    return await run_query(sql, args, fetch_all=True)
+
+
+async def get_current_user(request):
+    """Resolve the access token cookie, sharing user_cache with the Flask app"""
+    access_token = request.cookies.get('accessToken')
+    if not access_token:
+        return None
+    user = user_cache.get(access_token)
+    if user is not None:
+        return user
+    try:
+        user_id = int(access_token)
+    except ValueError:
+        return None
+    row = await fetchrow(USER_BY_ID_SQL, user_id)
+    if row is None:
+        return None
+    user = dict(row)
+    user_cache.set(access_token, user)
+    return user
+
+
+async def current_user(request):
+    """Resolve the request's user and remember it for the request log and capture trace"""
+    user = await get_current_user(request)
+    state = request_state.get()
+    if state is not None:
+        state['user'] = user
+    return user
+
+
+# ==================== OBSERVABILITY ====================
+
+class ObservedEndpoint:
+    """Give an async route what Flask's request hooks give the others
+
+    When the response starts it gets the X-DB-Query-Count header, the
+    request is added to /metrics under the Flask endpoint name, logged as
+    one structured line (subject to the same sampling) and appended to the
+    capture trace. A handler that defers to Flask calls defer_observation()
+    so the request is not recorded twice.
+    """
+
+    def __init__(self, endpoint, app):
+        self.endpoint = endpoint
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        state = {'endpoint': self.endpoint, 'started': time.perf_counter(), 'db_stats': api.new_db_stats(),
+                 'user': None, 'deferred': False}
+        request = Request(scope, receive)
+
+        async def observed_send(message):
+            if message['type'] == 'http.response.start' and not state['deferred']:
+                message = await self.observe(request, state, message)
+            await send(message)
+
+        token = request_state.set(state)
+        try:
+            await self.app(scope, receive, observed_send)
+        finally:
+            request_state.reset(token)
+
+    async def observe(self, request, state, message):
+        """Record the request and return the response start message with the query count header"""
+        status = message['status']
+        duration = time.perf_counter() - state['started']
+        db_stats = state['db_stats']
+        headers = list(message.get('headers', []))
+        if METRICS_CONFIG['query_count_header']:
+            headers.append((QUERY_COUNT_HEADER.lower().encode('latin-1'), str(db_stats['queries']).encode('latin-1')))
+
+        api.observe_request(self.endpoint, request.method, status, duration, db_stats)
+
+        user = state['user']
+        if (api.request_sampled(self.endpoint) or status >= 500) and logger.isEnabledFor(logging.INFO):
+            content_length = dict(headers).get(b'content-length')
+            api.log_request({
+                'method': request.method,
+                'path': request.url.path,
+                'endpoint': self.endpoint,
+                'status': status,
+                'duration_ms': round(duration * 1000, 3),
+                'user_id': user['user_id'] if user else None,
+                'origin': request.headers.get('origin'),
+                'response_bytes': int(content_length) if content_length else None,
+                'db_queries': db_stats['queries'],
+                'db_ms': round(db_stats['time'] * 1000, 3),
+                'activities': []
+            })
+
+        capture = api.request_capture
+        if capture is not None and capture.should_capture(self.endpoint):
+            token = request.cookies.get('accessToken')
+            # Public pages never resolve the user; look it up once per new token to alias it
+            if token and user is None and not capture.has_alias(token):
+                user = await get_current_user(request)
+            path = request.url.path
+            if request.url.query:
+                path += '?' + request.url.query
+            capture.record(state['started'], request.method, path, token, user, None, status,
+                           round(duration * 1000, 3))
+
+        return dict(message, headers=headers)
+
+
+def defer_observation():
+    """Leave the current request to be recorded by Flask's own hooks"""
+    state = request_state.get()
+    if state is not None:
+        state['deferred'] = True
+
+
+# ==================== ASYNC ENDPOINTS ====================
+
+async def get_stats(request):
+    """Get statistics for the logged-in user"""
+    user = await current_user(request)
+    if not user:
+        return JSONResponse({"message": "Unauthorized"}, status_code=401)
+
+    stats = {}
+    if user['role'] == 'organizer':
+        summary = await fetchrow(ORGANIZER_SUMMARY_SQL, user['user_id'])
+        stats['total_events'] = summary['total_events'] if summary else 0
+        stats['total_tickets_sold'] = summary['total_tickets'] if summary else 0
+        stats['total_revenue'] = float(summary['total_revenue']) if summary else 0
+
+    elif user['role'] == 'attendee':
+        # Independent queries, each on its own pooled connection
+        ticket_count, upcoming, spent = await asyncio.gather(
+            fetchrow(ATTENDEE_TICKET_COUNT_SQL, user['user_id']),
+            fetchrow(ATTENDEE_UPCOMING_SQL, user['user_id']),
+            fetchrow(ATTENDEE_SPENT_SQL, user['user_id'])
+        )
+        stats['total_tickets'] = ticket_count['count'] if ticket_count else 0
+        stats['upcoming_events'] = upcoming['count'] if upcoming else 0
+        stats['total_spent'] = float(spent['spent']) if spent else 0
+
+    return JSONResponse(stats)
+
+
+async def get_dashboard_stats(request):
+    """Get dashboard statistics for organizer"""
+    user = await current_user(request)
+    if not (user and user.get('role') == 'organizer'):
+        return JSONResponse({"message": "Only organizers can access this endpoint"}, status_code=403)
+
+    summary = await fetchrow(ORGANIZER_DASHBOARD_SQL, user['user_id'])
+    return JSONResponse({
+        'total_events': summary['total_events'] if summary else 0,
+        'total_attendees': summary['total_attendees'] if summary else 0,
+        'total_revenue': float(summary['total_revenue']) if summary else 0,
+        'active_events': summary['active_events'] if summary else 0
+    })
+
+
+async def cached_catalogue_response(request):
+    """Build the public catalogue response from a warm cache entry, or None"""
+    if request.query_params.get('stream') in ('1', 'true'):
+        return None
+    if request.cookies.get('accessToken'):
+        user = await current_user(request)
+        if user and user.get('role') == 'organizer':
+            return None
+
+    # Same key as get_public_events in api.py
+    try:
+        limit = int(request.query_params.get('limit', PAGE_SIZE_DEFAULT))
+    except ValueError:
+        limit = PAGE_SIZE_DEFAULT
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    args = request.query_params
+    cache_key = (api.catalogue_generation, args.get('category'), args.get('location'),
+                 args.get('organizer'), args.get('cursor'), limit)
+    cached = catalogue_cache.get(cache_key)
+    if not cached:
+        return None
+
+    body, etag, next_cursor = cached
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Cookie'}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    if_none_match = request.headers.get('if-none-match', '')
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if headers['ETag'] in candidates or '*' in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+class CatalogueEndpoint:
+    """Serve warm catalogue pages without a thread hop, deferring misses to Flask"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        response = await cached_catalogue_response(Request(scope, receive))
+        if response is None:
+            defer_observation()
+            await self.fallback(scope, receive, send)
+        else:
+            await response(scope, receive, send)
+
+
+class AsyncSubscription(queue.Queue):
+    """Notification queue the listener thread fills and an event loop waits on"""
+
+    def __init__(self, maxsize, loop):
+        super().__init__(maxsize)
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def _put(self, item):
+        super()._put(item)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # The loop has shut down; nothing is waiting any more
+
+    async def next(self, timeout):
+        """Get the next item, raising asyncio.TimeoutError if none arrives in time"""
+        while True:
+            self._ready.clear()
+            try:
+                return self.get_nowait()
+            except queue.Empty:
+                pass
+            await asyncio.wait_for(self._ready.wait(), timeout)
+
+
+def notification_event(row):
+    return format_sse('notification', dict(row, created_at=row['created_at'].isoformat(), unread=True), row['id'])
+
+
+async def stream_notifications(request):
+    """Push new notifications to the user as Server-Sent Events"""
+    user = await current_user(request)
+    if not user:
+        return JSONResponse({"message": "Unauthorized"}, status_code=401)
+    user_id = user['user_id']
+    try:
+        last_event_id = int(request.headers['last-event-id'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    backlog_size = NOTIFICATION_STREAM_CONFIG['backlog']
+
+    async def events():
+        # Subscribe before reading the backlog so nothing committed in between is missed
+        subscription = AsyncSubscription(notification_listener.queue_size, asyncio.get_running_loop())
+        notification_listener.subscribe(user_id, subscription)
+        last_sent = last_event_id or 0
+        try:
+            yield f"retry: {NOTIFICATION_STREAM_CONFIG['retry_ms']}\n\n"
+            backlog = []
+            if last_event_id is not None:
+                backlog = await fetch(NOTIFICATION_BACKLOG_SQL, user_id, last_event_id, backlog_size + 1) or []
+            for row in backlog[:backlog_size]:
+                last_sent = row['id']
+                yield notification_event(row)
+            if len(backlog) > backlog_size:
+                yield format_sse('resync', {})
+
+            while True:
+                try:
+                    item = await subscription.next(NOTIFICATION_STREAM_CONFIG['heartbeat'])
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing out and detects closed clients
+                    yield ": heartbeat\n\n"
+                    continue
+                if item is NotificationListener.RESYNC:
+                    yield format_sse('resync', {})
+                    continue
+                if item['id'] <= last_sent:
+                    continue
+                last_sent = item['id']
+                if item.get('fetch'):
+                    row = await fetchrow(NOTIFICATION_BY_ID_SQL, item['id'], user_id)
+                    if row:
+                        yield notification_event(row)
+                    continue
+                item = {key: value for key, value in item.items() if key != 'user_id'}
+                yield format_sse('notification', dict(item, unread=True), item['id'])
+        finally:
+            notification_listener.unsubscribe(user_id, subscription)
+
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# ==================== APPLICATION ====================
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the asyncpg pool for the lifetime of the server"""
+    global db_pool
+    db_pool = await asyncpg.create_pool(
+        host=DATABASE_CONFIG['host'],
+        port=int(DATABASE_CONFIG['port']),
+        database=DATABASE_CONFIG['database'],
+        user=DATABASE_CONFIG['user'],
+        password=DATABASE_CONFIG['password'],
+        min_size=POOL_CONFIG['min_size'],
+        max_size=POOL_CONFIG['max_size'],
+        max_inactive_connection_lifetime=ASGI_CONFIG['db_idle_timeout']
+    )
+    try:
+        yield
+    finally:
+        await db_pool.close()
+
+
+def create_app(flask_app=api.app):
+    """Build the ASGI app: async handlers first, then the Flask app for everything else"""
+    wsgi = WSGIMiddleware(flask_app, workers=ASGI_CONFIG['wsgi_workers'])
+    routes = [
+        Route('/api/stats', ObservedEndpoint('get_stats', request_response(get_stats)), methods=['GET']),
+        Route('/api/dashboard/stats', ObservedEndpoint('get_dashboard_stats', request_response(get_dashboard_stats)),
+              methods=['GET']),
+        Route('/api/notifications/stream',
+              ObservedEndpoint('stream_notifications', request_response(stream_notifications)), methods=['GET']),
+        Route('/api/customer-events', ObservedEndpoint('get_public_events', CatalogueEndpoint(wsgi)),
+              methods=['GET']),
+        Mount('/', app=wsgi)
+    ]
+    middleware = [
+        Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*'])
+    ]
+    return Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+
+
+app = create_app()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Replay a JSONL request trace against the Event Management System API and
+report per-endpoint latency percentiles, throughput and database round trips.
+
+Each trace line is one request:
+
+    {"offset_ms": 120.5, "method": "POST", "path": "/api/tickets",
+     "user": "attendee:3", "body": {"event_id": "{event:7}", "ticket_type": "vip"}}
+
+"user" names the Nth user of a role (or use "token" for a raw accessToken
+cookie), and "{event:N}" in the path or as a body value names the Nth event,
+both counted by id in the target database modulo how many exist. Seed that
+database with generate_test_data.py first. A server started with
+CAPTURE_REQUESTS=true records its live traffic in this format.
+
+Two modes are supported: 'client' runs the Flask app in-process and counts
+every statement it sends to Postgres, 'http' sends real requests to a running
+server and reads the X-DB-Query-Count header when the server provides one.
+"""
+
+import re
+import json
+import time
+import queue
+import http.client
+import threading
+from urllib.parse import urlsplit
+
+import psycopg2
+import psycopg2.extensions
+import click
+from werkzeug.exceptions import HTTPException
+
+import api
+from api import DATABASE_CONFIG, QUERY_COUNT_HEADER
+
+PERCENTILES = (50, 95, 99)
+USER_ALIAS_PATTERN = re.compile(r'^(organizer|attendee|admin):(\d+)$')
+EVENT_PLACEHOLDER_PATTERN = re.compile(r'\{event:(\d+)\}')
+
+
+# ==================== TRACE LOADING ====================
+
+def load_trace(path):
+    """Read trace requests from a JSONL file, skipping blank lines"""
+    requests = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'method' not in entry or 'path' not in entry:
+                raise click.ClickException(f"{path}:{number}: trace entries need 'method' and 'path'")
+            requests.append(entry)
+    return requests
+
+
+class TraceResolver:
+    """Map trace aliases onto user and event ids that exist in the target database"""
+
+    def __init__(self, users_by_role, event_ids):
+        self.users_by_role = users_by_role
+        self.event_ids = event_ids
+
+    @classmethod
+    def from_database(cls, config=DATABASE_CONFIG):
+        conn = psycopg2.connect(**config)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT role::text, user_id FROM users ORDER BY user_id")
+                users_by_role = {}
+                for role, user_id in cursor.fetchall():
+                    users_by_role.setdefault(role, []).append(user_id)
+                cursor.execute("SELECT event_id FROM events ORDER BY event_id")
+                event_ids = [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+        return cls(users_by_role, event_ids)
+
+    def token(self, entry):
+        """Get the accessToken cookie for a trace entry, or None if anonymous"""
+        if entry.get('token') is not None:
+            return str(entry['token'])
+        user = entry.get('user')
+        if not user:
+            return None
+        match = USER_ALIAS_PATTERN.match(user)
+        ids = self.users_by_role.get(match.group(1)) if match else None
+        if not ids:
+            raise click.ClickException(f"Cannot resolve trace user '{user}'")
+        return str(ids[int(match.group(2)) % len(ids)])
+
+    def event_id(self, index):
+        if not self.event_ids:
+            raise click.ClickException("Trace refers to events but the database has none")
+        return self.event_ids[int(index) % len(self.event_ids)]
+
+    def path(self, path):
+        return EVENT_PLACEHOLDER_PATTERN.sub(lambda m: str(self.event_id(m.group(1))), path)
+
+    def body(self, value):
+        """Resolve event placeholders in a request body, recursively"""
+        if isinstance(value, dict):
+            return {key: self.body(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.body(item) for item in value]
+        if isinstance(value, str):
+            match = EVENT_PLACEHOLDER_PATTERN.fullmatch(value)
+            if match:
+                return self.event_id(match.group(1))
+        return value
+
+
+def endpoint_name(method, path):
+    """Get the Flask endpoint a request routes to, so results group by handler"""
+    try:
+        endpoint, _ = api.app.url_map.bind('localhost').match(urlsplit(path).path, method=method)
+        return endpoint
+    except HTTPException:
+        return f"{method} {urlsplit(path).path}"
+
+
+# ==================== ROUND-TRIP COUNTING ====================
+
+_round_trips = threading.local()
+
+def round_trip_count():
+    """Round trips made to Postgres by the current thread so far"""
+    return getattr(_round_trips, 'count', 0)
+
+def _count_round_trips(n=1):
+    _round_trips.count = round_trip_count() + n
+
+_counting_cursors = {}
+
+def counting_cursor(base):
+    """Get a subclass of a cursor class that counts the statements it sends"""
+    if base not in _counting_cursors:
+        class CountingCursor(base):
+            def execute(self, query, vars=None):
+                # An implicit BEGIN goes out first when no transaction is open
+                idle = self.connection.status == psycopg2.extensions.STATUS_READY
+                _count_round_trips(2 if idle and not self.connection.autocommit else 1)
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                vars_list = list(vars_list)
+                _count_round_trips(len(vars_list))
+                return super().executemany(query, vars_list)
+
+        _counting_cursors[base] = CountingCursor
+    return _counting_cursors[base]
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that counts round trips per thread for client mode"""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = counting_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        if self.status != psycopg2.extensions.STATUS_READY:
+            _count_round_trips()
+        return super().commit()
+
+    def rollback(self):
+        if self.status != psycopg2.extensions.STATUS_READY:
+            _count_round_trips()
+        return super().rollback()
+
+
+# ==================== TRANSPORTS ====================
+
+class ClientTransport:
+    """Send requests through the in-process Flask test client"""
+
+    name = 'client'
+
+    def __init__(self):
+        DATABASE_CONFIG['connection_factory'] = CountingConnection
+        self._local = threading.local()
+
+    def send(self, method, path, token, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = api.app.test_client()
+        if token:
+            client.set_cookie('accessToken', token)
+        else:
+            client.delete_cookie('accessToken')
+
+        before = round_trip_count()
+        response = client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code, round_trip_count() - before
+
+
+class HttpTransport:
+    """Send requests to a running server over keep-alive HTTP connections"""
+
+    name = 'http'
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def send(self, method, path, token, body):
+        headers = {'Cookie': f"accessToken={token}"} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server dropped the keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+        count = response.getheader(QUERY_COUNT_HEADER)
+        return response.status, int(count) if count is not None else None
+
+
+# ==================== REPLAY ====================
+
+def replay(trace, transport, resolver, concurrency=1, repeat=1, warmup=0, pace=False):
+    """Replay the trace and collect (endpoint, status, seconds, round trips) samples
+
+    The first warmup requests are sent but not measured. With pace, each
+    request waits for its offset_ms so the trace's arrival rate is preserved.
+    """
+    work = queue.Queue()
+    for _ in range(repeat):
+        for entry in trace:
+            work.put(entry)
+
+    samples = []
+    samples_lock = threading.Lock()
+    sent = [0]
+    started = time.perf_counter()
+
+    def worker():
+        while True:
+            try:
+                entry = work.get_nowait()
+            except queue.Empty:
+                return
+            if pace and entry.get('offset_ms') is not None:
+                delay = started + entry['offset_ms'] / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            method = entry['method'].upper()
+            path = resolver.path(entry['path'])
+            body = resolver.body(entry.get('body'))
+            request_started = time.perf_counter()
+            try:
+                status, round_trips = transport.send(method, path, resolver.token(entry), body)
+            except OSError:
+                status, round_trips = 0, None
+            elapsed = time.perf_counter() - request_started
+
+            with samples_lock:
+                sent[0] += 1
+                if sent[0] > warmup:
+                    samples.append((endpoint_name(method, path), status, elapsed, round_trips))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return samples, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def latency_summary(latencies, round_trips, errors):
+    """Summarize one group of samples in milliseconds"""
+    latencies = sorted(latencies)
+    summary = {'count': len(latencies), 'errors': errors}
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 3)
+    summary['mean_ms'] = round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0
+    counted = [n for n in round_trips if n is not None]
+    summary['round_trips_per_request'] = round(sum(counted) / len(counted), 2) if counted else None
+    return summary
+
+
+def summarize(samples, duration, mode):
+    """Aggregate replay samples overall and per endpoint"""
+    groups = {}
+    for endpoint, status, elapsed, round_trips in samples:
+        group = groups.setdefault(endpoint, ([], [], [0]))
+        group[0].append(elapsed)
+        group[1].append(round_trips)
+        if status == 0 or status >= 500:
+            group[2][0] += 1
+
+    return {
+        'mode': mode,
+        'requests': len(samples),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(samples) / duration, 2) if duration else 0.0,
+        'overall': latency_summary([s[2] for s in samples], [s[3] for s in samples],
+                                   sum(g[2][0] for g in groups.values())),
+        'endpoints': {endpoint: latency_summary(latencies, round_trips, errors[0])
+                      for endpoint, (latencies, round_trips, errors) in sorted(groups.items())}
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Get (endpoint, metric, baseline, current, change %) rows and whether any p95 regressed too far"""
+    rows = []
+    failed = False
+    current_groups = dict(results['endpoints'], overall=results['overall'])
+    baseline_groups = dict(baseline['endpoints'], overall=baseline['overall'])
+    endpoints = sorted(results['endpoints'].keys() & baseline['endpoints'].keys()) + ['overall']
+    for endpoint in endpoints:
+        for metric in [f"p{pct}_ms" for pct in PERCENTILES]:
+            before, after = baseline_groups[endpoint][metric], current_groups[endpoint][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((endpoint, metric, before, after, change))
+            if metric == 'p95_ms' and max_regression is not None and change > max_regression:
+                failed = True
+
+    before, after = baseline['throughput_rps'], results['throughput_rps']
+    rows.append(('overall', 'throughput_rps', before, after, (after - before) / before * 100 if before else 0.0))
+    return rows, failed
+
+
+# ==================== OUTPUT ====================
+
+def print_results(results):
+    click.echo(f"\n{results['requests']} requests in {results['duration_s']}s "
+               f"({results['throughput_rps']} req/s, mode={results['mode']})\n")
+    header = f"{'endpoint':<32} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db trips':>9}"
+    click.echo(header)
+    click.echo('-' * len(header))
+    for endpoint, summary in list(results['endpoints'].items()) + [('overall', results['overall'])]:
+        trips = summary['round_trips_per_request']
+        click.echo(f"{endpoint:<32} {summary['count']:>7} {summary['errors']:>5} {summary['p50_ms']:>9.2f} "
+                   f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {trips if trips is not None else '-':>9}")
+
+
+def print_comparison(rows):
+    click.echo(f"\n{'endpoint':<32} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>9}")
+    for endpoint, metric, before, after, change in rows:
+        worse = change < 0 if metric == 'throughput_rps' else change > 0
+        line = f"{endpoint:<32} {metric:<15} {before:>10.2f} {after:>10.2f} {change:>+8.1f}%"
+        click.echo(click.style(line, fg='red') if worse and abs(change) >= 5 else line)
+
+
+@click.command()
+@click.option('--trace', 'trace_path', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='JSONL request trace to replay')
+@click.option('--mode', type=click.Choice(['client', 'http']), default='client',
+              help='In-process test client or a running server')
+@click.option('--url', default='http://localhost:5174', help='Server URL for http mode')
+@click.option('--concurrency', default=1, help='Concurrent replay workers')
+@click.option('--repeat', default=1, help='Times to replay the trace')
+@click.option('--warmup', default=0, help='Leading requests to send without measuring')
+@click.option('--pace', is_flag=True, help="Honour each request's offset_ms instead of replaying flat out")
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Write results as a baseline JSON file')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Baseline JSON file to compare against')
+@click.option('--max-regression', type=float, default=None,
+              help='Exit non-zero if any p95 is this many percent slower than the baseline')
+def main(trace_path, mode, url, concurrency, repeat, warmup, pace, save_baseline, baseline, max_regression):
+    """Replay a request trace and report latency, throughput and DB round trips"""
+
+    trace = load_trace(trace_path)
+    resolver = TraceResolver.from_database()
+    transport = ClientTransport() if mode == 'client' else HttpTransport(url)
+
+    click.echo(f"Replaying {len(trace)} requests x{repeat} with {concurrency} worker(s)...")
+    samples, duration = replay(trace, transport, resolver, concurrency, repeat, warmup, pace)
+    results = summarize(samples, duration, transport.name)
+    print_results(results)
+
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        click.echo(click.style(f"\n✓ Baseline saved to {save_baseline}", fg='green'))
+
+    if baseline:
+        with open(baseline) as f:
+            baseline_results = json.load(f)
+        if baseline_results['mode'] != results['mode']:
+            click.echo(click.style(f"\nWarning: baseline was recorded in {baseline_results['mode']} mode", fg='yellow'))
+        rows, failed = compare(results, baseline_results, max_regression)
+        print_comparison(rows)
+        if failed:
+            raise click.ClickException(f"p95 latency regressed by more than {max_regression}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Synthesize skewed datasets and request traces for benchmark.py.
+
+Production traffic is not uniform: a handful of events draw most of the
+purchases, ticket releases arrive as on-sale spikes and organizers leave
+their dashboards polling. Named profiles describe those shapes, and the
+same profile and seed always produce the same data and the same trace:
+
+    python generate_workload.py data --profile flash-sale --seed 7 --clear
+    python generate_workload.py trace --profile flash-sale --seed 7 --output flash-sale.jsonl
+    python benchmark.py --trace flash-sale.jsonl --pace
+
+Event popularity follows a Zipf distribution over a seeded shuffle of the
+events. Traces name events by position ("{event:N}"), so the hot events in
+the trace are the hot events in the data when it was loaded into an empty
+database with --clear. Profiles that bulk load (large) get uniform ticket
+sales; their skew comes from the trace alone.
+"""
+
+import json
+import random
+from collections import Counter
+from itertools import accumulate
+
+import click
+from sqlalchemy import create_engine
+
+from generate_test_data import (DataGenerator, DATABASE_URL, EVENT_CATEGORIES, EVENT_NAMES, TICKET_TYPES,
+                                bulk_load, fake)
+
+PROFILES = {
+    'small': {
+        'organizers': 5, 'attendees': 50, 'events': 20, 'tickets': 200, 'bulk': False,
+        'requests': 2000, 'duration_s': 60, 'zipf': 1.0, 'write_ratio': 0.05,
+        'polling_organizers': 2, 'poll_interval_s': 30, 'on_sales': 0, 'spike_requests': 0, 'spike_decay_s': 5
+    },
+    'medium': {
+        'organizers': 20, 'attendees': 1000, 'events': 200, 'tickets': 5000, 'bulk': False,
+        'requests': 20000, 'duration_s': 300, 'zipf': 1.1, 'write_ratio': 0.1,
+        'polling_organizers': 10, 'poll_interval_s': 15, 'on_sales': 2, 'spike_requests': 2000, 'spike_decay_s': 10
+    },
+    'large': {
+        'organizers': 200, 'attendees': 50000, 'events': 5000, 'tickets': 500000, 'bulk': True,
+        'requests': 100000, 'duration_s': 900, 'zipf': 1.2, 'write_ratio': 0.1,
+        'polling_organizers': 50, 'poll_interval_s': 10, 'on_sales': 5, 'spike_requests': 5000, 'spike_decay_s': 20
+    },
+    'flash-sale': {
+        'organizers': 10, 'attendees': 5000, 'events': 50, 'tickets': 5000, 'bulk': False,
+        'requests': 10000, 'duration_s': 300, 'zipf': 1.4, 'write_ratio': 0.2,
+        'polling_organizers': 10, 'poll_interval_s': 5, 'on_sales': 1, 'spike_requests': 40000, 'spike_decay_s': 30
+    }
+}
+
+# Relative weights of the requests attendees and visitors make outside spikes
+READ_MIX = {'browse': 40, 'search': 15, 'tickets': 15, 'notifications': 20, 'stats': 10}
+WRITE_MIX = {'purchase': 85, 'read_notifications': 15}
+TICKET_TYPE_WEIGHTS = [70, 20, 10]
+SPIKE_PURCHASE_SHARE = 0.7
+SEARCH_TERMS = sorted({word for names in EVENT_NAMES.values() for name in names for word in name.split()})
+
+
+def load_profile(name, **overrides):
+    """Get a profile's settings with any non-None overrides applied"""
+    profile = dict(PROFILES[name])
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+def event_weights(events, exponent, seed):
+    """Zipf popularity weight for each event position, hottest first in a seeded shuffle"""
+    ranks = list(range(events))
+    random.Random(f"{seed}:popularity").shuffle(ranks)
+    return [1 / (rank + 1) ** exponent for rank in ranks]
+
+
+def hottest_events(weights, count):
+    return sorted(range(len(weights)), key=lambda index: -weights[index])[:count]
+
+
+class TraceSynthesizer:
+    """Build a benchmark.py trace for a profile: Zipf purchases, on-sale spikes and dashboard polling"""
+
+    def __init__(self, profile, seed):
+        self.profile = profile
+        self.seed = seed
+        self.rng = random.Random(f"{seed}:trace")
+        self.weights = event_weights(profile['events'], profile['zipf'], seed)
+        self.cum_weights = list(accumulate(self.weights))
+
+    def pick_event(self):
+        return self.rng.choices(range(len(self.weights)), cum_weights=self.cum_weights)[0]
+
+    def attendee(self):
+        return f"attendee:{self.rng.randrange(self.profile['attendees'])}"
+
+    def request(self, offset, method, path, user=None, body=None):
+        entry = {'offset_ms': round(offset * 1000, 1), 'method': method, 'path': path}
+        if user:
+            entry['user'] = user
+        if body is not None:
+            entry['body'] = body
+        return entry
+
+    def purchase(self, offset, event):
+        ticket_type = self.rng.choices(TICKET_TYPES, weights=TICKET_TYPE_WEIGHTS)[0]
+        return self.request(offset, 'POST', '/api/tickets', self.attendee(),
+                            {'event_id': f"{{event:{event}}}", 'ticket_type': ticket_type})
+
+    def browse(self, offset):
+        path = '/api/customer-events?limit=20'
+        if self.rng.random() < 0.3:
+            path += f"&category={self.rng.choice(EVENT_CATEGORIES)}"
+        return self.request(offset, 'GET', path, self.attendee() if self.rng.random() < 0.4 else None)
+
+    def background(self, offset):
+        """One request from the steady read/write mix"""
+        if self.rng.random() < self.profile['write_ratio']:
+            kind = self.rng.choices(list(WRITE_MIX), weights=list(WRITE_MIX.values()))[0]
+            if kind == 'purchase':
+                return self.purchase(offset, self.pick_event())
+            return self.request(offset, 'PUT', '/api/notifications/read', self.attendee(), {})
+
+        kind = self.rng.choices(list(READ_MIX), weights=list(READ_MIX.values()))[0]
+        if kind == 'browse':
+            return self.browse(offset)
+        if kind == 'search':
+            return self.request(offset, 'GET', f"/api/customer-events/search?q={self.rng.choice(SEARCH_TERMS)}")
+        path = {'tickets': '/api/tickets', 'notifications': '/api/notifications', 'stats': '/api/stats'}[kind]
+        return self.request(offset, 'GET', path, self.attendee())
+
+    def spikes(self):
+        """On-sale bursts: arrivals decay exponentially from each release on one of the hottest events"""
+        duration = self.profile['duration_s']
+        decay = self.profile['spike_decay_s']
+        for event in hottest_events(self.weights, self.profile['on_sales']):
+            start = self.rng.uniform(0.1, 0.7) * duration
+            for _ in range(self.profile['spike_requests']):
+                offset = min(start + self.rng.expovariate(1 / decay), duration)
+                if self.rng.random() < SPIKE_PURCHASE_SHARE:
+                    yield self.purchase(offset, event)
+                else:
+                    yield self.browse(offset)
+
+    def polling(self):
+        """Organizer dashboards refreshing on a jittered interval"""
+        interval = self.profile['poll_interval_s']
+        for organizer in range(self.profile['polling_organizers']):
+            user = f"organizer:{organizer}"
+            offset = self.rng.uniform(0, interval)
+            while offset < self.profile['duration_s']:
+                yield self.request(offset, 'GET', '/api/dashboard/stats', user)
+                yield self.request(offset + 0.05, 'GET', '/api/events', user)
+                offset += interval * self.rng.uniform(0.9, 1.1)
+
+    def generate(self):
+        """Get the whole trace ordered by offset"""
+        duration = self.profile['duration_s']
+        offsets = sorted(self.rng.uniform(0, duration) for _ in range(self.profile['requests']))
+        entries = [self.background(offset) for offset in offsets]
+        entries.extend(self.spikes())
+        entries.extend(self.polling())
+        entries.sort(key=lambda entry: entry['offset_ms'])
+        return entries
+
+
+def describe(entries, profile):
+    """Summarize a trace's mix for the console"""
+    writes = sum(1 for entry in entries if entry['method'] != 'GET')
+    purchases = Counter(entry['body']['event_id'] for entry in entries
+                        if entry['method'] == 'POST' and entry['path'] == '/api/tickets')
+    click.echo(f"  {len(entries):,} requests over {profile['duration_s']}s, {writes / max(len(entries), 1):.0%} writes")
+    if purchases:
+        hottest, count = purchases.most_common(1)[0]
+        total = sum(purchases.values())
+        click.echo(f"  {total:,} purchases, {count / total:.0%} on the hottest event ({hottest})")
+
+
+@click.group()
+def cli():
+    """Synthesize skewed datasets and request traces"""
+
+
+@cli.command()
+def profiles():
+    """List the named workload profiles"""
+    for name, profile in PROFILES.items():
+        click.echo(f"{name}:")
+        for key, value in profile.items():
+            click.echo(f"  {key}: {value}")
+
+
+@cli.command()
+@click.option('--profile', 'profile_name', type=click.Choice(list(PROFILES)), default='medium')
+@click.option('--seed', default=1, help='Random seed; the same seed gives the same data')
+@click.option('--clear', is_flag=True, help='Clear existing data first (needed for traces to line up)')
+def data(profile_name, seed, clear):
+    """Load a profile's dataset with Zipf-skewed ticket sales"""
+    profile = load_profile(profile_name)
+    random.seed(seed)
+    fake.seed_instance(seed)
+
+    engine = create_engine(DATABASE_URL)
+    generator = DataGenerator(engine)
+    if clear:
+        click.echo("Clearing existing data...")
+        generator.clear_existing_data()
+
+    if profile['bulk']:
+        bulk_load(generator, profile['organizers'], profile['attendees'], profile['events'], profile['tickets'],
+                  seed=seed)
+    else:
+        generator.generate_users(profile['organizers'], profile['attendees'])
+        generator.generate_events(profile['events'])
+        generator.generate_tickets(profile['tickets'],
+                                   event_weights(len(generator.event_ids), profile['zipf'], seed))
+    generator.generate_activities()
+    click.echo(click.style(f"\n✓ Loaded the {profile_name} dataset (seed {seed})", fg='green'))
+
+
+@cli.command()
+@click.option('--profile', 'profile_name', type=click.Choice(list(PROFILES)), default='medium')
+@click.option('--seed', default=1, help='Random seed; the same seed gives the same trace')
+@click.option('--output', type=click.File('w'), default='-', help='Trace file to write (default: stdout)')
+@click.option('--requests', type=int, default=None, help='Background requests outside spikes')
+@click.option('--duration', 'duration_s', type=float, default=None, help='Trace length in seconds')
+@click.option('--zipf', type=float, default=None, help='Zipf exponent for event popularity')
+@click.option('--write-ratio', type=float, default=None, help='Share of background requests that write')
+@click.option('--poll-interval', 'poll_interval_s', type=float, default=None,
+              help='Seconds between organizer dashboard refreshes')
+@click.option('--on-sales', type=int, default=None, help='Number of on-sale spikes')
+def trace(profile_name, seed, output, **overrides):
+    """Write a JSONL request trace for benchmark.py"""
+    profile = load_profile(profile_name, **overrides)
+    entries = TraceSynthesizer(profile, seed).generate()
+    for entry in entries:
+        output.write(json.dumps(entry) + '\n')
+    if output.name != '<stdout>':
+        click.echo(f"Wrote {output.name}")
+        describe(entries, profile)
+
+
+if __name__ == '__main__':
+    cli()
@@ -100,6 +100,9 @@ CREATE TABLE tickets (
         ON UPDATE CASCADE
 );
 
+-- One ticket per attendee and ticket type for each event
+CREATE UNIQUE INDEX uq_tickets_event_user_type ON tickets (event_id, user_id, ticket_type);
+
 -- Create Activity table for logging all system activities
 CREATE TABLE activity (
     activity_id SERIAL PRIMARY KEY,
@@ -310,11 +313,11 @@ INSERT INTO tickets (event_id, user_id, ticket_type, status, price_paid, booking
 (7, 59, 'general', 'pending', 95.00, 'EVT-SM2025-005', NULL, 'Sebastian Collins', 'sebastian.collins@email.com', CURRENT_TIMESTAMP - INTERVAL '45 minutes'),
 (9, 60, 'vip', 'registered', 60.00, 'EVT-CAE2025-004', 'pay_050', 'Aria Stewart', 'aria.stewart@email.com', CURRENT_TIMESTAMP - INTERVAL '2 days');
 
--- Update current_registrations for events based on registered tickets
+-- Update current_registrations for events: pending and registered tickets hold a seat
 UPDATE events SET current_registrations = (
     SELECT COUNT(*) FROM tickets 
     WHERE tickets.event_id = events.event_id 
-    AND tickets.status = 'registered'
+    AND tickets.status IN ('pending', 'registered')
 );
 
 -- Insert sample activity data
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Apply versioned schema migrations to the Event Management System database.
+
+Migrations live in migrations/ as NNNN_description.sql and are applied in
+version order, each recorded in the schema_migrations table. A migration
+runs inside a single transaction unless its first line is
+'-- migrate:no-transaction', in which case each statement is executed on
+its own in autocommit mode (required for CREATE INDEX CONCURRENTLY).
+"""
+
+import os
+import re
+import hashlib
+import psycopg2
+import click
+
+from api import DATABASE_CONFIG
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+NO_TRANSACTION_MARKER = '-- migrate:no-transaction'
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.IGNORECASE)
+
+
+class Migration:
+    def __init__(self, version, name, sql):
+        self.version = version
+        self.name = name
+        self.sql = sql
+        self.transactional = not sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+        self.checksum = hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+    def statements(self):
+        """Split the migration into individual statements"""
+        return split_statements(self.sql)
+
+
+def split_statements(sql):
+    """Split plain SQL on semicolons that end a line, dropping comment lines
+
+    Only used for no-transaction migrations, which must not contain
+    dollar-quoted function bodies.
+    """
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        if stripped.endswith(';'):
+            statements.append('\n'.join(current).strip().rstrip(';'))
+            current = []
+    if current:
+        statements.append('\n'.join(current).strip().rstrip(';'))
+    return statements
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Load migration files ordered by version"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename)) as f:
+            migrations.append(Migration(int(match.group(1)), match.group(2), f.read()))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise click.ClickException("Duplicate migration versions found")
+    return migrations
+
+
+def ensure_migrations_table(conn):
+    """Create the schema_migrations bookkeeping table"""
+    with conn.cursor() as cursor:
+        cursor.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                              version INT PRIMARY KEY,
+                              name VARCHAR(255) NOT NULL,
+                              checksum VARCHAR(64) NOT NULL,
+                              applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                          )""")
+    conn.commit()
+
+
+def applied_migrations(conn):
+    """Get {version: checksum} for every applied migration"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        applied = dict(cursor.fetchall())
+    conn.commit()
+    return applied
+
+
+def drop_invalid_index(cursor, statement):
+    """Drop an INVALID index left behind by an interrupted concurrent build"""
+    match = CONCURRENT_INDEX_PATTERN.search(statement)
+    if not match:
+        return
+    cursor.execute("""SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                      WHERE c.relname = %s AND NOT i.indisvalid""", (match.group(1),))
+    if cursor.fetchone():
+        click.echo(f"  Dropping invalid index {match.group(1)}")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+def apply_migration(conn, migration):
+    """Apply one migration and record it"""
+    record_sql = "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)"
+    record_params = (migration.version, migration.name, migration.checksum)
+
+    if migration.transactional:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(migration.sql)
+                cursor.execute(record_sql, record_params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return
+
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for statement in migration.statements():
+                drop_invalid_index(cursor, statement)
+                cursor.execute(statement)
+            cursor.execute(record_sql, record_params)
+    finally:
+        conn.autocommit = False
+
+
+def migrate(conn, migrations, target=None):
+    """Apply pending migrations up to target, returning the ones applied"""
+    ensure_migrations_table(conn)
+    applied = applied_migrations(conn)
+
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            click.echo(click.style(
+                f"Warning: migration {migration.version:04d}_{migration.name} changed after it was applied",
+                fg='yellow'))
+
+    pending = [m for m in migrations
+               if m.version not in applied and (target is None or m.version <= target)]
+    for migration in pending:
+        click.echo(f"Applying {migration.version:04d}_{migration.name}...")
+        apply_migration(conn, migration)
+    return pending
+
+
+@click.command()
+@click.option('--target', type=int, default=None, help='Apply migrations up to this version')
+@click.option('--status', is_flag=True, help='List migrations and whether they are applied')
+def main(target, status):
+    """Apply pending schema migrations"""
+
+    migrations = load_migrations()
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+
+    try:
+        if status:
+            ensure_migrations_table(conn)
+            applied = applied_migrations(conn)
+            for migration in migrations:
+                state = 'applied' if migration.version in applied else 'pending'
+                click.echo(f"  {migration.version:04d}_{migration.name}: {state}")
+            return
+
+        applied = migrate(conn, migrations, target)
+        click.echo(click.style(f"\n✓ Applied {len(applied)} migration(s)", fg='green'))
+
+    except Exception as e:
+        click.echo(click.style(f"\n✗ Error: {str(e)}", fg='red'))
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+-- migrate:no-transaction
+-- Secondary indexes for the hot queries in api.py. Built CONCURRENTLY so
+-- they can be applied to a live database without blocking writes.
+
+-- Duplicate-booking rule used by book_ticket (already in init.sql for new databases)
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_tickets_event_user_type
+    ON tickets (event_id, user_id, ticket_type);
+
+-- Per-event ticket lookups: attendees, refunds, reports and revenue joins
+-- filter on (event_id, status); the included columns cover the aggregates
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_event_status
+    ON tickets (event_id, status) INCLUDE (ticket_type, price_paid, user_id);
+
+-- A user's tickets and attendee stats
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_user
+    ON tickets (user_id) INCLUDE (event_id, status, price_paid);
+
+-- Organizer registrations feed, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_event_created
+    ON tickets (event_id, created_at DESC);
+
+-- Organizer event lists and dashboards, ordered by datetime
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_organizer_datetime
+    ON events (organizer_id, datetime DESC) INCLUDE (status);
+
+-- Public catalogue of active events, ordered by datetime
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_active_datetime
+    ON events (datetime, event_id) WHERE status = 'active';
+
+-- Notification feeds, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_user_created
+    ON activity (user_id, created_at DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_event_created
+    ON activity (event_id, created_at DESC);
+
+ANALYZE tickets;
+ANALYZE events;
+ANALYZE activity;
@@ -0,0 +1,166 @@
+-- Per-organizer dashboard totals, kept current by triggers on events and
+-- tickets so the dashboard reads one row instead of re-aggregating every
+-- ticket the organizer has sold. reconcile_organizer_summary() rebuilds the
+-- totals from scratch and is run periodically to correct any drift.
+
+CREATE TABLE IF NOT EXISTS organizer_summary (
+    organizer_id INT PRIMARY KEY,
+    total_events INT NOT NULL DEFAULT 0,
+    total_tickets INT NOT NULL DEFAULT 0, -- Tickets in any status
+    total_attendees INT NOT NULL DEFAULT 0, -- Distinct users holding a registered ticket
+    total_revenue DECIMAL(12, 2) NOT NULL DEFAULT 0.00, -- Sum of registered ticket prices
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_summary_organizer
+        FOREIGN KEY (organizer_id) REFERENCES users(user_id)
+        ON DELETE CASCADE
+);
+
+-- Registered tickets per organizer and attendee, so distinct attendees can be
+-- counted incrementally as holders go from zero to one ticket and back
+CREATE TABLE IF NOT EXISTS organizer_attendees (
+    organizer_id INT NOT NULL,
+    user_id INT NOT NULL,
+    registered_tickets INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (organizer_id, user_id),
+
+    CONSTRAINT fk_attendees_organizer
+        FOREIGN KEY (organizer_id) REFERENCES users(user_id)
+        ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION organizer_summary_apply(
+    p_organizer_id INT, p_user_id INT, p_price DECIMAL, p_registered INT, p_tickets INT, p_events INT
+) RETURNS void AS $$
+DECLARE
+    v_registered INT;
+    v_attendees INT := 0;
+BEGIN
+    IF p_registered <> 0 THEN
+        INSERT INTO organizer_attendees (organizer_id, user_id, registered_tickets)
+        VALUES (p_organizer_id, p_user_id, p_registered)
+        ON CONFLICT (organizer_id, user_id) DO UPDATE
+            SET registered_tickets = organizer_attendees.registered_tickets + EXCLUDED.registered_tickets
+        RETURNING registered_tickets INTO v_registered;
+
+        IF p_registered > 0 AND v_registered = p_registered THEN
+            v_attendees := 1;
+        ELSIF p_registered < 0 AND v_registered = 0 THEN
+            v_attendees := -1;
+        END IF;
+    END IF;
+
+    INSERT INTO organizer_summary (organizer_id, total_events, total_tickets, total_attendees, total_revenue)
+    VALUES (p_organizer_id, p_events, p_tickets, v_attendees, p_registered * COALESCE(p_price, 0))
+    ON CONFLICT (organizer_id) DO UPDATE SET
+        total_events = organizer_summary.total_events + EXCLUDED.total_events,
+        total_tickets = organizer_summary.total_tickets + EXCLUDED.total_tickets,
+        total_attendees = organizer_summary.total_attendees + EXCLUDED.total_attendees,
+        total_revenue = organizer_summary.total_revenue + EXCLUDED.total_revenue,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION organizer_summary_tickets_trigger() RETURNS trigger AS $$
+DECLARE
+    v_organizer_id INT;
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.status = NEW.status AND OLD.price_paid = NEW.price_paid
+       AND OLD.event_id = NEW.event_id AND OLD.user_id = NEW.user_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT organizer_id INTO v_organizer_id FROM events WHERE event_id = OLD.event_id;
+        PERFORM organizer_summary_apply(v_organizer_id, OLD.user_id, OLD.price_paid,
+                                        CASE WHEN OLD.status = 'registered' THEN -1 ELSE 0 END, -1, 0);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT organizer_id INTO v_organizer_id FROM events WHERE event_id = NEW.event_id;
+        PERFORM organizer_summary_apply(v_organizer_id, NEW.user_id, NEW.price_paid,
+                                        CASE WHEN NEW.status = 'registered' THEN 1 ELSE 0 END, 1, 0);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION organizer_summary_events_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.organizer_id = NEW.organizer_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM organizer_summary_apply(OLD.organizer_id, NULL, 0, 0, 0, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM organizer_summary_apply(NEW.organizer_id, NULL, 0, 0, 0, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_organizer_summary_tickets ON tickets;
+CREATE TRIGGER trg_organizer_summary_tickets
+    AFTER INSERT OR DELETE OR UPDATE OF status, price_paid, event_id, user_id ON tickets
+    FOR EACH ROW EXECUTE FUNCTION organizer_summary_tickets_trigger();
+
+DROP TRIGGER IF EXISTS trg_organizer_summary_events ON events;
+CREATE TRIGGER trg_organizer_summary_events
+    AFTER INSERT OR DELETE OR UPDATE OF organizer_id ON events
+    FOR EACH ROW EXECUTE FUNCTION organizer_summary_events_trigger();
+
+-- Rebuild every organizer's totals from the source tables, returning the
+-- number of summary rows that had drifted. The tables are locked so that
+-- concurrent trigger updates wait and apply on top of the rebuilt totals.
+CREATE OR REPLACE FUNCTION reconcile_organizer_summary() RETURNS INT AS $$
+DECLARE
+    v_drifted INT;
+BEGIN
+    LOCK TABLE organizer_summary, organizer_attendees IN EXCLUSIVE MODE;
+
+    DELETE FROM organizer_attendees;
+    INSERT INTO organizer_attendees (organizer_id, user_id, registered_tickets)
+    SELECT e.organizer_id, t.user_id, COUNT(*)
+    FROM tickets t
+    JOIN events e ON t.event_id = e.event_id
+    WHERE t.status = 'registered'
+    GROUP BY e.organizer_id, t.user_id;
+
+    WITH actual AS (
+        SELECT
+            u.user_id as organizer_id,
+            (SELECT COUNT(*) FROM events e WHERE e.organizer_id = u.user_id) as total_events,
+            (SELECT COUNT(*) FROM tickets t JOIN events e ON t.event_id = e.event_id
+             WHERE e.organizer_id = u.user_id) as total_tickets,
+            (SELECT COUNT(*) FROM organizer_attendees a WHERE a.organizer_id = u.user_id) as total_attendees,
+            (SELECT COALESCE(SUM(t.price_paid), 0) FROM tickets t JOIN events e ON t.event_id = e.event_id
+             WHERE e.organizer_id = u.user_id AND t.status = 'registered') as total_revenue
+        FROM users u
+        WHERE u.role = 'organizer'
+           OR EXISTS (SELECT 1 FROM events e WHERE e.organizer_id = u.user_id)
+    )
+    INSERT INTO organizer_summary (organizer_id, total_events, total_tickets, total_attendees, total_revenue)
+    SELECT organizer_id, total_events, total_tickets, total_attendees, total_revenue FROM actual
+    ON CONFLICT (organizer_id) DO UPDATE SET
+        total_events = EXCLUDED.total_events,
+        total_tickets = EXCLUDED.total_tickets,
+        total_attendees = EXCLUDED.total_attendees,
+        total_revenue = EXCLUDED.total_revenue,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (organizer_summary.total_events, organizer_summary.total_tickets,
+           organizer_summary.total_attendees, organizer_summary.total_revenue)
+          IS DISTINCT FROM
+          (EXCLUDED.total_events, EXCLUDED.total_tickets, EXCLUDED.total_attendees, EXCLUDED.total_revenue);
+
+    GET DIAGNOSTICS v_drifted = ROW_COUNT;
+    RETURN v_drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_organizer_summary();
@@ -0,0 +1,143 @@
+-- Per-event registered ticket counts and revenue by ticket type, kept
+-- current by triggers on tickets so organizer event listings and reports
+-- read one row per event instead of aggregating its tickets.
+-- reconcile_event_rollups() rebuilds them from the tickets table.
+
+CREATE TABLE IF NOT EXISTS event_rollups (
+    event_id INT PRIMARY KEY,
+    general_registrations INT NOT NULL DEFAULT 0,
+    vip_registrations INT NOT NULL DEFAULT 0,
+    premium_registrations INT NOT NULL DEFAULT 0,
+    general_revenue DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    vip_revenue DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    premium_revenue DECIMAL(12, 2) NOT NULL DEFAULT 0.00,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0.00, -- All registered tickets, any type
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_rollups_event
+        FOREIGN KEY (event_id) REFERENCES events(event_id)
+        ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION event_rollups_apply(
+    p_event_id INT, p_ticket_type ticket_type, p_price DECIMAL, p_delta INT
+) RETURNS void AS $$
+DECLARE
+    v_revenue DECIMAL := p_delta * COALESCE(p_price, 0);
+BEGIN
+    INSERT INTO event_rollups AS r (
+        event_id, general_registrations, vip_registrations, premium_registrations,
+        general_revenue, vip_revenue, premium_revenue, revenue
+    )
+    VALUES (
+        p_event_id,
+        CASE WHEN p_ticket_type = 'general' THEN p_delta ELSE 0 END,
+        CASE WHEN p_ticket_type = 'vip' THEN p_delta ELSE 0 END,
+        CASE WHEN p_ticket_type = 'premium' THEN p_delta ELSE 0 END,
+        CASE WHEN p_ticket_type = 'general' THEN v_revenue ELSE 0 END,
+        CASE WHEN p_ticket_type = 'vip' THEN v_revenue ELSE 0 END,
+        CASE WHEN p_ticket_type = 'premium' THEN v_revenue ELSE 0 END,
+        v_revenue
+    )
+    ON CONFLICT (event_id) DO UPDATE SET
+        general_registrations = r.general_registrations + EXCLUDED.general_registrations,
+        vip_registrations = r.vip_registrations + EXCLUDED.vip_registrations,
+        premium_registrations = r.premium_registrations + EXCLUDED.premium_registrations,
+        general_revenue = r.general_revenue + EXCLUDED.general_revenue,
+        vip_revenue = r.vip_revenue + EXCLUDED.vip_revenue,
+        premium_revenue = r.premium_revenue + EXCLUDED.premium_revenue,
+        revenue = r.revenue + EXCLUDED.revenue,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only registered tickets count, so most status changes (e.g. pending to
+-- rejected) never touch the rollup row
+CREATE OR REPLACE FUNCTION event_rollups_tickets_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'registered' THEN
+        IF TG_OP = 'UPDATE' AND NEW.status = 'registered'
+           AND OLD.event_id = NEW.event_id AND OLD.ticket_type = NEW.ticket_type
+           AND OLD.price_paid = NEW.price_paid THEN
+            RETURN NULL;
+        END IF;
+        PERFORM event_rollups_apply(OLD.event_id, OLD.ticket_type, OLD.price_paid, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'registered' THEN
+        PERFORM event_rollups_apply(NEW.event_id, NEW.ticket_type, NEW.price_paid, 1);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Every event gets a rollup row up front so listings can use a plain join
+CREATE OR REPLACE FUNCTION event_rollups_events_trigger() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO event_rollups (event_id) VALUES (NEW.event_id)
+    ON CONFLICT (event_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_event_rollups_tickets ON tickets;
+CREATE TRIGGER trg_event_rollups_tickets
+    AFTER INSERT OR DELETE OR UPDATE OF status, price_paid, event_id, ticket_type ON tickets
+    FOR EACH ROW EXECUTE FUNCTION event_rollups_tickets_trigger();
+
+DROP TRIGGER IF EXISTS trg_event_rollups_events ON events;
+CREATE TRIGGER trg_event_rollups_events
+    AFTER INSERT ON events
+    FOR EACH ROW EXECUTE FUNCTION event_rollups_events_trigger();
+
+-- Rebuild every event's rollup from its tickets, returning the number of
+-- rows that had drifted
+CREATE OR REPLACE FUNCTION reconcile_event_rollups() RETURNS INT AS $$
+DECLARE
+    v_drifted INT;
+BEGIN
+    LOCK TABLE event_rollups IN EXCLUSIVE MODE;
+
+    WITH actual AS (
+        SELECT
+            e.event_id,
+            COUNT(t.ticket_id) FILTER (WHERE t.ticket_type = 'general') as general_registrations,
+            COUNT(t.ticket_id) FILTER (WHERE t.ticket_type = 'vip') as vip_registrations,
+            COUNT(t.ticket_id) FILTER (WHERE t.ticket_type = 'premium') as premium_registrations,
+            COALESCE(SUM(t.price_paid) FILTER (WHERE t.ticket_type = 'general'), 0) as general_revenue,
+            COALESCE(SUM(t.price_paid) FILTER (WHERE t.ticket_type = 'vip'), 0) as vip_revenue,
+            COALESCE(SUM(t.price_paid) FILTER (WHERE t.ticket_type = 'premium'), 0) as premium_revenue,
+            COALESCE(SUM(t.price_paid), 0) as revenue
+        FROM events e
+        LEFT JOIN tickets t ON t.event_id = e.event_id AND t.status = 'registered'
+        GROUP BY e.event_id
+    )
+    INSERT INTO event_rollups AS r (
+        event_id, general_registrations, vip_registrations, premium_registrations,
+        general_revenue, vip_revenue, premium_revenue, revenue
+    )
+    SELECT event_id, general_registrations, vip_registrations, premium_registrations,
+           general_revenue, vip_revenue, premium_revenue, revenue
+    FROM actual
+    ON CONFLICT (event_id) DO UPDATE SET
+        general_registrations = EXCLUDED.general_registrations,
+        vip_registrations = EXCLUDED.vip_registrations,
+        premium_registrations = EXCLUDED.premium_registrations,
+        general_revenue = EXCLUDED.general_revenue,
+        vip_revenue = EXCLUDED.vip_revenue,
+        premium_revenue = EXCLUDED.premium_revenue,
+        revenue = EXCLUDED.revenue,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (r.general_registrations, r.vip_registrations, r.premium_registrations,
+           r.general_revenue, r.vip_revenue, r.premium_revenue, r.revenue)
+          IS DISTINCT FROM
+          (EXCLUDED.general_registrations, EXCLUDED.vip_registrations, EXCLUDED.premium_registrations,
+           EXCLUDED.general_revenue, EXCLUDED.vip_revenue, EXCLUDED.premium_revenue, EXCLUDED.revenue);
+
+    GET DIAGNOSTICS v_drifted = ROW_COUNT;
+    RETURN v_drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_event_rollups();
@@ -0,0 +1,83 @@
+-- Maintained search columns on events for the catalogue search endpoint.
+-- search_document is a weighted tsvector for ranked full-text search;
+-- search_text is the short, lower-cased text matched by trigram similarity
+-- for fuzzy and substring queries. Both include the organizer's name, so
+-- they are kept current by triggers on events and on users.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE events
+    ADD COLUMN IF NOT EXISTS search_document tsvector,
+    ADD COLUMN IF NOT EXISTS search_text TEXT;
+
+CREATE OR REPLACE FUNCTION event_search_document(
+    p_title TEXT, p_description TEXT, p_category TEXT, p_location TEXT, p_venue_name TEXT, p_organizer_name TEXT
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', COALESCE(p_title, '')), 'A') ||
+           setweight(to_tsvector('english', COALESCE(p_organizer_name, '') || ' ' || COALESCE(p_category, '')), 'B') ||
+           setweight(to_tsvector('english', COALESCE(p_location, '') || ' ' || COALESCE(p_venue_name, '')), 'C') ||
+           setweight(to_tsvector('english', COALESCE(p_description, '')), 'D')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION event_search_text(
+    p_title TEXT, p_location TEXT, p_venue_name TEXT, p_organizer_name TEXT
+) RETURNS TEXT AS $$
+    SELECT lower(COALESCE(p_title, '') || ' ' || COALESCE(p_location, '') || ' ' ||
+                 COALESCE(p_venue_name, '') || ' ' || COALESCE(p_organizer_name, ''))
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION organizer_search_name(
+    p_organization TEXT, p_first_name TEXT, p_last_name TEXT
+) RETURNS TEXT AS $$
+    SELECT COALESCE(p_organization, '') || ' ' || COALESCE(p_first_name, '') || ' ' || COALESCE(p_last_name, '')
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE events e
+SET search_document = event_search_document(e.title, e.description, e.category::text, e.location, e.venue_name,
+                                            organizer_search_name(u.organization, u.first_name, u.last_name)),
+    search_text = event_search_text(e.title, e.location, e.venue_name,
+                                    organizer_search_name(u.organization, u.first_name, u.last_name))
+FROM users u
+WHERE u.user_id = e.organizer_id;
+
+CREATE OR REPLACE FUNCTION events_search_trigger() RETURNS trigger AS $$
+DECLARE
+    v_organizer_name TEXT;
+BEGIN
+    SELECT organizer_search_name(organization, first_name, last_name) INTO v_organizer_name
+    FROM users WHERE user_id = NEW.organizer_id;
+
+    NEW.search_document := event_search_document(NEW.title, NEW.description, NEW.category::text,
+                                                 NEW.location, NEW.venue_name, v_organizer_name);
+    NEW.search_text := event_search_text(NEW.title, NEW.location, NEW.venue_name, v_organizer_name);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Renaming an organizer re-indexes their events
+CREATE OR REPLACE FUNCTION users_search_trigger() RETURNS trigger AS $$
+DECLARE
+    v_organizer_name TEXT := organizer_search_name(NEW.organization, NEW.first_name, NEW.last_name);
+BEGIN
+    IF v_organizer_name IS NOT DISTINCT FROM organizer_search_name(OLD.organization, OLD.first_name, OLD.last_name) THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE events
+    SET search_document = event_search_document(title, description, category::text, location, venue_name,
+                                                v_organizer_name),
+        search_text = event_search_text(title, location, venue_name, v_organizer_name)
+    WHERE organizer_id = NEW.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_events_search ON events;
+CREATE TRIGGER trg_events_search
+    BEFORE INSERT OR UPDATE OF title, description, category, location, venue_name, organizer_id ON events
+    FOR EACH ROW EXECUTE FUNCTION events_search_trigger();
+
+DROP TRIGGER IF EXISTS trg_users_search ON users;
+CREATE TRIGGER trg_users_search
+    AFTER UPDATE OF organization, first_name, last_name ON users
+    FOR EACH ROW EXECUTE FUNCTION users_search_trigger();
@@ -0,0 +1,24 @@
+-- migrate:no-transaction
+-- Indexes for catalogue search and the public catalogue's substring
+-- filters, which used leading-wildcard ILIKE and could not use a B-tree.
+-- Requires pg_trgm, created by 0004_event_search.
+
+-- Ranked full-text search over active events
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_search_document
+    ON events USING gin (search_document) WHERE status = 'active';
+
+-- Fuzzy and substring search over active events
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_search_text_trgm
+    ON events USING gin (search_text gin_trgm_ops) WHERE status = 'active';
+
+-- location ILIKE '%...%' filter on the public catalogue
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_events_location_trgm
+    ON events USING gin (location gin_trgm_ops) WHERE status = 'active';
+
+-- organizer ILIKE '%...%' filter on the public catalogue
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_organizer_name_trgm
+    ON users USING gin (organizer_search_name(organization, first_name, last_name) gin_trgm_ops)
+    WHERE role = 'organizer';
+
+ANALYZE events;
+ANALYZE users;
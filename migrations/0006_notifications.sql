@@ -0,0 +1,225 @@
+-- Notification inbox materialized from activity on write. Each activity row
+-- fans out to the organizer of its event and to the attendee it concerns,
+-- with audience-specific titles, so reading a feed is an indexed range scan
+-- over one user's rows. Per-attendee fan-out rows (reminders, refunds) only
+-- reach their attendee: the organizer already gets the one summary row
+-- logged with them. notification_counts keeps each user's unread total.
+
+CREATE TABLE IF NOT EXISTS notifications (
+    notification_id BIGSERIAL PRIMARY KEY,
+    user_id INT NOT NULL, -- Recipient
+    activity_id INT, -- Source activity
+    title VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    read_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_notification_user
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+        ON DELETE CASCADE
+);
+
+-- A user's feed, newest first
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created
+    ON notifications (user_id, created_at DESC, notification_id DESC);
+
+-- A user's unread notifications, for bulk mark-read and reconciliation
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread
+    ON notifications (user_id) WHERE read_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS notification_counts (
+    user_id INT PRIMARY KEY,
+    unread INT NOT NULL DEFAULT 0,
+
+    CONSTRAINT fk_notification_counts_user
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+        ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION notification_title(p_audience TEXT, p_activity_type TEXT) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_audience = 'organizer' THEN
+            CASE p_activity_type
+                WHEN 'ticket_booked' THEN 'New Registration'
+                WHEN 'registration_cancelled' THEN 'Registration Cancelled'
+                ELSE 'Event Update'
+            END
+        ELSE
+            CASE p_activity_type
+                WHEN 'ticket_booked' THEN 'Ticket Booked'
+                WHEN 'registration_accepted' THEN 'Registration Accepted'
+                WHEN 'registration_rejected' THEN 'Registration Rejected'
+                WHEN 'reminder_received' THEN 'Event Reminder'
+                ELSE 'Account Activity'
+            END
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION notification_type(p_audience TEXT, p_activity_type TEXT) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_audience = 'organizer' THEN
+            CASE p_activity_type
+                WHEN 'ticket_booked' THEN 'registration'
+                WHEN 'registration_cancelled' THEN 'cancellation'
+                ELSE 'update'
+            END
+        ELSE
+            CASE p_activity_type
+                WHEN 'ticket_booked' THEN 'booking'
+                WHEN 'registration_accepted' THEN 'confirmation'
+                WHEN 'registration_rejected' THEN 'rejection'
+                WHEN 'reminder_received' THEN 'reminder'
+                ELSE 'activity'
+            END
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Activity logged once per attendee by a single organizer action. Copying
+-- these to the organizer would write one organizer notification per
+-- attendee; reminder_sent and event_cancelled summarize them instead.
+CREATE OR REPLACE FUNCTION attendee_fanout_activity(p_activity_type TEXT) RETURNS BOOLEAN AS $$
+    SELECT p_activity_type IN ('reminder_received', 'ticket_refunded')
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Notifications for a set of activity rows: the event's organizer sees
+-- everything on their events except per-attendee fan-out; the ticket holder
+-- (or the acting user when there is no ticket) sees their own activity
+-- unless they are an organizer
+CREATE OR REPLACE FUNCTION activity_notifications(p_activity_ids INT[])
+RETURNS TABLE (user_id INT, activity_id INT, title TEXT, message TEXT, type TEXT, created_at TIMESTAMP) AS $$
+    SELECT e.organizer_id, a.activity_id,
+           notification_title('organizer', a.activity_type), a.description,
+           notification_type('organizer', a.activity_type), a.created_at
+    FROM activity a
+    JOIN events e ON e.event_id = a.event_id
+    WHERE a.activity_id = ANY(p_activity_ids) AND NOT attendee_fanout_activity(a.activity_type)
+    UNION ALL
+    SELECT u.user_id, a.activity_id,
+           notification_title('attendee', a.activity_type), a.description,
+           notification_type('attendee', a.activity_type), a.created_at
+    FROM activity a
+    LEFT JOIN tickets t ON t.ticket_id = a.ticket_id
+    JOIN users u ON u.user_id = COALESCE(t.user_id, a.user_id)
+    WHERE a.activity_id = ANY(p_activity_ids) AND u.role <> 'organizer'
+$$ LANGUAGE sql STABLE;
+
+-- Statement-level so a batched activity insert fans out in one INSERT
+CREATE OR REPLACE FUNCTION activity_notifications_trigger() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO notifications (user_id, activity_id, title, message, type, created_at)
+    SELECT n.user_id, n.activity_id, n.title, n.message, n.type, COALESCE(n.created_at, CURRENT_TIMESTAMP)
+    FROM activity_notifications(ARRAY(SELECT activity_id FROM new_activity)) n;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notification_counts_apply(p_deltas JSONB) RETURNS void AS $$
+    INSERT INTO notification_counts AS c (user_id, unread)
+    SELECT key::int, value::int FROM jsonb_each_text(p_deltas) ORDER BY key::int
+    ON CONFLICT (user_id) DO UPDATE SET unread = c.unread + EXCLUDED.unread
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION notification_counts_insert_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM notification_counts_apply((
+        SELECT jsonb_object_agg(user_id, unread) FROM (
+            SELECT user_id, COUNT(*) as unread FROM new_notifications
+            WHERE read_at IS NULL GROUP BY user_id
+        ) d
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notification_counts_update_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM notification_counts_apply((
+        SELECT jsonb_object_agg(user_id, delta) FROM (
+            SELECT n.user_id,
+                   SUM((n.read_at IS NULL)::int - (o.read_at IS NULL)::int) as delta
+            FROM new_notifications n
+            JOIN old_notifications o ON o.notification_id = n.notification_id
+            GROUP BY n.user_id
+        ) d
+        WHERE delta <> 0
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notification_counts_delete_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM notification_counts_apply((
+        SELECT jsonb_object_agg(user_id, -unread) FROM (
+            SELECT o.user_id, COUNT(*) as unread FROM old_notifications o
+            JOIN users u ON u.user_id = o.user_id
+            WHERE o.read_at IS NULL GROUP BY o.user_id
+        ) d
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Hold off activity writers until the trigger below exists and this
+-- migration commits, so no row lands between the backfill and the trigger.
+-- Writers queue behind the lock and are fanned out by the trigger afterwards.
+LOCK TABLE activity IN SHARE ROW EXCLUSIVE MODE;
+
+-- Backfill from existing activity; anything older than two hours was
+-- already shown as read by the previous computed feed
+INSERT INTO notifications (user_id, activity_id, title, message, type, read_at, created_at)
+SELECT n.user_id, n.activity_id, n.title, n.message, n.type,
+       CASE WHEN n.created_at <= LOCALTIMESTAMP - INTERVAL '2 hours' THEN n.created_at END,
+       COALESCE(n.created_at, CURRENT_TIMESTAMP)
+FROM activity_notifications(ARRAY(SELECT activity_id FROM activity)) n;
+
+-- Rebuild every user's unread count, returning the number of rows that had drifted
+CREATE OR REPLACE FUNCTION reconcile_notification_counts() RETURNS INT AS $$
+DECLARE
+    v_drifted INT;
+BEGIN
+    LOCK TABLE notification_counts IN EXCLUSIVE MODE;
+
+    WITH actual AS (
+        SELECT c.user_id, COALESCE(n.unread, 0) as unread
+        FROM (SELECT user_id FROM notification_counts
+              UNION SELECT user_id FROM notifications WHERE read_at IS NULL) c
+        LEFT JOIN (SELECT user_id, COUNT(*) as unread FROM notifications
+                   WHERE read_at IS NULL GROUP BY user_id) n ON n.user_id = c.user_id
+    )
+    INSERT INTO notification_counts AS nc (user_id, unread)
+    SELECT user_id, unread FROM actual
+    ON CONFLICT (user_id) DO UPDATE SET unread = EXCLUDED.unread
+    WHERE nc.unread IS DISTINCT FROM EXCLUDED.unread;
+
+    GET DIAGNOSTICS v_drifted = ROW_COUNT;
+    RETURN v_drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_notification_counts();
+
+DROP TRIGGER IF EXISTS trg_activity_notifications ON activity;
+CREATE TRIGGER trg_activity_notifications
+    AFTER INSERT ON activity
+    REFERENCING NEW TABLE AS new_activity
+    FOR EACH STATEMENT EXECUTE FUNCTION activity_notifications_trigger();
+
+DROP TRIGGER IF EXISTS trg_notification_counts_insert ON notifications;
+CREATE TRIGGER trg_notification_counts_insert
+    AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_notifications
+    FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_insert_trigger();
+
+DROP TRIGGER IF EXISTS trg_notification_counts_update ON notifications;
+CREATE TRIGGER trg_notification_counts_update
+    AFTER UPDATE ON notifications
+    REFERENCING OLD TABLE AS old_notifications NEW TABLE AS new_notifications
+    FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_update_trigger();
+
+DROP TRIGGER IF EXISTS trg_notification_counts_delete ON notifications;
+CREATE TRIGGER trg_notification_counts_delete
+    AFTER DELETE ON notifications
+    REFERENCING OLD TABLE AS old_notifications
+    FOR EACH STATEMENT EXECUTE FUNCTION notification_counts_delete_trigger();
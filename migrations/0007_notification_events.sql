@@ -0,0 +1,34 @@
+-- Publish every new inbox row on the 'notifications' channel so the API
+-- can push it to connected clients. Delivery happens at commit, once per
+-- row. NOTIFY payloads are limited to 8000 bytes and pg_notify raises past
+-- that, which would roll back the inserting transaction, so a row whose
+-- JSON does not fit (measured in bytes, not characters) is published as
+-- just its id and recipient and the stream fetches it.
+
+CREATE OR REPLACE FUNCTION notifications_publish_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('notifications', CASE
+        WHEN octet_length(p.payload) <= 7900 THEN p.payload
+        ELSE json_build_object('id', p.notification_id, 'user_id', p.user_id, 'fetch', true)::text
+    END)
+    FROM (
+        SELECT n.notification_id, n.user_id, json_build_object(
+            'id', n.notification_id,
+            'user_id', n.user_id,
+            'title', n.title,
+            'message', n.message,
+            'type', n.type,
+            'created_at', n.created_at
+        )::text as payload
+        FROM new_notifications n
+    ) p
+    ORDER BY p.notification_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notifications_publish ON notifications;
+CREATE TRIGGER trg_notifications_publish
+    AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_notifications
+    FOR EACH STATEMENT EXECUTE FUNCTION notifications_publish_trigger();
@@ -0,0 +1,5 @@
+-- Operators get the 'admin' role so require_admin endpoints (the slow query
+-- log) can be reached. Grant it with:
+--   UPDATE users SET role = 'admin' WHERE email = '...';
+
+ALTER TYPE user_role ADD VALUE IF NOT EXISTS 'admin';
@@ -0,0 +1,34 @@
+-- events.current_registrations counts the seats held by pending and
+-- registered tickets: book_ticket reserves a seat at 'pending' and rejecting
+-- a pending or registered ticket releases it. Databases seeded before this
+-- counted registered tickets only, so pending seats were never counted and
+-- rejecting one could undercount, or drive the column negative.
+-- reconcile_event_registrations() recomputes the column from tickets and is
+-- run with the other reconcilers to correct any drift.
+
+CREATE OR REPLACE FUNCTION reconcile_event_registrations() RETURNS INT AS $$
+DECLARE
+    v_drifted INT;
+BEGIN
+    -- Hold off bookings and status changes while counting
+    LOCK TABLE tickets IN SHARE MODE;
+
+    WITH actual AS (
+        SELECT e.event_id, COUNT(t.ticket_id) as registrations
+        FROM events e
+        LEFT JOIN tickets t ON t.event_id = e.event_id AND t.status IN ('pending', 'registered')
+        GROUP BY e.event_id
+    )
+    UPDATE events e
+    SET current_registrations = actual.registrations,
+        -- An event that already oversold keeps its tickets; raise capacity to fit
+        max_capacity = GREATEST(e.max_capacity, actual.registrations)
+    FROM actual
+    WHERE e.event_id = actual.event_id AND e.current_registrations <> actual.registrations;
+
+    GET DIAGNOSTICS v_drifted = ROW_COUNT;
+    RETURN v_drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_event_registrations();
@@ -1,18 +1,27 @@
 import pytest
 import json
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
 import psycopg2
 
 # Import your Flask app from api.py
-from api import app, execute_query, generate_booking_reference
+from api import (app, execute_query, generate_booking_reference, ConnectionPool, PoolTimeout,
+                 user_cache, ActivityWriter, activity_writer, decode_cursor, logger, LOGGING_CONFIG,
+                 JsonFormatter, catalogue_cache, NotificationListener, PreparedStatement, USER_BY_ID_SQL,
+                 RequestCapture, Metrics, METRIC_DEFINITIONS, METRICS_CONFIG, SlowQueryLog)
+import queue
+import logging
 
 
 @pytest.fixture
 def client():
     """Create a test client for the Flask app"""
     app.config['TESTING'] = True
+    activity_writer.sync = True
+    user_cache.clear()
+    catalogue_cache.clear()
     with app.test_client() as client:
         yield client
 
@@ -186,6 +195,41 @@ class TestAuthentication:
             assert response.status_code == 200
             assert 'accessToken=;' in response.headers.get('Set-Cookie', '')
 
+    def test_user_resolved_once_per_request(self, client, mock_db, auth_headers, attendee_user):
+        """Test the auth decorator and handler share one user lookup"""
+        with patch('api.get_user_by_token', return_value=attendee_user) as get_user:
+            mock_db.return_value = {**attendee_user, 'phone': None, 'bio': None}
+
+            response = client.get('/api/profile', headers=auth_headers)
+
+            assert response.status_code == 200
+            assert get_user.call_count == 1
+
+    def test_user_cache_skips_database(self, client, mock_db, attendee_user):
+        """Test repeat requests with the same token are served from the user cache"""
+        mock_db.side_effect = [
+            attendee_user,  # Token lookup, first request only
+            {**attendee_user, 'phone': None, 'bio': None},
+            {**attendee_user, 'phone': None, 'bio': None}
+        ]
+
+        client.set_cookie('accessToken', '11')
+        client.get('/api/profile')
+        response = client.get('/api/profile')
+
+        assert response.status_code == 200
+        assert mock_db.call_count == 3
+
+    def test_logout_invalidates_cached_user(self, client, mock_db, attendee_user):
+        """Test logging out drops the cached user for that token"""
+        user_cache.set('11', attendee_user)
+        client.set_cookie('accessToken', '11')
+
+        response = client.post('/api/auth/logout')
+
+        assert response.status_code == 200
+        assert user_cache.get('11') is None
+
 
 # ==================== BUSINESS DASHBOARD TESTS ====================
 
@@ -218,6 +262,22 @@ class TestBusinessDashboard:
             assert len(response.json['events']) == 1
             assert response.json['events'][0]['title'] == 'Tech Conference'
             
+    def test_get_event_report(self, client, mock_db, auth_headers, organizer_user, sample_event):
+        """Test event report reads ticket stats from the rollup row"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.side_effect = [
+                sample_event,  # Ownership check
+                [{'ticket_type': 'general', 'count': 30, 'revenue': Decimal('2670.00')},
+                 {'ticket_type': 'vip', 'count': 15, 'revenue': Decimal('2985.00')}]
+            ]
+            
+            response = client.get('/api/events/1/report', headers=auth_headers)
+            
+            assert response.status_code == 200
+            assert len(response.json['ticket_stats']) == 2
+            assert response.json['ticket_stats'][0]['count'] == 30
+            assert 'event_rollups' in mock_db.call_args_list[1][0][0]
+            
     def test_get_events_as_attendee_forbidden(self, client, mock_db, auth_headers, attendee_user):
         """Test attendee cannot access organizer events endpoint"""
         with patch('api.get_user_by_token', return_value=attendee_user):
@@ -259,7 +319,7 @@ class TestBusinessDashboard:
             mock_db.side_effect = [
                 sample_event,  # Event exists check
                 1,  # Update result
-                None  # Any additional queries
+                1  # Activity log
             ]
             
             data = {
@@ -280,24 +340,22 @@ class TestBusinessDashboard:
     def test_delete_event(self, client, mock_db, auth_headers, organizer_user):
         """Test deleting/cancelling an event"""
         with patch('api.get_user_by_token', return_value=organizer_user):
-            # Use return_value for queries that might be called multiple times
-            mock_db.side_effect = [
-                {'title': 'Tech Conference', 'event_id': 1},  # Event check
-                1,  # Update tickets to refunded
-                {'count': 5},  # Count of refunded tickets
-                1,  # Update event status to cancelled
-                [{'user_id': 11}, {'user_id': 12}]  # Refunded users for activity log
-            ]
+            mock_db.return_value = {'title': 'Tech Conference', 'tickets_refunded': 5}
             
             response = client.delete('/api/events/1', headers=auth_headers)
             
-            # Check for successful response or handle error gracefully
-            if response.status_code == 500:
-                # If error, check that it's handled properly
-                assert 'error' in response.json or 'message' in response.json
-            else:
-                assert response.status_code == 200
-                assert 'tickets_refunded' in response.json
+            assert response.status_code == 200
+            assert response.json['tickets_refunded'] == 5
+            assert mock_db.call_count == 1
+            
+    def test_delete_event_not_owner(self, client, mock_db, auth_headers, organizer_user):
+        """Test cancelling an event the organizer does not own"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = None
+            
+            response = client.delete('/api/events/99', headers=auth_headers)
+            
+            assert response.status_code == 404
             
     def test_get_registrations(self, client, mock_db, auth_headers, organizer_user):
         """Test getting registrations for organizer"""
@@ -320,6 +378,17 @@ class TestBusinessDashboard:
             assert response.status_code == 200
             assert 'registrations' in response.json
             assert len(response.json['registrations']) == 1
+            assert response.json['next_cursor'] is None
+            
+    def test_get_registrations_database_error(self, client, mock_db, auth_headers, organizer_user):
+        """Test a failed registrations query returns a JSON error"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = None
+            
+            response = client.get('/api/registrations', headers=auth_headers)
+            
+            assert response.status_code == 500
+            assert response.json['message'] == 'Failed to load registrations'
             
     def test_accept_registration(self, client, mock_db, auth_headers, organizer_user):
         """Test accepting a registration"""
@@ -327,38 +396,174 @@ class TestBusinessDashboard:
             # Provide enough mock values for all database queries
             mock_db.side_effect = [
                 {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference', 'status': 'pending'},  # Ticket info
-                1,  # Update result
-                None,  # Any additional queries
-                None
+                [{'event_id': 1}],  # Update result
+                1,  # Activity log
+                1
             ]
             
             response = client.put('/api/registrations/1/accept', headers=auth_headers)
             
             assert response.status_code == 200
             assert 'accepted' in response.json['message']
+            assert "status = 'pending'" in mock_db.call_args_list[1][0][0]
             
-    def test_send_event_reminder(self, client, mock_db, auth_headers, organizer_user):
-        """Test sending reminder to attendees"""
+    def test_accept_registration_changed_concurrently(self, client, mock_db, auth_headers, organizer_user):
+        """Test an accept that loses a race with another request changes nothing"""
         with patch('api.get_user_by_token', return_value=organizer_user):
             mock_db.side_effect = [
-                {'title': 'Tech Conference'},  # Event check
-                [{'user_id': 11, 'ticket_id': 1}, {'user_id': 12, 'ticket_id': 2}],  # Attendees
-                None, None, None  # Activity logs
+                {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference', 'status': 'pending'},
+                []  # Already rejected by the time the update ran
             ]
             
+            response = client.put('/api/registrations/1/accept', headers=auth_headers)
+            
+            assert response.status_code == 409
+            assert mock_db.call_count == 2
+            
+    def test_reject_registration_releases_seat_atomically(self, client, mock_db, auth_headers, organizer_user):
+        """Test the rejection and seat release run as one guarded statement"""
+        with patch('api.get_user_by_token', return_value=organizer_user), \
+                patch('api.invalidate_catalogue') as invalidate_catalogue:
+            mock_db.side_effect = [
+                {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference', 'status': 'pending'},
+                [{'event_id': 1, 'released': True}],
+                1  # Activity log
+            ]
+            
+            response = client.put('/api/registrations/1/reject', headers=auth_headers)
+            
+            assert response.status_code == 200
+            sql, params = mock_db.call_args_list[1][0]
+            assert 'FOR UPDATE' in sql and 'current_registrations - 1' in sql
+            assert params == (1, ['pending', 'registered', 'refunded'], ['pending', 'registered'])
+            invalidate_catalogue.assert_called_once()
+            
+    def test_reject_registration_failure_reported(self, client, mock_db, auth_headers, organizer_user):
+        """Test a failed rejection returns 500 and a lost race returns 409"""
+        ticket = {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference', 'status': 'pending'}
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.side_effect = [ticket, None]
+            assert client.put('/api/registrations/1/reject', headers=auth_headers).status_code == 500
+            
+            mock_db.side_effect = [ticket, []]
+            assert client.put('/api/registrations/1/reject', headers=auth_headers).status_code == 409
+            
+    def test_reject_registration_already_rejected(self, client, mock_db, auth_headers, organizer_user):
+        """Test rejecting a rejected ticket is refused without touching capacity"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference',
+                                    'status': 'rejected'}
+            
+            response = client.put('/api/registrations/1/reject', headers=auth_headers)
+            
+            assert response.status_code == 400
+            assert mock_db.call_count == 1
+            
+    def test_bulk_accept_registrations(self, client, mock_db, auth_headers, organizer_user):
+        """Test bulk accept reports a result for every requested id"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = [
+                {'ticket_id': 1, 'previous_status': 'pending', 'changed': True, 'events_released': 0,
+                 'has_more': False},
+                {'ticket_id': 2, 'previous_status': 'registered', 'changed': False, 'events_released': 0,
+                 'has_more': False},
+                {'ticket_id': 4, 'previous_status': 'rejected', 'changed': False, 'events_released': 0,
+                 'has_more': False}
+            ]
+            
+            response = client.put('/api/registrations/bulk', headers=auth_headers,
+                                  json={'action': 'accept', 'ids': [1, 2, 3, 4]})
+            
+            assert response.status_code == 200
+            assert response.json['results'] == [
+                {'id': 1, 'result': 'accepted'},
+                {'id': 2, 'result': 'unchanged'},
+                {'id': 4, 'result': 'skipped'},  # Accepting would take a seat it never held
+                {'id': 3, 'result': 'not_found'}
+            ]
+            assert response.json['summary'] == {'accepted': 1, 'unchanged': 1, 'skipped': 1, 'not_found': 1}
+            assert response.json['has_more'] is False
+            assert mock_db.call_count == 1
+            assert ['pending'] in mock_db.call_args[0][1]  # Only pending tickets move
+            
+    def test_bulk_reject_pending_for_event(self, client, mock_db, auth_headers, organizer_user):
+        """Test bulk reject selects an event's pending registrations"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = [{'ticket_id': 5, 'previous_status': 'pending', 'changed': True,
+                                     'events_released': 1, 'has_more': True}]
+            
+            response = client.put('/api/registrations/bulk', headers=auth_headers,
+                                  json={'action': 'reject', 'event_id': 1})
+            
+            assert response.status_code == 200
+            assert response.json['summary']['rejected'] == 1
+            assert response.json['has_more'] is True
+            sql, params = mock_db.call_args[0]
+            assert params[:3] == [organizer_user['user_id'], 1, 'pending']
+            assert ['pending', 'registered'] in params  # Pending rejections release their seat too
+            assert params[-3:] == [organizer_user['user_id'], 1, 'pending']
+            
+    def test_bulk_accept_only_from_pending(self, client, mock_db, auth_headers, organizer_user):
+        """Test an event-wide accept cannot re-register rejected or refunded tickets"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            response = client.put('/api/registrations/bulk', headers=auth_headers,
+                                  json={'action': 'accept', 'event_id': 1, 'status': 'rejected'})
+            
+            assert response.status_code == 400
+            mock_db.assert_not_called()
+            
+    def test_accept_registration_requires_pending(self, client, mock_db, auth_headers, organizer_user):
+        """Test accepting a rejected ticket is refused instead of overselling"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = {'ticket_id': 1, 'event_id': 1, 'event_title': 'Tech Conference',
+                                    'status': 'rejected'}
+            
+            response = client.put('/api/registrations/1/accept', headers=auth_headers)
+            
+            assert response.status_code == 400
+            assert mock_db.call_count == 1
+            
+    def test_bulk_registrations_invalid_request(self, client, mock_db, auth_headers, organizer_user):
+        """Test bulk updates need a valid action and a selection"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            assert client.put('/api/registrations/bulk', headers=auth_headers,
+                              json={'action': 'approve', 'ids': [1]}).status_code == 400
+            assert client.put('/api/registrations/bulk', headers=auth_headers,
+                              json={'action': 'accept'}).status_code == 400
+            assert client.put('/api/registrations/bulk', headers=auth_headers,
+                              json={'action': 'accept', 'ids': []}).status_code == 400
+            mock_db.assert_not_called()
+            
+    def test_send_event_reminder(self, client, mock_db, auth_headers, organizer_user):
+        """Test sending reminder to attendees"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = {'title': 'Tech Conference', 'attendee_count': 2}
+            
             response = client.post('/api/events/1/reminder', headers=auth_headers)
             
             assert response.status_code == 200
             assert '2 attendees' in response.json['message']
+            assert mock_db.call_count == 1
+            
+    def test_send_event_reminder_not_owner(self, client, mock_db, auth_headers, organizer_user):
+        """Test reminder for an event the organizer does not own"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = None
+            
+            response = client.post('/api/events/99/reminder', headers=auth_headers)
+            
+            assert response.status_code == 404
             
     def test_get_dashboard_stats(self, client, mock_db, auth_headers, organizer_user):
         """Test getting dashboard statistics"""
         with patch('api.get_user_by_token', return_value=organizer_user):
-            mock_db.side_effect = [
-                {'count': 5},  # Total events
-                {'total_attendees': 150, 'total_revenue': Decimal('25000.00')},  # Attendees/revenue
-                {'count': 3}  # Active events
-            ]
+            mock_db.return_value = {
+                'total_events': 5,
+                'total_tickets': 180,
+                'total_attendees': 150,
+                'total_revenue': Decimal('25000.00'),
+                'active_events': 3
+            }
             
             response = client.get('/api/dashboard/stats', headers=auth_headers)
             
@@ -367,6 +572,9 @@ class TestBusinessDashboard:
             assert response.json['total_attendees'] == 150
             assert response.json['total_revenue'] == 25000.0
             assert response.json['active_events'] == 3
+            # One read of the maintained summary row
+            assert mock_db.call_count == 1
+            assert 'organizer_summary' in mock_db.call_args[0][0]
 
 
 # ==================== CUSTOMER ENDPOINT TESTS ====================
@@ -403,17 +611,189 @@ class TestCustomerEndpoints:
         assert response.status_code == 200
         # Check that filters were applied (mock_db was called with params)
         
+    def test_get_public_events_next_cursor(self, client, mock_db):
+        """Test a full page returns a cursor that resumes after the last event"""
+        start = datetime(2025, 7, 1, 9, 0)
+        mock_db.return_value = [{
+            'event_id': n,
+            'title': f'Event {n}',
+            'datetime': start + timedelta(days=n),
+            'organizer_first_name': 'Sarah',
+            'organizer_last_name': 'Johnson',
+            'organizer_organization': None
+        } for n in range(1, 4)]
+        
+        response = client.get('/api/customer-events?limit=2')
+        
+        assert response.status_code == 200
+        assert len(response.json) == 2
+        cursor = response.headers['X-Next-Cursor']
+        assert decode_cursor(cursor, 2) == [(start + timedelta(days=2)).isoformat(), 2]
+        assert mock_db.call_args[0][1][-1] == 3  # Fetches one lookahead row
+        
+        mock_db.return_value = []
+        response = client.get(f'/api/customer-events?limit=2&cursor={cursor}')
+        
+        sql, params = mock_db.call_args[0]
+        assert '(e.datetime, e.event_id) >' in sql
+        assert params[:2] == [(start + timedelta(days=2)).isoformat(), 2]
+        assert 'X-Next-Cursor' not in response.headers
+        
+    def test_get_public_events_invalid_cursor(self, client, mock_db):
+        """Test a malformed cursor is rejected"""
+        response = client.get('/api/customer-events?cursor=not-a-cursor')
+        
+        assert response.status_code == 400
+        assert 'Invalid cursor' in response.json['message']
+        mock_db.assert_not_called()
+        
+    def test_get_public_events_cached(self, client, mock_db):
+        """Test repeat catalogue requests are served from the cache"""
+        mock_db.return_value = [{
+            'event_id': 1,
+            'title': 'Tech Conference',
+            'datetime': datetime(2025, 7, 1, 9, 0),
+            'organizer_first_name': 'Sarah',
+            'organizer_last_name': 'Johnson',
+            'organizer_organization': 'TechConf Organizers'
+        }]
+        
+        first = client.get('/api/customer-events?category=conference')
+        second = client.get('/api/customer-events?category=conference')
+        
+        assert first.status_code == 200
+        assert second.get_data() == first.get_data()
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert mock_db.call_count == 1
+        
+        # A different filter is a different page
+        client.get('/api/customer-events?category=music')
+        assert mock_db.call_count == 2
+        
+    def test_get_public_events_not_modified(self, client, mock_db):
+        """Test a matching If-None-Match gets an empty 304"""
+        mock_db.return_value = []
+        etag = client.get('/api/customer-events').headers['ETag']
+        
+        response = client.get('/api/customer-events', headers={'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert response.get_data() == b''
+        assert response.headers['ETag'] == etag
+        
+    def test_create_event_invalidates_catalogue(self, client, mock_db, auth_headers, organizer_user):
+        """Test creating an event drops cached catalogue pages"""
+        mock_db.return_value = []
+        client.get('/api/customer-events')
+        assert len(catalogue_cache) == 1
+        
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = {'event_id': 2}
+            client.post('/api/events', headers=auth_headers, json={
+                'title': 'New Event',
+                'description': 'Event description',
+                'datetime': '2025-08-01T10:00:00',
+                'location': 'Melbourne',
+                'venueName': 'Arena',
+                'category': 'music',
+                'maxCapacity': 100,
+                'generalPrice': 50
+            })
+        
+        assert len(catalogue_cache) == 0
+        
+    @pytest.mark.parametrize('sold_out', [False, True])
+    def test_booking_invalidates_catalogue_only_when_sold_out(self, client, mock_db, auth_headers,
+                                                               attendee_user, sold_out):
+        """Test bookings keep cached pages until one takes the last seat"""
+        mock_db.return_value = []
+        client.get('/api/customer-events')
+        assert len(catalogue_cache) == 1
+        
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = {'title': 'Tech Conference', 'price': Decimal('89.00'), 'fully_booked': False,
+                                    'sold_out': sold_out, 'ticket_id': 1}
+            response = client.post('/api/tickets', headers=auth_headers, json={'event_id': 1})
+        
+        assert response.status_code == 201
+        assert len(catalogue_cache) == (0 if sold_out else 1)
+        
+    def test_search_public_events(self, client, mock_db):
+        """Test catalogue search returns ranked matches"""
+        mock_db.return_value = [{
+            'event_id': 3,
+            'title': 'AI Workshop',
+            'datetime': datetime(2025, 7, 1, 9, 0),
+            'organizer_first_name': 'Sarah',
+            'organizer_last_name': 'Johnson',
+            'organizer_organization': 'TechConf Organizers',
+            'rank': 1.5
+        }]
+        
+        response = client.get('/api/customer-events/search?q=workshop&category=education&limit=5')
+        
+        assert response.status_code == 200
+        assert response.json[0]['title'] == 'AI Workshop'
+        assert response.json[0]['organizer_name'] == 'TechConf Organizers'
+        sql, params = mock_db.call_args[0]
+        assert 'search_document @@' in sql
+        assert params == ['workshop', 'workshop', 'education', 5]
+        assert "search.text <% e.search_text" in sql % tuple(params)  # operator survives parameter binding
+        
+    def test_search_public_events_requires_query(self, client, mock_db):
+        """Test search without a query is rejected"""
+        response = client.get('/api/customer-events/search?q=%20')
+        
+        assert response.status_code == 400
+        mock_db.assert_not_called()
+        
+    def test_get_public_events_streamed(self, client, mock_db):
+        """Test streaming mode reads from a server-side cursor without a page limit"""
+        rows = [{
+            'event_id': n,
+            'title': f'Event {n}',
+            'datetime': datetime(2025, 7, n, 9, 0),
+            'organizer_first_name': 'Sarah',
+            'organizer_last_name': 'Johnson',
+            'organizer_organization': 'TechConf Organizers'
+        } for n in range(1, 4)]
+        
+        with patch('api.stream_query', return_value=iter(rows)) as stream_query:
+            response = client.get('/api/customer-events?stream=1')
+            body = json.loads(response.get_data(as_text=True))
+        
+        assert response.status_code == 200
+        assert [event['event_id'] for event in body] == [1, 2, 3]
+        assert body[0]['organizer_name'] == 'TechConf Organizers'
+        assert 'LIMIT' not in stream_query.call_args[0][0]
+        mock_db.assert_not_called()
+        
+    @pytest.mark.parametrize('count', [1, 3, 4, 5])
+    def test_streamed_json_with_chunk_boundaries(self, client, mock_db, auth_headers, attendee_user, count):
+        """Test the streamed array stays valid JSON when rows end on or between chunk boundaries"""
+        rows = [{'ticket_id': n} for n in range(count)]
+        with patch('api.get_user_by_token', return_value=attendee_user), \
+                patch('api.stream_query', return_value=iter(rows)), patch('api.STREAM_CHUNK_SIZE', 2):
+            response = client.get('/api/tickets?stream=true', headers=auth_headers)
+            
+            assert json.loads(response.get_data(as_text=True)) == rows
+        
+    def test_get_user_tickets_streamed_empty(self, client, mock_db, auth_headers, attendee_user):
+        """Test streaming an empty result produces an empty JSON array"""
+        with patch('api.get_user_by_token', return_value=attendee_user), \
+                patch('api.stream_query', return_value=iter([])):
+            response = client.get('/api/tickets?stream=true', headers=auth_headers)
+            
+            assert response.status_code == 200
+            assert response.json == []
+        
     def test_book_ticket(self, client, mock_db, auth_headers, attendee_user, sample_event):
         """Test booking a ticket"""
         with patch('api.get_user_by_token', return_value=attendee_user):
-            # Provide sufficient mock values for all queries
             mock_db.side_effect = [
-                sample_event,  # Event details
-                {'count': 0},  # No duplicate check
-                {'ticket_id': 1},  # New ticket creation
-                None,  # Update registration count
-                None,  # Activity log
-                None   # Any additional queries
+                {'title': sample_event['title'], 'price': sample_event['general_price'],
+                 'fully_booked': False, 'sold_out': False, 'ticket_id': 1},  # Booking
+                1  # Activity log
             ]
             
             data = {
@@ -434,10 +814,9 @@ class TestCustomerEndpoints:
     def test_book_ticket_duplicate(self, client, mock_db, auth_headers, attendee_user, sample_event):
         """Test booking duplicate ticket fails"""
         with patch('api.get_user_by_token', return_value=attendee_user):
-            mock_db.side_effect = [
-                sample_event,  # Event details
-                {'count': 1}  # Duplicate exists
-            ]
+            # Event has room but no ticket was inserted
+            mock_db.return_value = {'title': sample_event['title'], 'price': sample_event['general_price'],
+                                    'fully_booked': False, 'ticket_id': None}
             
             data = {'event_id': 1, 'ticket_type': 'general'}
             
@@ -454,9 +833,9 @@ class TestCustomerEndpoints:
         with patch('api.get_user_by_token', return_value=attendee_user):
             full_event = {
                 'title': 'Full Event',
-                'max_capacity': 100,
-                'current_registrations': 100,
-                'general_price': Decimal('50.00')
+                'price': Decimal('50.00'),
+                'fully_booked': True,
+                'ticket_id': None
             }
             mock_db.return_value = full_event
             
@@ -470,6 +849,21 @@ class TestCustomerEndpoints:
             assert response.status_code == 400
             assert 'fully booked' in response.json['message']
             
+    def test_book_ticket_event_not_found(self, client, mock_db, auth_headers, attendee_user):
+        """Test booking ticket for a missing or inactive event"""
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = None
+            
+            data = {'event_id': 999, 'ticket_type': 'general'}
+            
+            response = client.post('/api/tickets',
+                                 data=json.dumps(data),
+                                 content_type='application/json',
+                                 headers=auth_headers)
+            
+            assert response.status_code == 400
+            assert 'not available' in response.json['message']
+            
     def test_get_user_tickets(self, client, mock_db, auth_headers, attendee_user):
         """Test getting user's tickets"""
         with patch('api.get_user_by_token', return_value=attendee_user):
@@ -490,6 +884,16 @@ class TestCustomerEndpoints:
             assert len(response.json) == 1
             assert response.json[0]['event_title'] == 'Tech Conference'
             
+    def test_get_user_tickets_database_error(self, client, mock_db, auth_headers, attendee_user):
+        """Test a failed tickets query returns a JSON error"""
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = None
+            
+            response = client.get('/api/tickets', headers=auth_headers)
+            
+            assert response.status_code == 500
+            assert response.json['message'] == 'Failed to load tickets'
+            
     def test_get_user_stats(self, client, mock_db, auth_headers, attendee_user):
         """Test getting user statistics"""
         with patch('api.get_user_by_token', return_value=attendee_user):
@@ -506,6 +910,24 @@ class TestCustomerEndpoints:
             assert response.json['upcoming_events'] == 3
             assert response.json['total_spent'] == 450.0
 
+    def test_get_organizer_stats(self, client, mock_db, auth_headers, organizer_user):
+        """Test organizer statistics come from the summary row"""
+        with patch('api.get_user_by_token', return_value=organizer_user):
+            mock_db.return_value = {
+                'total_events': 4,
+                'total_tickets': 120,
+                'total_attendees': 90,
+                'total_revenue': Decimal('9800.50')
+            }
+            
+            response = client.get('/api/stats', headers=auth_headers)
+            
+            assert response.status_code == 200
+            assert response.json['total_events'] == 4
+            assert response.json['total_tickets_sold'] == 120
+            assert response.json['total_revenue'] == 9800.5
+            assert mock_db.call_count == 1
+
 
 # ==================== NOTIFICATION TESTS ====================
 
@@ -514,37 +936,188 @@ class TestNotifications:
     def test_get_notifications_organizer(self, client, mock_db, auth_headers, organizer_user):
         """Test getting notifications for organizer"""
         with patch('api.get_user_by_token', return_value=organizer_user):
-            mock_db.return_value = [{
-                'id': 1,
-                'title': 'New Registration',
-                'message': 'John Smith registered for Tech Conference',
-                'time': '5 minutes ago',
-                'type': 'registration',
-                'unread': True
-            }]
+            mock_db.side_effect = [
+                [{
+                    'id': 1,
+                    'title': 'New Registration',
+                    'message': 'John Smith registered for Tech Conference',
+                    'type': 'registration',
+                    'unread': True,
+                    'created_at': datetime(2025, 7, 1, 9, 0),
+                    'age_seconds': Decimal('300.5')
+                }],
+                {'unread': 4}  # Unread count
+            ]
             
             response = client.get('/api/notifications', headers=auth_headers)
             
             assert response.status_code == 200
             assert 'notifications' in response.json
             assert len(response.json['notifications']) == 1
+            assert response.json['notifications'][0]['time'] == '5 minutes ago'
+            assert response.json['unread_count'] == 4
+            assert 'FROM notifications' in mock_db.call_args_list[0][0][0]
             
     def test_get_notifications_attendee(self, client, mock_db, auth_headers, attendee_user):
         """Test getting notifications for attendee"""
         with patch('api.get_user_by_token', return_value=attendee_user):
-            mock_db.return_value = [{
-                'id': 1,
-                'title': 'Ticket Booked',
-                'message': 'Successfully booked ticket for Tech Conference',
-                'time': '10 minutes ago',
-                'type': 'booking',
-                'unread': True
-            }]
+            mock_db.side_effect = [
+                [{
+                    'id': 1,
+                    'title': 'Ticket Booked',
+                    'message': 'Successfully booked ticket for Tech Conference',
+                    'type': 'booking',
+                    'unread': True,
+                    'created_at': datetime(2025, 7, 1, 9, 0),
+                    'age_seconds': Decimal('7200')
+                }],
+                None  # No unread counter yet
+            ]
             
-            response = client.get('/api/notifications', headers=auth_headers)
+            response = client.get('/api/notifications?unread=1', headers=auth_headers)
             
             assert response.status_code == 200
             assert 'notifications' in response.json
+            assert response.json['notifications'][0]['time'] == '2 hours ago'
+            assert response.json['unread_count'] == 0
+            assert 'read_at IS NULL' in mock_db.call_args_list[0][0][0]
+            
+    def test_get_notifications_requires_auth(self, client, mock_db):
+        """Test notifications require a signed-in user"""
+        response = client.get('/api/notifications')
+        
+        assert response.status_code == 401
+        mock_db.assert_not_called()
+        
+    def test_mark_notification_read(self, client, mock_db, auth_headers, attendee_user):
+        """Test marking one of the user's notifications as read"""
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = {'notification_id': 7}
+            
+            response = client.put('/api/notifications/7/read', headers=auth_headers)
+            
+            assert response.status_code == 200
+            assert mock_db.call_args[0][1] == (7, attendee_user['user_id'])
+            
+    def test_mark_notification_read_not_found(self, client, mock_db, auth_headers, attendee_user):
+        """Test marking someone else's notification returns 404"""
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = None
+            
+            response = client.put('/api/notifications/7/read', headers=auth_headers)
+            
+            assert response.status_code == 404
+            
+    def test_mark_notifications_read_bulk(self, client, mock_db, auth_headers, attendee_user):
+        """Test bulk mark-read of selected notifications"""
+        with patch('api.get_user_by_token', return_value=attendee_user):
+            mock_db.return_value = {'updated': 2}
+            
+            response = client.put('/api/notifications/read', headers=auth_headers, json={'ids': [1, 2, 3]})
+            
+            assert response.status_code == 200
+            assert response.json['updated'] == 2
+            assert mock_db.call_args[0][1] == [attendee_user['user_id'], [1, 2, 3]]
+            
+            response = client.put('/api/notifications/read', headers=auth_headers, json={'ids': 'all'})
+            assert response.status_code == 400
+
+
+class TestNotificationStream:
+    
+    @pytest.fixture
+    def listener(self):
+        """Listener whose background LISTEN thread never connects"""
+        with patch.object(NotificationListener, '_run'):
+            yield NotificationListener({}, queue_size=2)
+    
+    def test_dispatch_routes_to_recipient(self, listener):
+        """Test payloads reach only the recipient's streams"""
+        mine = listener.subscribe(11)
+        other = listener.subscribe(12)
+        
+        listener.dispatch(json.dumps({'id': 5, 'user_id': 11, 'title': 'Ticket Booked'}))
+        
+        assert mine.get_nowait()['id'] == 5
+        assert other.empty()
+        
+    def test_slow_subscriber_gets_resync(self, listener):
+        """Test a full queue is replaced by a resync marker"""
+        subscription = listener.subscribe(11)
+        for n in range(3):
+            listener.dispatch(json.dumps({'id': n, 'user_id': 11}))
+        
+        assert subscription.get_nowait() is NotificationListener.RESYNC
+        assert subscription.empty()
+        
+    def test_unsubscribe(self, listener):
+        """Test closed streams stop receiving notifications"""
+        subscription = listener.subscribe(11)
+        listener.unsubscribe(11, subscription)
+        
+        listener.dispatch(json.dumps({'id': 1, 'user_id': 11}))
+        
+        assert subscription.empty()
+        assert listener.subscriber_count() == 0
+        
+    def test_stream_notifications(self, client, mock_db, auth_headers, attendee_user):
+        """Test the stream replays missed notifications then pushes live ones"""
+        subscription = queue.Queue()
+        subscription.put({'id': 8, 'user_id': 11, 'title': 'Ticket Booked'})
+        subscription.put({'id': 9, 'user_id': 11, 'title': 'Event Reminder'})
+        listener = MagicMock()
+        listener.subscribe.return_value = subscription
+        mock_db.return_value = [{'id': 8, 'title': 'Ticket Booked', 'message': 'Booked',
+                                 'type': 'booking', 'created_at': datetime(2025, 7, 1, 9, 0)}]
+        
+        with patch('api.get_user_by_token', return_value=attendee_user), \
+             patch('api.notification_listener', listener), \
+             patch.dict('api.NOTIFICATION_STREAM_CONFIG', {'heartbeat': 0.01}):
+            response = client.get('/api/notifications/stream',
+                                  headers=dict(auth_headers, **{'Last-Event-ID': '7'}))
+            chunks = iter(response.response)
+            messages = [next(chunks) for _ in range(4)]
+            response.close()
+        
+        assert response.mimetype == 'text/event-stream'
+        assert messages[0].startswith(b'retry:')
+        assert messages[1].startswith(b'id: 8\nevent: notification')
+        # The live copy of 8 was already replayed, so 9 is next
+        assert messages[2].startswith(b'id: 9\nevent: notification')
+        assert messages[3] == b': heartbeat\n\n'
+        assert mock_db.call_args[0][1][:2] == (11, 7)
+        listener.unsubscribe.assert_called_once_with(11, subscription)
+        
+    def test_unread_stream_does_not_leak_subscription(self, attendee_user):
+        """Test a stream response that is never iterated leaves no subscription behind"""
+        listener = MagicMock()
+        
+        with app.test_request_context('/api/notifications/stream'), \
+             patch('api.get_current_user', return_value=attendee_user), \
+             patch('api.notification_listener', listener):
+            app.view_functions['stream_notifications'].__wrapped__()  # Response discarded unread
+        
+        assert listener.subscribe.call_count == listener.unsubscribe.call_count
+        
+    def test_stream_fetches_oversized_notifications(self, client, mock_db, auth_headers, attendee_user):
+        """Test a notification published by id only is read from the inbox before pushing"""
+        subscription = queue.Queue()
+        subscription.put({'id': 9, 'user_id': 11, 'fetch': True})
+        listener = MagicMock()
+        listener.subscribe.return_value = subscription
+        mock_db.return_value = {'id': 9, 'title': 'Event Reminder', 'message': 'é' * 5000, 'type': 'reminder',
+                                'created_at': datetime(2025, 7, 1, 9, 0)}
+        
+        with patch('api.get_user_by_token', return_value=attendee_user), \
+             patch('api.notification_listener', listener):
+            response = client.get('/api/notifications/stream', headers=auth_headers)
+            chunks = iter(response.response)
+            messages = [next(chunks) for _ in range(2)]
+            response.close()
+        
+        assert messages[1].startswith(b'id: 9\nevent: notification')
+        assert json.loads(messages[1].decode().split('data: ', 1)[1])['message'] == 'é' * 5000
+        assert mock_db.call_args[0][1] == (9, 11)
 
 
 # ==================== HELPER FUNCTION TESTS ====================
@@ -593,6 +1166,514 @@ class TestHelperFunctions:
         assert converted['first_name'] == 'John'
 
 
+# ==================== CONNECTION POOL TESTS ====================
+
+class TestConnectionPool:
+
+    def make_connection(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        return conn
+
+    def test_connections_are_reused(self):
+        """Test a returned connection is handed out again instead of reconnecting"""
+        with patch('api.psycopg2.connect', side_effect=lambda **kw: self.make_connection()) as connect:
+            pool = ConnectionPool({}, min_size=0, max_size=2)
+            with pool.connection() as first:
+                pass
+            with pool.connection() as second:
+                pass
+
+            assert first is second
+            assert connect.call_count == 1
+            assert pool.stats()['checkouts'] == 2
+            assert pool.stats()['in_use'] == 0
+
+    def test_checkout_timeout_when_exhausted(self):
+        """Test checkout fails after the timeout when every connection is busy"""
+        with patch('api.psycopg2.connect', side_effect=lambda **kw: self.make_connection()):
+            pool = ConnectionPool({}, min_size=0, max_size=1, checkout_timeout=0.01)
+            conn = pool.getconn()
+
+            with pytest.raises(PoolTimeout):
+                pool.getconn()
+
+            pool.putconn(conn)
+            assert pool.stats()['timeouts'] == 1
+
+    def test_expired_connection_is_replaced(self):
+        """Test connections older than max_lifetime are closed on checkout"""
+        with patch('api.psycopg2.connect', side_effect=lambda **kw: self.make_connection()):
+            pool = ConnectionPool({}, min_size=0, max_size=2, max_lifetime=0.001)
+            old = pool.getconn()
+            pool.putconn(old)
+            time.sleep(0.01)
+            new = pool.getconn()
+
+            assert new is not old
+            old.close.assert_called_once()
+            assert pool.stats()['discarded'] == 1
+
+    def test_broken_connection_is_discarded(self):
+        """Test a connection that raised an OperationalError is not reused"""
+        with patch('api.psycopg2.connect', side_effect=lambda **kw: self.make_connection()):
+            pool = ConnectionPool({}, min_size=0, max_size=2)
+            with pytest.raises(psycopg2.OperationalError):
+                with pool.connection():
+                    raise psycopg2.OperationalError("server closed the connection")
+
+            assert pool.stats()['size'] == 0
+
+    def test_discarded_connection_forgets_prepared_statements(self):
+        """Test a recycled connection starts with no prepared statements"""
+        with patch('api.psycopg2.connect', side_effect=lambda **kw: self.make_connection()):
+            pool = ConnectionPool({}, min_size=0, max_size=2)
+            with pytest.raises(psycopg2.OperationalError):
+                with pool.connection() as conn:
+                    pool.prepared_statements(conn).add('user_by_id')
+                    assert pool.stats()['prepared_statements'] == 1
+                    raise psycopg2.OperationalError("server closed the connection")
+
+            assert pool.stats()['prepared_statements'] == 0
+
+    def test_pool_stats_endpoint(self, client):
+        """Test pool statistics are exposed for monitoring"""
+        with patch('api.get_pool') as get_pool:
+            get_pool.return_value.stats.return_value = {'in_use': 1, 'waiting': 0}
+
+            response = client.get('/api/pool/stats')
+
+            assert response.status_code == 200
+            assert response.json['in_use'] == 1
+
+
+# ==================== PREPARED STATEMENT TESTS ====================
+
+class TestPreparedStatements:
+
+    @pytest.fixture
+    def pool(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with patch('api.psycopg2.connect', return_value=conn):
+            pool = ConnectionPool({}, min_size=0, max_size=1)
+            with patch('api.get_pool', return_value=pool):
+                yield pool, conn.cursor.return_value.__enter__.return_value
+
+    def test_statement_text(self):
+        """Test registered SQL is rewritten with positional parameters"""
+        statement = PreparedStatement('lookup', "SELECT * FROM events WHERE title LIKE '%%a' AND event_id = %s LIMIT %s")
+
+        assert statement.prepare_sql == "PREPARE lookup AS SELECT * FROM events WHERE title LIKE '%a' AND event_id = $1 LIMIT $2"
+        assert statement.execute_sql == "EXECUTE lookup (%s, %s)"
+        assert 'FROM events' in statement
+
+    def test_prepared_once_per_connection(self, pool):
+        """Test a statement is prepared on first use and then executed by name"""
+        pool, cursor = pool
+
+        execute_query(USER_BY_ID_SQL, (1,), fetch_one=True)
+        execute_query(USER_BY_ID_SQL, (2,), fetch_one=True)
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert executed == [USER_BY_ID_SQL.prepare_sql, USER_BY_ID_SQL.execute_sql, USER_BY_ID_SQL.execute_sql]
+        assert pool.stats()['prepared_statements'] == 1
+
+    def test_reprepared_when_session_lost_statement(self, pool):
+        """Test a statement the server no longer knows is prepared again"""
+        pool, cursor = pool
+        with pool.connection() as conn:
+            pool.prepared_statements(conn).add(USER_BY_ID_SQL.name)
+        cursor.execute.side_effect = [psycopg2.errors.InvalidSqlStatementName(), None, None, None]
+
+        execute_query(USER_BY_ID_SQL, (1,), fetch_one=True)
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert executed == [USER_BY_ID_SQL.execute_sql, "DEALLOCATE ALL",
+                            USER_BY_ID_SQL.prepare_sql, USER_BY_ID_SQL.execute_sql]
+
+    def test_plain_sql_is_not_prepared(self, pool):
+        """Test unregistered SQL is sent as text"""
+        pool, cursor = pool
+
+        execute_query("SELECT 1", fetch_one=True)
+
+        cursor.execute.assert_called_once_with("SELECT 1", ())
+        assert pool.stats()['prepared_statements'] == 0
+
+
+# ==================== ACTIVITY WRITER TESTS ====================
+
+class TestActivityWriter:
+
+    def record(self, n):
+        return (n, None, None, 'user_login', f'User {n} logged in')
+
+    def test_records_are_batched(self, mock_db):
+        """Test queued activity is written with one multi-row insert"""
+        mock_db.return_value = 3
+        writer = ActivityWriter(batch_size=10, flush_interval=0.05)
+
+        for n in range(3):
+            writer.submit(self.record(n))
+        writer.close()
+
+        assert mock_db.call_count == 1
+        sql, params = mock_db.call_args[0]
+        assert sql.count('(%s, %s, %s, %s, %s)') == 3
+        assert len(params) == 15
+
+    def test_sync_mode_writes_immediately(self, mock_db):
+        """Test sync mode inserts before submit returns"""
+        mock_db.return_value = 1
+        writer = ActivityWriter(sync=True)
+
+        writer.submit(self.record(1))
+
+        assert mock_db.call_count == 1
+
+    def test_full_queue_writes_inline(self, mock_db):
+        """Test back-pressure falls back to an inline write instead of dropping"""
+        mock_db.return_value = 1
+        writer = ActivityWriter(queue_size=1, put_timeout=0.01)
+        writer._ensure_started = lambda: None  # No consumer, so the queue stays full
+
+        writer.submit(self.record(1))
+        writer.submit(self.record(2))
+
+        assert mock_db.call_count == 1
+        assert mock_db.call_args[0][1][0] == 2
+
+        writer.close()
+        assert mock_db.call_count == 2
+        assert mock_db.call_args[0][1][0] == 1
+
+    def test_failed_batch_is_retried(self, mock_db):
+        """Test a transient failure is retried instead of dropping the batch"""
+        mock_db.side_effect = [None, 2]
+        writer = ActivityWriter(sync=True, retry_backoff=0)
+
+        with patch('api.logger') as mock_logger:
+            writer.write([self.record(1), self.record(2)])
+
+        assert mock_db.call_count == 2
+        mock_logger.warning.assert_not_called()
+        mock_logger.error.assert_not_called()
+
+    def test_bad_row_does_not_drop_its_batch(self, mock_db):
+        """Test a batch that keeps failing is split so only the rejected row is lost"""
+        mock_db.side_effect = lambda sql, params: None if 2 in params[::5] else 1
+        writer = ActivityWriter(sync=True, retry_attempts=2, retry_backoff=0)
+
+        with patch('api.logger') as mock_logger:
+            writer.write([self.record(1), self.record(2), self.record(3)])
+
+        inserted = [call[0][1][0] for call in mock_db.call_args_list if len(call[0][1]) == 5]
+        assert inserted == [1, 2, 3]
+        assert mock_db.call_count == 5  # Two batch attempts, then one insert per row
+        mock_logger.error.assert_called_once()
+        assert mock_logger.error.call_args[1]['extra']['fields']['user_id'] == 2
+
+
+# ==================== REQUEST LOGGING TESTS ====================
+
+class TestRequestLogging:
+
+    def test_request_logged_as_one_line(self, client, mock_db):
+        """Test each request produces a single structured log call"""
+        mock_db.return_value = {'count': 1}
+        
+        with patch.object(logger, 'log') as log:
+            response = client.get('/api/validate?email=john@email.com')
+        
+        assert response.status_code == 200
+        assert log.call_count == 1
+        fields = log.call_args[1]['extra']['fields']
+        assert fields['endpoint'] == 'validate_email'
+        assert fields['status'] == 200
+        assert 'body' not in fields
+        
+    def test_sampled_out_endpoint_not_logged(self, client, mock_db):
+        """Test a zero sample rate suppresses logging for that endpoint"""
+        with patch.dict(LOGGING_CONFIG['sample_rates'], {'validate_email': 0}), \
+                patch.object(logger, 'log') as log:
+            response = client.get('/api/validate')
+        
+        assert response.status_code == 400
+        log.assert_not_called()
+        
+    def test_debug_body_redacted_and_truncated(self, client, mock_db):
+        """Test debug logging masks passwords and truncates large bodies"""
+        mock_db.return_value = None
+        data = {'email': 'john@email.com', 'password': 'secret', 'note': 'x' * 100}
+        
+        with patch.dict(LOGGING_CONFIG, {'body_max_bytes': 60}), \
+                patch.object(logger, 'isEnabledFor', return_value=True), \
+                patch.object(logger, 'log') as log:
+            client.post('/api/login', data=json.dumps(data), content_type='application/json')
+        
+        body = log.call_args[1]['extra']['fields']['body']
+        assert 'secret' not in body
+        assert len(body) == 63
+        assert body.endswith('...')
+        
+    def test_json_formatter(self):
+        """Test log records are rendered as single-line JSON"""
+        record = logging.LogRecord('api', logging.INFO, __file__, 1, 'GET /api/stats 200', None, None)
+        record.fields = {'status': 200}
+        
+        line = JsonFormatter().format(record)
+        
+        assert '\n' not in line
+        assert json.loads(line)['status'] == 200
+
+
+# ==================== METRICS TESTS ====================
+
+class TestMetrics:
+
+    @pytest.fixture
+    def cursor(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with patch('api.psycopg2.connect', return_value=conn):
+            pool = ConnectionPool({}, min_size=0, max_size=1)
+            with patch('api.get_pool', return_value=pool):
+                yield conn.cursor.return_value.__enter__.return_value
+
+    def test_query_count_header(self, client, cursor):
+        """Test each response reports how many queries it ran"""
+        cursor.fetchone.return_value = {'count': 1}
+
+        response = client.get('/api/validate?email=john@email.com')
+
+        assert response.headers['X-DB-Query-Count'] == '1'
+        assert client.get('/api/validate').headers['X-DB-Query-Count'] == '0'
+
+    def test_request_metrics_exported(self, client, cursor):
+        """Test per-endpoint histograms and pool figures are served on /metrics"""
+        cursor.fetchone.return_value = {'count': 1}
+        client.get('/api/validate?email=john@email.com')
+
+        response = client.get('/metrics')
+        body = response.data.decode()
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert 'http_requests_total{endpoint="validate_email",method="GET",status="200"}' in body
+        assert 'db_queries_per_request_bucket{endpoint="validate_email",le="1"}' in body
+        assert '# TYPE db_pool_checkouts_total counter' in body
+        assert 'db_pool_size 1' in body
+
+    def test_streamed_query_counted(self, client, cursor, attendee_user):
+        """Test a streamed export reports its query in the header, /metrics and the slow query log"""
+        rows = [{'ticket_id': n} for n in range(3)]
+        cursor.fetchmany.side_effect = [rows[:2], rows[2:], []]
+        metrics = Metrics(METRIC_DEFINITIONS)
+        slow_query_log = SlowQueryLog(threshold_ms=0.000001)
+        with patch('api.get_user_by_token', return_value=attendee_user), patch('api.metrics', metrics), \
+                patch('api.slow_query_log', slow_query_log), patch('api.STREAM_CHUNK_SIZE', 2):
+            response = client.get('/api/tickets?stream=true', headers={'Cookie': 'accessToken=11'})
+            
+            assert response.headers['X-DB-Query-Count'] == '1'
+            assert response.json == rows
+        
+        assert 'db_queries_per_request_sum{endpoint="get_user_tickets"} 1' in metrics.render()
+        [entry] = slow_query_log.entries()
+        assert entry['endpoint'] == 'get_user_tickets'
+        assert 'FROM tickets t' in entry['sql']
+        assert cursor.fetchmany.call_count == 3
+    
+    def test_metrics_disabled(self, client):
+        """Test the endpoint is hidden when metrics are off"""
+        with patch.dict(METRICS_CONFIG, {'enabled': False}):
+            assert client.get('/metrics').status_code == 404
+
+    def test_histogram_rendering(self):
+        """Test histogram buckets are cumulative and labels are escaped"""
+        metrics = Metrics(METRIC_DEFINITIONS)
+        for value in (0, 2, 2, 100):
+            metrics.observe('db_queries_per_request', {'endpoint': 'a"b'}, value)
+
+        lines = metrics.render().splitlines()
+
+        assert 'db_queries_per_request_bucket{endpoint="a\\"b",le="0"} 1' in lines
+        assert 'db_queries_per_request_bucket{endpoint="a\\"b",le="2"} 3' in lines
+        assert 'db_queries_per_request_bucket{endpoint="a\\"b",le="50"} 3' in lines
+        assert 'db_queries_per_request_bucket{endpoint="a\\"b",le="+Inf"} 4' in lines
+        assert 'db_queries_per_request_sum{endpoint="a\\"b"} 104.0' in lines
+
+
+# ==================== SLOW QUERY LOG TESTS ====================
+
+class TestSlowQueryLog:
+
+    @pytest.fixture
+    def conn(self):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with patch('api.psycopg2.connect', return_value=conn):
+            pool = ConnectionPool({}, min_size=0, max_size=1)
+            with patch('api.get_pool', return_value=pool):
+                yield conn
+
+    def test_slow_statement_recorded_with_redacted_params(self, conn):
+        """Test statements over the threshold are kept without string parameter values"""
+        log = SlowQueryLog(threshold_ms=1e-9)
+        with patch('api.slow_query_log', log):
+            execute_query("SELECT *\n  FROM users WHERE email = %s AND user_id = %s", ('john@email.com', 11),
+                          fetch_one=True)
+        entry = log.entries()[0]
+
+        assert entry['sql'] == "SELECT * FROM users WHERE email = %s AND user_id = %s"
+        assert entry['params'] == ['***', 11]
+        assert entry['endpoint'] is None
+        assert entry['plan_status'] == 'not_sampled'
+
+    def test_fast_statement_not_recorded(self):
+        """Test the threshold check and that zero disables the log"""
+        log = SlowQueryLog(threshold_ms=100)
+        assert log.is_slow(150) and not log.is_slow(50)
+        assert not SlowQueryLog(threshold_ms=0).is_slow(10 ** 6)
+
+    def test_explain_analyzes_reads_and_only_plans_writes(self, conn):
+        """Test EXPLAIN runs in a rolled-back transaction and never executes writes"""
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = [[{'Plan': {'Node Type': 'Seq Scan'}}]]
+        log = SlowQueryLog()
+
+        plan = log.explain("SELECT * FROM events WHERE event_id = %s", (1,))
+        log.explain("WITH t AS (UPDATE tickets SET status = 'registered' RETURNING 1) SELECT 1", ())
+
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert plan == [{'Plan': {'Node Type': 'Seq Scan'}}]
+        assert executed[1].startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT")
+        assert executed[3].startswith("EXPLAIN (FORMAT JSON) WITH")
+        assert conn.rollback.call_count >= 2
+        conn.commit.assert_not_called()
+
+    def test_sampled_plan_captured_in_background(self, conn):
+        """Test a sampled slow statement gets its plan attached by the worker thread"""
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = [[{'Plan': {'Node Type': 'Index Scan'}}]]
+        log = SlowQueryLog(threshold_ms=1, explain_sample_rate=1)
+
+        entry = log.record("SELECT 1", (), 5.0, 'get_events')
+        log._queue.join()
+
+        assert entry['plan_status'] == 'captured'
+        assert entry['plan'][0]['Plan']['Node Type'] == 'Index Scan'
+
+    def test_full_queue_skips_plan(self):
+        """Test EXPLAIN work is dropped instead of blocking the request"""
+        log = SlowQueryLog(threshold_ms=1, explain_sample_rate=1, queue_size=1)
+        log._ensure_started = lambda: None  # Nothing drains the queue
+
+        log.record("SELECT 1", (), 5.0, None)
+        entry = log.record("SELECT 2", (), 9.0, None)
+
+        assert entry['plan_status'] == 'skipped'
+        assert log.skipped_explains == 1
+        assert [e['sql'] for e in log.entries()] == ["SELECT 2", "SELECT 1"]
+
+    def test_admin_endpoint(self, client, organizer_user):
+        """Test only admins can read the slow query log"""
+        admin = dict(organizer_user, role='admin')
+        log = SlowQueryLog(threshold_ms=1)
+        log.record("SELECT 1", (), 5.0, 'get_events')
+        log.record("SELECT 2", (), 50.0, 'get_stats')
+
+        with patch('api.slow_query_log', log):
+            with patch('api.get_user_by_token', return_value=organizer_user):
+                assert client.get('/api/admin/slow-queries', headers={'Cookie': 'accessToken=1'}).status_code == 403
+            with patch('api.get_user_by_token', return_value=admin):
+                response = client.get('/api/admin/slow-queries?endpoint=get_events',
+                                      headers={'Cookie': 'accessToken=1'})
+
+        assert response.status_code == 200
+        assert [q['sql'] for q in response.json['queries']] == ["SELECT 1"]
+
+
+# ==================== REQUEST CAPTURE TESTS ====================
+
+class TestRequestCapture:
+
+    @pytest.fixture
+    def capture(self, tmp_path):
+        capture = RequestCapture(str(tmp_path / 'requests.jsonl'), buffer_size=1,
+                                 exclude={'stream_notifications'})
+        with patch('api.request_capture', capture):
+            yield capture
+        capture.close()
+
+    def read_trace(self, capture, tmp_path):
+        capture.close()
+        if not (tmp_path / 'requests.jsonl').exists():
+            return []
+        with open(tmp_path / 'requests.jsonl') as f:
+            return [json.loads(line) for line in f]
+
+    def test_requests_captured_with_aliases(self, client, mock_db, capture, tmp_path,
+                                            organizer_user, attendee_user):
+        """Test tokens are replaced by per-role aliases and passwords are masked"""
+        with patch('api.get_user_by_token', side_effect=lambda token: {
+                '1': organizer_user, '2': attendee_user}.get(token)):
+            mock_db.return_value = {'count': 0, 'spent': 0, 'total_events': 0, 'total_tickets': 0,
+                                    'total_revenue': 0}
+            client.set_cookie('accessToken', '2')
+            client.get('/api/stats?x=1')
+            client.set_cookie('accessToken', '1')
+            client.get('/api/stats')
+            client.set_cookie('accessToken', '2')
+            client.get('/api/stats')
+            client.delete_cookie('accessToken')
+            mock_db.return_value = None
+            client.post('/api/login', json={'email': 'john@email.com', 'password': 'secret'})
+
+        trace = self.read_trace(capture, tmp_path)
+
+        assert [entry.get('user') for entry in trace] == ['attendee:0', 'organizer:0', 'attendee:0', None]
+        assert trace[0]['path'] == '/api/stats?x=1'
+        assert trace[3]['body'] == {'email': 'john@email.com', 'password': '***'}
+        assert trace[0]['offset_ms'] <= trace[1]['offset_ms'] <= trace[3]['offset_ms']
+
+    def test_invalid_token_recorded_without_value(self, client, capture, tmp_path):
+        """Test an unknown token is captured as invalid rather than verbatim"""
+        with patch('api.get_user_by_token', return_value=None):
+            client.set_cookie('accessToken', 'stolen-token')
+            client.get('/api/stats')
+
+        trace = self.read_trace(capture, tmp_path)
+
+        assert trace[0]['token'] == 'invalid'
+        assert trace[0]['status'] == 401
+        assert 'stolen-token' not in json.dumps(trace)
+
+    def test_excluded_and_disabled(self, client, mock_db, capture, tmp_path):
+        """Test excluded endpoints are skipped and nothing is written when capture is off"""
+        mock_db.return_value = {'count': 1}
+        capture.exclude.add('validate_email')
+        client.get('/api/validate?email=john@email.com')
+
+        assert self.read_trace(capture, tmp_path) == []
+        with patch('api.request_capture', None):
+            assert client.get('/api/validate').status_code == 400
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        """Test records are counted and dropped when the writer falls behind"""
+        capture = RequestCapture(str(tmp_path / 'requests.jsonl'), queue_size=1)
+        capture._listener.stop()  # Nothing drains the queue
+
+        for _ in range(3):
+            capture.record(time.perf_counter(), 'GET', '/api/stats', None, None, None, 200, 1.0)
+
+        assert capture.dropped == 2
+
+
 # ==================== ERROR HANDLING TESTS ====================
 
 class TestErrorHandling:
@@ -0,0 +1,280 @@
+import json
+import asyncio
+import threading
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch, AsyncMock, MagicMock
+
+pytest.importorskip('asyncpg')
+pytest.importorskip('starlette')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('httpx')
+
+from starlette.testclient import TestClient
+
+import api
+import asgi
+from api import (Metrics, METRIC_DEFINITIONS, RequestCapture, SlowQueryLog, NotificationListener,
+                 ATTENDEE_TICKET_COUNT_SQL, ATTENDEE_UPCOMING_SQL, ATTENDEE_SPENT_SQL, USER_BY_ID_SQL)
+
+
+@pytest.fixture
+def client():
+    """ASGI test client; the lifespan (and so the asyncpg pool) is not started"""
+    api.user_cache.clear()
+    api.catalogue_cache.clear()
+    return TestClient(asgi.app)
+
+
+@pytest.fixture
+def attendee_user():
+    return {'user_id': 11, 'first_name': 'John', 'last_name': 'Smith', 'email': 'john@email.com',
+            'role': 'attendee', 'organization': None}
+
+
+@pytest.fixture
+def organizer_user():
+    return {'user_id': 1, 'first_name': 'Sarah', 'last_name': 'Johnson', 'email': 'sarah@events.com',
+            'role': 'organizer', 'organization': 'TechConf Organizers'}
+
+
+class TestDatabase:
+
+    @pytest.fixture
+    def conn(self):
+        conn = MagicMock()
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = conn
+        with patch('asgi.db_pool', pool):
+            yield conn
+
+    def test_placeholders_rewritten_for_asyncpg(self, conn):
+        """Test queries take psycopg2 %s SQL and run it with $n parameters"""
+        conn.fetchrow = AsyncMock(return_value={'count': 5})
+
+        row = asyncio.run(asgi.fetchrow("SELECT 'a%%' LIKE %s AND user_id = %s", 'x', 11))
+
+        assert row == {'count': 5}
+        assert conn.fetchrow.await_args.args == ("SELECT 'a%' LIKE $1 AND user_id = $2", 'x', 11)
+
+    def test_database_error_returns_none(self, conn):
+        """Test a failed query is logged and reported as None"""
+        conn.fetch = AsyncMock(side_effect=OSError('connection reset'))
+
+        assert asyncio.run(asgi.fetch("SELECT 1")) is None
+
+    def test_slow_query_logged_with_original_sql(self, conn):
+        """Test slow statements keep their %s SQL so EXPLAIN can re-run them through psycopg2"""
+        conn.fetchrow = AsyncMock(return_value=None)
+        slow_query_log = SlowQueryLog(threshold_ms=0.000001)
+
+        with patch('asgi.slow_query_log', slow_query_log):
+            asyncio.run(asgi.fetchrow(USER_BY_ID_SQL, 7))
+
+        [entry] = slow_query_log.entries()
+        assert '%s' in entry['sql']
+        assert entry['params'] == [7]
+
+
+class TestAsyncEndpoints:
+
+    def test_get_stats_attendee(self, client, attendee_user):
+        """Test attendee stats run their three queries concurrently"""
+        api.user_cache.set('11', attendee_user)
+        results = {ATTENDEE_TICKET_COUNT_SQL: {'count': 5}, ATTENDEE_UPCOMING_SQL: {'count': 3},
+                   ATTENDEE_SPENT_SQL: {'spent': Decimal('450.00')}}
+        fetchrow = AsyncMock(side_effect=lambda sql, *args: results[sql])
+
+        with patch('asgi.fetchrow', fetchrow):
+            client.cookies.set('accessToken', '11')
+            response = client.get('/api/stats')
+
+        assert response.status_code == 200
+        assert response.json() == {'total_tickets': 5, 'upcoming_events': 3, 'total_spent': 450.0}
+        assert fetchrow.await_count == 3
+
+    def test_get_stats_unauthorized(self, client):
+        """Test stats require a signed-in user"""
+        response = client.get('/api/stats')
+
+        assert response.status_code == 401
+
+    def test_user_resolved_from_database(self, client, organizer_user):
+        """Test an unknown token is looked up once and cached"""
+        fetchrow = AsyncMock(side_effect=[organizer_user, {
+            'total_events': 4, 'total_tickets': 120, 'total_attendees': 90,
+            'total_revenue': Decimal('9800.50'), 'active_events': 2
+        }])
+
+        with patch('asgi.fetchrow', fetchrow):
+            client.cookies.set('accessToken', '1')
+            response = client.get('/api/dashboard/stats')
+
+        assert response.status_code == 200
+        assert response.json()['active_events'] == 2
+        assert fetchrow.await_args_list[0].args == (USER_BY_ID_SQL, 1)
+        assert api.user_cache.get('1') == organizer_user
+
+    def test_dashboard_forbidden_for_attendee(self, client, attendee_user):
+        """Test the dashboard is organizer-only"""
+        api.user_cache.set('11', attendee_user)
+        client.cookies.set('accessToken', '11')
+
+        response = client.get('/api/dashboard/stats')
+
+        assert response.status_code == 403
+
+    def test_catalogue_served_from_cache(self, client):
+        """Test a warm catalogue page and its ETag are served without Flask"""
+        key = (api.catalogue_generation, None, None, None, None, api.PAGE_SIZE_DEFAULT)
+        api.catalogue_cache.set(key, (b'[{"event_id": 1}]', 'abc123', 'next'))
+
+        with patch('api.execute_query') as execute_query:
+            response = client.get('/api/customer-events')
+            not_modified = client.get('/api/customer-events', headers={'If-None-Match': '"abc123"'})
+
+        assert response.status_code == 200
+        assert response.json() == [{'event_id': 1}]
+        assert response.headers['ETag'] == '"abc123"'
+        assert response.headers['X-Next-Cursor'] == 'next'
+        assert not_modified.status_code == 304
+        execute_query.assert_not_called()
+
+    def test_catalogue_miss_falls_back_to_flask(self, client):
+        """Test a cold catalogue request is answered by the Flask handler"""
+        with patch('api.execute_query', return_value=[]) as execute_query:
+            response = client.get('/api/customer-events')
+
+        assert response.status_code == 200
+        assert response.json() == []
+        execute_query.assert_called_once()
+
+    def test_other_routes_fall_back_to_flask(self, client):
+        """Test routes without an async handler are served by Flask"""
+        response = client.get('/api/profile')
+
+        assert response.status_code == 401
+
+
+class TestObservability:
+
+    @pytest.fixture
+    def metrics(self):
+        metrics = Metrics(METRIC_DEFINITIONS)
+        with patch('api.metrics', metrics):
+            yield metrics
+
+    def test_async_route_reports_queries(self, client, metrics, attendee_user):
+        """Test async routes send X-DB-Query-Count and are counted under the Flask endpoint name"""
+        api.user_cache.set('11', attendee_user)
+        conn = MagicMock()
+        conn.fetchrow = AsyncMock(return_value={'count': 1, 'spent': 0})
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = conn
+
+        with patch('asgi.db_pool', pool):
+            client.cookies.set('accessToken', '11')
+            response = client.get('/api/stats')
+
+        body = metrics.render()
+        assert response.headers['X-DB-Query-Count'] == '3'
+        assert 'http_requests_total{endpoint="get_stats",method="GET",status="200"} 1' in body
+        assert 'db_queries_per_request_count{endpoint="get_stats"} 1' in body
+
+    def test_async_route_logged(self, client, caplog):
+        """Test async routes write the structured request line"""
+        with caplog.at_level('INFO', logger='api'):
+            client.get('/api/stats')
+
+        [record] = [record for record in caplog.records if record.getMessage() == 'GET /api/stats 401']
+        assert record.fields['endpoint'] == 'get_stats'
+        assert record.fields['db_queries'] == 0
+
+    def test_catalogue_fallback_recorded_once(self, client, metrics):
+        """Test a catalogue miss is left to Flask's hooks instead of being counted twice"""
+        with patch('api.execute_query', return_value=[]):
+            response = client.get('/api/customer-events')
+
+        assert response.headers.get_list('X-DB-Query-Count') == ['0']
+        assert 'http_requests_total{endpoint="get_public_events",method="GET",status="200"} 1' in metrics.render()
+
+    def test_async_route_captured(self, client, tmp_path, organizer_user):
+        """Test async routes are appended to the capture trace with the user's alias"""
+        capture = RequestCapture(str(tmp_path / 'requests.jsonl'), buffer_size=1)
+        api.user_cache.set('1', organizer_user)
+        fetchrow = AsyncMock(return_value=None)
+
+        with patch('api.request_capture', capture), patch('asgi.fetchrow', fetchrow):
+            client.cookies.set('accessToken', '1')
+            client.get('/api/dashboard/stats?refresh=1')
+        capture.close()
+
+        with open(tmp_path / 'requests.jsonl') as f:
+            [entry] = [json.loads(line) for line in f]
+        assert entry['path'] == '/api/dashboard/stats?refresh=1'
+        assert entry['user'] == 'organizer:0'
+        assert entry['status'] == 200
+
+
+class TestNotificationStream:
+
+    @pytest.fixture
+    def listener(self):
+        listener = NotificationListener({})
+        listener._run = lambda: None
+        with patch('asgi.notification_listener', listener):
+            yield listener
+
+    def test_stream_unauthorized(self, client):
+        """Test the stream requires a signed-in user"""
+        assert client.get('/api/notifications/stream').status_code == 401
+
+    def test_subscription_wakes_event_loop(self):
+        """Test a put from the listener thread wakes a waiting stream"""
+        async def wait_for_item():
+            subscription = asgi.AsyncSubscription(10, asyncio.get_running_loop())
+            threading.Timer(0.05, subscription.put_nowait, args=({'id': 1},)).start()
+            return await subscription.next(timeout=5)
+
+        assert asyncio.run(wait_for_item()) == {'id': 1}
+
+    def test_subscription_times_out(self):
+        """Test an idle subscription times out so the stream can send a heartbeat"""
+        async def wait_for_item():
+            subscription = asgi.AsyncSubscription(10, asyncio.get_running_loop())
+            return await subscription.next(timeout=0.01)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(wait_for_item())
+
+    def test_stream_sends_backlog_and_live_notifications(self, listener, attendee_user):
+        """Test the async stream replays missed notifications, pushes new ones and unsubscribes"""
+        created_at = datetime(2025, 1, 1, 12, 0)
+        backlog = [{'id': 5, 'title': 'Missed', 'message': 'm', 'type': 'info', 'created_at': created_at}]
+        large = {'id': 7, 'title': 'Large', 'message': 'x' * 10, 'type': 'info', 'created_at': created_at}
+        request = MagicMock(headers={'last-event-id': '4'})
+
+        async def read_stream():
+            with patch('asgi.current_user', AsyncMock(return_value=attendee_user)), \
+                    patch('asgi.fetch', AsyncMock(return_value=backlog)) as fetch, \
+                    patch('asgi.fetchrow', AsyncMock(return_value=large)):
+                response = await asgi.stream_notifications(request)
+                events = response.body_iterator
+                received = [await events.__anext__(), await events.__anext__()]
+                assert listener.subscriber_count() == 1
+                listener.dispatch(json.dumps({'id': 5, 'user_id': 11, 'title': 'Duplicate'}))
+                listener.dispatch(json.dumps({'id': 6, 'user_id': 11, 'title': 'Live', 'type': 'info'}))
+                listener.dispatch(json.dumps({'id': 7, 'user_id': 11, 'fetch': True}))
+                received += [await events.__anext__(), await events.__anext__()]
+                await events.aclose()
+            assert fetch.await_args.args[1:] == (11, 4, api.NOTIFICATION_STREAM_CONFIG['backlog'] + 1)
+            return received
+
+        received = asyncio.run(read_stream())
+
+        assert received[0].startswith('retry:')
+        assert received[1].startswith('id: 5\nevent: notification')
+        assert received[2].startswith('id: 6\n') and '"Live"' in received[2] and 'user_id' not in received[2]
+        assert received[3].startswith('id: 7\n') and '"Large"' in received[3]
+        assert listener.subscriber_count() == 0
@@ -0,0 +1,137 @@
+import json
+import pytest
+from unittest.mock import patch
+import click
+
+from api import DATABASE_CONFIG, catalogue_cache
+from benchmark import (load_trace, TraceResolver, ClientTransport, endpoint_name, percentile, replay,
+                       summarize, compare)
+
+
+@pytest.fixture
+def resolver():
+    """Resolver over a small fake dataset"""
+    return TraceResolver({'organizer': [2, 3], 'attendee': [5, 6, 7]}, [10, 11, 12, 13])
+
+
+class FakeTransport:
+    name = 'fake'
+
+    def __init__(self, status=200, round_trips=3):
+        self.status = status
+        self.round_trips = round_trips
+        self.sent = []
+
+    def send(self, method, path, token, body):
+        self.sent.append((method, path, token, body))
+        return self.status, self.round_trips
+
+
+class TestTrace:
+
+    def test_load_trace_skips_blank_lines(self, tmp_path):
+        """Test trace lines are parsed in order"""
+        trace = tmp_path / 'trace.jsonl'
+        trace.write_text('{"method": "GET", "path": "/api/events"}\n\n{"method": "GET", "path": "/api/stats"}\n')
+
+        assert [entry['path'] for entry in load_trace(str(trace))] == ['/api/events', '/api/stats']
+
+    def test_load_trace_rejects_incomplete_entries(self, tmp_path):
+        """Test entries without a method or path are reported with their line"""
+        trace = tmp_path / 'trace.jsonl'
+        trace.write_text('{"path": "/api/events"}\n')
+
+        with pytest.raises(click.ClickException, match='trace.jsonl:1'):
+            load_trace(str(trace))
+
+    def test_resolve_users_and_events(self, resolver):
+        """Test role aliases and event placeholders map onto existing ids"""
+        assert resolver.token({'user': 'attendee:1'}) == '6'
+        assert resolver.token({'user': 'attendee:4'}) == '6'  # Wraps around
+        assert resolver.token({'token': 42}) == '42'
+        assert resolver.token({}) is None
+        assert resolver.path('/api/events/{event:5}/report') == '/api/events/11/report'
+        assert resolver.body({'event_id': '{event:2}', 'ids': ['{event:0}'], 'ticket_type': 'vip'}) == \
+            {'event_id': 12, 'ids': [10], 'ticket_type': 'vip'}
+
+    def test_unknown_user_role(self, resolver):
+        """Test a role the database has no users for is an error"""
+        with pytest.raises(click.ClickException):
+            resolver.token({'user': 'admin:0'})
+
+    def test_endpoint_name(self):
+        """Test requests are grouped by the Flask endpoint they route to"""
+        assert endpoint_name('GET', '/api/events/7/report?x=1') == 'get_event_report'
+        assert endpoint_name('GET', '/api/missing') == 'GET /api/missing'
+
+
+class TestReplay:
+
+    def test_percentile(self):
+        """Test percentiles interpolate between samples"""
+        values = [1, 2, 3, 4, 5]
+        assert percentile(values, 50) == 3
+        assert percentile(values, 95) == pytest.approx(4.8)
+        assert percentile([], 99) == 0.0
+
+    def test_replay_and_summarize(self, resolver):
+        """Test warmup requests are not measured and results group per endpoint"""
+        trace = [{'method': 'get', 'path': '/api/events', 'user': 'organizer:0'},
+                 {'method': 'GET', 'path': '/api/stats', 'user': 'attendee:0'}]
+        transport = FakeTransport()
+
+        samples, duration = replay(trace, transport, resolver, concurrency=2, repeat=3, warmup=2)
+        results = summarize(samples, duration, transport.name)
+
+        assert len(transport.sent) == 6
+        assert ('GET', '/api/events', '2', None) in transport.sent
+        assert results['requests'] == 4
+        assert set(results['endpoints']) == {'get_events', 'get_stats'}
+        assert results['overall']['round_trips_per_request'] == 3
+        assert results['overall']['errors'] == 0
+
+    def test_server_errors_are_counted(self, resolver):
+        """Test 5xx responses count as errors"""
+        samples, duration = replay([{'method': 'GET', 'path': '/api/stats'}], FakeTransport(status=500), resolver)
+
+        assert summarize(samples, duration, 'fake')['endpoints']['get_stats']['errors'] == 1
+
+    def test_client_transport(self):
+        """Test the in-process transport sends cookies and bodies through the Flask app"""
+        catalogue_cache.clear()
+        with patch.dict(DATABASE_CONFIG), patch('api.execute_query', return_value=[]):
+            transport = ClientTransport()
+            status, round_trips = transport.send('GET', '/api/customer-events', None, None)
+
+        assert status == 200
+        assert round_trips == 0  # execute_query is mocked, so nothing reached Postgres
+
+
+class TestBaseline:
+
+    def make_results(self, p95, throughput=100.0):
+        summary = {'count': 10, 'errors': 0, 'p50_ms': 1.0, 'p95_ms': p95, 'p99_ms': 5.0, 'mean_ms': 1.5,
+                   'round_trips_per_request': 3}
+        return {'mode': 'client', 'requests': 10, 'duration_s': 0.1, 'throughput_rps': throughput,
+                'overall': summary, 'endpoints': {'get_events': summary}}
+
+    def test_compare_flags_p95_regression(self):
+        """Test a p95 slowdown beyond the allowed percentage fails the comparison"""
+        rows, failed = compare(self.make_results(3.0), self.make_results(2.0), max_regression=20)
+
+        assert failed
+        assert ('get_events', 'p95_ms', 2.0, 3.0, 50.0) in rows
+
+    def test_compare_within_tolerance(self):
+        """Test small changes pass and throughput is reported"""
+        rows, failed = compare(self.make_results(2.1, 90.0), self.make_results(2.0), max_regression=20)
+
+        assert not failed
+        assert rows[-1] == ('overall', 'throughput_rps', 100.0, 90.0, -10.0)
+
+    def test_results_are_json_serializable(self, resolver):
+        """Test saved baselines round-trip through JSON"""
+        samples, duration = replay([{'method': 'GET', 'path': '/api/events'}], FakeTransport(), resolver)
+        results = summarize(samples, duration, 'fake')
+
+        assert json.loads(json.dumps(results)) == results
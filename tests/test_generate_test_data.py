@@ -0,0 +1,95 @@
+import random
+import pytest
+import click
+import psycopg2
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+
+from generate_test_data import copy_value, user_identity, ticket_rows, BulkLoader, TICKET_TYPES
+
+
+def make_plan(events=4, attendees=5, multiplier=7, offset=3):
+    return {'seed': 1, 'now': datetime(2026, 1, 1), 'organizers': 2, 'attendees': attendees, 'events': events,
+            'user_start': 100, 'event_start': 500, 'ticket_start': 900,
+            'event_prices': [(10 * e, 20 * e, 30 * e) for e in range(events)],
+            'ticket_multiplier': multiplier, 'ticket_offset': offset,
+            'first_names': ["Mary Jane", 'Sam'], 'last_names': ["O'Brien", 'Lee'],
+            'companies': ['Acme'], 'sentences': ['One.', 'Two.', 'Three.']}
+
+
+class TestBulkLoader:
+
+    def test_copy_value_escapes_text_format(self):
+        """Test values are escaped for COPY text format"""
+        assert copy_value(None) == '\\N'
+        assert copy_value('a\tb\nc\rd\\e') == 'a\\tb\\nc\\rd\\\\e'
+        assert copy_value(12.5) == '12.5'
+
+    def test_user_identity_is_deterministic(self):
+        """Test any worker derives the same name and a unique, clean email for a user"""
+        plan = make_plan()
+        first, last, email = user_identity(plan, 3)
+
+        assert user_identity(plan, 3) == (first, last, email)
+        assert email.endswith('.103@example.com')
+        assert ' ' not in email and "'" not in email
+
+    def test_tickets_never_share_a_slot(self):
+        """Test every ticket gets a distinct (event, user, type) so the unique index holds"""
+        plan = make_plan()
+        total = plan['events'] * plan['attendees'] * len(TICKET_TYPES)
+        rows = list(ticket_rows(plan, 0, total, random.Random(0)))
+
+        slots = {(row[1], row[2], row[3]) for row in rows}
+        assert len(slots) == total
+        assert len({row[6] for row in rows}) == total  # booking_reference
+        for row in rows:
+            assert plan['user_start'] + plan['organizers'] <= row[2] < plan['user_start'] + 7
+            assert row[5] == plan['event_prices'][row[1] - 500][TICKET_TYPES.index(row[3])]
+
+    def test_chunks_cover_the_table(self):
+        """Test rows are split into batch-sized chunks"""
+        loader = BulkLoader('dbname=test', workers=2, batch_size=4, seed=1)
+
+        assert loader.chunks('users', 10) == [('users', 0, 4), ('users', 4, 4), ('users', 8, 2)]
+
+    def test_only_plain_btree_indexes_dropped(self):
+        """Test unique, expression and search indexes the app relies on are left in place"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [('idx_tickets_user', 'CREATE INDEX idx_tickets_user ON tickets (user_id)')]
+
+        indexes = BulkLoader.drop_indexes(cursor)
+
+        sql = cursor.execute.call_args_list[0].args[0]
+        assert 'NOT i.indisunique' in sql and 'i.indexprs IS NULL' in sql and "am.amname = 'btree'" in sql
+        assert cursor.execute.call_args_list[1].args == ("DROP INDEX IF EXISTS idx_tickets_user",)
+        assert indexes == cursor.fetchall.return_value
+
+    def test_failed_index_rebuild_reported(self):
+        """Test the remaining indexes are still rebuilt and the failed ones are listed"""
+        cursor = MagicMock()
+        cursor.execute.side_effect = [psycopg2.Error('out of disk'), None]
+
+        with pytest.raises(click.ClickException) as error:
+            BulkLoader.create_indexes(cursor, [('idx_a', 'CREATE INDEX idx_a ON tickets (a)'),
+                                               ('idx_b', 'CREATE INDEX idx_b ON tickets (b)')])
+
+        assert cursor.execute.call_count == 2
+        assert 'CREATE INDEX idx_a ON tickets (a);' in error.value.message
+        assert 'idx_b' not in error.value.message
+
+    def test_triggers_enabled_when_index_rebuild_fails(self):
+        """Test summary triggers come back even if the index rebuild raises"""
+        loader = BulkLoader('dbname=test', workers=1, batch_size=10, seed=1)
+        triggers = [('tickets', 'tickets_summary')]
+
+        with patch('generate_test_data.psycopg2.connect'), patch('generate_test_data.multiprocessing.Pool'), \
+                patch.object(loader, 'plan', return_value=make_plan()), \
+                patch.object(loader, 'drop_indexes', return_value=[]), \
+                patch.object(loader, 'disable_triggers', return_value=triggers), \
+                patch.object(loader, 'create_indexes', side_effect=click.ClickException('rebuild failed')), \
+                patch.object(loader, 'enable_triggers') as enable_triggers:
+            with pytest.raises(click.ClickException):
+                loader.load(1, 1, 1, 1)
+
+        assert enable_triggers.call_args.args[1] == triggers
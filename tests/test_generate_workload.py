@@ -0,0 +1,72 @@
+from collections import Counter
+
+import pytest
+
+from benchmark import TraceResolver, endpoint_name
+from generate_workload import PROFILES, TraceSynthesizer, load_profile, event_weights, hottest_events
+
+
+@pytest.fixture
+def profile():
+    return load_profile('medium', requests=2000, duration_s=60, on_sales=1, spike_requests=500,
+                        polling_organizers=2, poll_interval_s=10)
+
+
+def purchases(entries):
+    return Counter(entry['body']['event_id'] for entry in entries
+                   if entry['method'] == 'POST' and entry['path'] == '/api/tickets')
+
+
+class TestWorkload:
+
+    def test_profiles_are_complete(self):
+        """Test every named profile defines the same settings"""
+        keys = set(PROFILES['small'])
+        assert {'small', 'medium', 'large', 'flash-sale'} <= set(PROFILES)
+        assert all(set(profile) == keys for profile in PROFILES.values())
+
+    def test_overrides_ignore_unset_options(self):
+        """Test only options given on the command line replace profile values"""
+        profile = load_profile('small', zipf=2.0, requests=None)
+
+        assert profile['zipf'] == 2.0
+        assert profile['requests'] == PROFILES['small']['requests']
+
+    def test_same_seed_same_trace(self, profile):
+        """Test traces are deterministic per seed"""
+        assert TraceSynthesizer(profile, 5).generate() == TraceSynthesizer(profile, 5).generate()
+        assert TraceSynthesizer(profile, 5).generate() != TraceSynthesizer(profile, 6).generate()
+
+    def test_popularity_is_zipf_skewed(self):
+        """Test the hottest event dominates and popularity is shuffled by seed"""
+        weights = event_weights(100, 1.2, seed=1)
+
+        assert max(weights) == 1.0
+        assert sorted(weights, reverse=True)[1] == pytest.approx(2 ** -1.2)
+        assert hottest_events(weights, 1) != hottest_events(event_weights(100, 1.2, seed=2), 1)
+
+    def test_spike_hits_the_hottest_event(self, profile):
+        """Test on-sale purchases pile onto the most popular event within the spike window"""
+        synthesizer = TraceSynthesizer(profile, 3)
+        entries = synthesizer.generate()
+        hottest = hottest_events(synthesizer.weights, 1)[0]
+
+        event, count = purchases(entries).most_common(1)[0]
+        assert event == f"{{event:{hottest}}}"
+        assert count > sum(purchases(entries).values()) / 2
+
+    def test_trace_is_ordered_and_replayable(self, profile):
+        """Test entries are sorted, polled dashboards appear and every request resolves for benchmark.py"""
+        entries = TraceSynthesizer(profile, 3).generate()
+        resolver = TraceResolver({'organizer': [1, 2], 'attendee': [3, 4, 5]}, list(range(10, 210)))
+
+        offsets = [entry['offset_ms'] for entry in entries]
+        assert offsets == sorted(offsets)
+        assert max(offsets) <= 60000
+        endpoints = Counter(endpoint_name(entry['method'], entry['path']) for entry in entries)
+        assert endpoints['get_dashboard_stats'] == endpoints['get_events'] >= 10
+        for entry in entries:
+            resolver.token(entry)
+            resolver.path(entry['path'])
+            resolver.body(entry.get('body'))
+        assert all(not name.startswith(('GET ', 'POST ', 'PUT ')) for name in endpoints)
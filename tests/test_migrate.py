@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import MagicMock
+
+from migrate import Migration, split_statements, load_migrations, migrate
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    """Create a migrations directory with one file of each kind"""
+    (tmp_path / '0002_add_indexes.sql').write_text(
+        "-- migrate:no-transaction\n"
+        "-- Index comment\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a\n"
+        "    ON tickets (event_id);\n"
+        "\n"
+        "ANALYZE tickets;\n"
+    )
+    (tmp_path / '0001_create_table.sql').write_text("CREATE TABLE example (id INT);\n")
+    (tmp_path / 'README.md').write_text("not a migration")
+    return tmp_path
+
+
+class TestMigrations:
+
+    def test_load_migrations_in_version_order(self, migrations_dir):
+        """Test migration files are loaded sorted by version, ignoring other files"""
+        migrations = load_migrations(str(migrations_dir))
+
+        assert [m.version for m in migrations] == [1, 2]
+        assert migrations[0].name == 'create_table'
+        assert migrations[0].transactional
+        assert not migrations[1].transactional
+
+    def test_split_statements(self):
+        """Test statements are split on trailing semicolons without comments"""
+        statements = split_statements(
+            "-- header\nCREATE INDEX idx_a\n    ON tickets (event_id);\n\nANALYZE tickets;\n")
+
+        assert statements == ["CREATE INDEX idx_a\n    ON tickets (event_id)", "ANALYZE tickets"]
+
+    def test_migrate_applies_only_pending(self, migrations_dir):
+        """Test already applied versions are skipped"""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        migrations = load_migrations(str(migrations_dir))
+        cursor.fetchall.return_value = [(1, migrations[0].checksum)]
+
+        applied = migrate(conn, migrations)
+
+        assert [m.version for m in applied] == [2]
+        executed = [c.args[0] for c in cursor.execute.call_args_list]
+        assert "ANALYZE tickets" in executed
+        assert "CREATE TABLE example (id INT);\n" not in executed
+
+    def test_checksum_changes_with_content(self):
+        """Test edited migrations can be detected"""
+        assert Migration(1, 'a', 'SELECT 1;').checksum != Migration(1, 'a', 'SELECT 2;').checksum